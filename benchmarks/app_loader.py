@@ -0,0 +1,54 @@
+"""Load functions from the Streamlit apps without running their UIs.
+
+The apps build their page at import time, so their scoring functions are
+pulled out of the source with ast: every module-level constant that does
+not touch Streamlit, plus the requested functions with their decorators
+(st.cache_data, timing wrappers) stripped, so the raw function is measured.
+Names those constants and functions import from the mtwb package are
+imported as well.
+"""
+import ast
+import os
+import random
+import types
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _uses_streamlit(node):
+    return any(isinstance(n, ast.Name) and n.id == "st" for n in ast.walk(node))
+
+
+def load_app_functions(filename, names):
+    """Return a namespace holding the app's constants and the named functions"""
+    path = os.path.join(REPO_ROOT, filename)
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    kept = [
+        node for node in tree.body
+        if (isinstance(node, ast.Assign) and not _uses_streamlit(node))
+        or (isinstance(node, ast.FunctionDef) and node.name in names)
+    ]
+    used = {n.id for node in kept for n in ast.walk(node) if isinstance(n, ast.Name)}
+    body = []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and not _uses_streamlit(node):
+            body.append(node)
+        elif isinstance(node, ast.ImportFrom) and (node.module or "").startswith("mtwb"):
+            aliases = [alias for alias in node.names if (alias.asname or alias.name) in used]
+            if aliases:
+                body.append(ast.ImportFrom(module=node.module, names=aliases, level=0))
+        elif isinstance(node, ast.FunctionDef) and node.name in names:
+            node.decorator_list = []
+            body.append(node)
+    missing = set(names) - {node.name for node in body if isinstance(node, ast.FunctionDef)}
+    if missing:
+        raise LookupError(f"{filename} has no top-level {', '.join(sorted(missing))}")
+    namespace = {"np": np, "pd": pd, "random": random, "os": os}
+    module = ast.fix_missing_locations(ast.Module(body=body, type_ignores=[]))
+    exec(compile(module, path, "exec"), namespace)
+    return types.SimpleNamespace(**{name: namespace[name] for name in names}, namespace=namespace)
+
@@ -0,0 +1,78 @@
+"""Backtest engine timing on synthetic price history.
+
+Run from the repository root:
+
+    python benchmarks/bench_backtest.py --years 10 --tickers 500
+
+Builds a seeded dates x tickers price matrix (with late listings, delistings
+and missing bars) and synthetic fundamentals, then times mtwb.backtest for
+both weight sets at monthly and weekly rebalancing, with and without
+fundamentals (the --no-fundamentals path). No history store or network is
+needed.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mtwb.backtest import WEIGHT_SETS, backtest  # noqa: E402
+
+
+def synthetic_history(years, size, seed=0):
+    """(prices, benchmark prices, fundamentals) for `size` tickers over `years` of business days"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-01-01", periods=years * 252)
+    market = np.cumsum(rng.normal(0.0003, 0.01, len(dates)))
+    log_prices = np.outer(market, rng.uniform(0.2, 1.8, size)) + np.cumsum(rng.normal(0, 0.015, (len(dates), size)), axis=0)
+    prices = 100 * np.exp(log_prices)
+    for column in range(0, size, 17):
+        prices[:rng.integers(0, len(dates) // 2), column] = np.nan
+    for column in range(5, size, 23):
+        prices[rng.integers(len(dates) // 2, len(dates)):, column] = np.nan
+    prices[rng.random(prices.shape) < 0.002] = np.nan
+    tickers = [f"T{i:05d}" for i in range(size)]
+    fundamentals = pd.DataFrame({
+        "pe_ratio": rng.lognormal(3.0, 0.5, size),
+        "beta": rng.normal(1.0, 0.4, size),
+        "dividend_yield": rng.exponential(0.02, size),
+        "profit_margin": rng.normal(0.1, 0.1, size),
+        "roe": rng.normal(0.15, 0.1, size),
+        "esg_score": rng.uniform(40, 90, size),
+    }, index=tickers)
+    return (pd.DataFrame(prices, index=dates, columns=tickers),
+            pd.Series(100 * np.exp(market), index=dates), fundamentals)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=10, help="years of daily history (default 10)")
+    parser.add_argument("--tickers", type=int, default=500, help="universe size (default 500)")
+    parser.add_argument("--top", type=int, default=50, help="securities held (default 50)")
+    parser.add_argument("--runs", type=int, default=3, help="runs per case; the best is reported (default 3)")
+    args = parser.parse_args(argv)
+
+    prices, benchmark_prices, fundamentals = synthetic_history(args.years, args.tickers)
+    print(f"{args.tickers} tickers x {len(prices)} trading days, top {args.top}")
+    print(f"{'':<16} {'seconds':>8} {'periods':>8} {'CAGR':>8} {'turnover':>9} {'mean IC':>8}")
+    cases = [(weights, freq, with_fundamentals) for weights in sorted(WEIGHT_SETS) for freq in ("M", "W")
+             for with_fundamentals in (True, False)]
+    for weights, freq, with_fundamentals in cases:
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = backtest(prices, benchmark_prices, fundamentals if with_fundamentals else None,
+                              weights=weights, top_n=args.top, freq=freq)
+            timings.append(time.perf_counter() - start)
+        summary = result.summary
+        label = f"{weights} {freq}" + ("" if with_fundamentals else " no-fund")
+        print(f"{label:<16} {min(timings):>8.3f} {summary['periods']:>8} {summary['cagr']:>8.2%} "
+              f"{summary['average_turnover']:>9.2%} {summary['mean_ic']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Throughput of fetch strategies against a local quote server.
+
+Run from the repository root:
+
+    python benchmarks/bench_fetch.py --tickers 2000 --latency 0.02
+
+Starts `python -m mtwb.quote_server --synthetic` on a free port with the
+given simulated per-request latency, then fetches the same tickers four
+ways: requests.get per ticker (a new connection each time) and a keep-alive
+requests.Session per thread, both on the bulk fetcher's thread pool;
+AsyncQuoteClient.get_many; and HTTPQuoteProvider.get_info through
+bulk_fetch.fetch_many, as the apps call it. Reports wall time, requests per second and connections opened.
+"""
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mtwb.bulk_fetch import fetch_many  # noqa: E402
+from mtwb.quote_client import CONNECTIONS_OPENED, INFO_PATH, AsyncQuoteClient, HTTPQuoteProvider  # noqa: E402
+
+
+def start_server(latency):
+    """The quote server as a subprocess, and its base URL once it is listening"""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "mtwb.quote_server", "--port", "0", "--synthetic", "--latency", str(latency)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True
+    )
+    match = re.search(r"http://[\d.]+:\d+", server.stdout.readline())
+    if not match:
+        server.kill()
+        raise SystemExit("quote server did not start")
+    return server, match.group(0)
+
+
+def run_requests_get(url, tickers, workers):
+    def get(ticker):
+        response = requests.get(f"{url}{INFO_PATH}{ticker}", headers={"Connection": "close"}, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    results, failures = fetch_many(tickers, get, workers)
+    # One connection per request
+    return failures, len(tickers)
+
+
+def run_session(url, tickers, workers):
+    # requests.Session isn't thread-safe to share; give each pool thread its own
+    local = threading.local()
+    sessions = []
+
+    def get(ticker):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+            sessions.append(session)
+        response = session.get(f"{url}{INFO_PATH}{ticker}", timeout=30)
+        response.raise_for_status()
+        return response.json()
+    results, failures = fetch_many(tickers, get, workers)
+    for session in sessions:
+        session.close()
+    return failures, len(sessions)
+
+
+def run_async(url, tickers, connections, depth):
+    async def fetch():
+        client = AsyncQuoteClient(url, connections, depth)
+        try:
+            return await client.get_many(tickers)
+        finally:
+            await client.close()
+    before = CONNECTIONS_OPENED.get()
+    results, failures = asyncio.run(fetch())
+    return failures, CONNECTIONS_OPENED.get() - before
+
+
+def run_provider(url, tickers, workers, connections, depth):
+    provider = HTTPQuoteProvider(url, connections, depth)
+    before = CONNECTIONS_OPENED.get()
+    try:
+        results, failures = fetch_many(tickers, provider.get_info, workers)
+    finally:
+        provider.close()
+    return failures, CONNECTIONS_OPENED.get() - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=2000, help="number of lookups (default 2000)")
+    parser.add_argument("--latency", type=float, default=0.02, help="server seconds per request (default 0.02)")
+    parser.add_argument("--workers", type=int, default=16, help="threads for the thread-pool strategies (default 16)")
+    parser.add_argument("--connections", type=int, default=8, help="async client connections (default 8)")
+    parser.add_argument("--pipeline", type=int, default=8, help="async client requests in flight per connection (default 8)")
+    args = parser.parse_args(argv)
+
+    tickers = [f"T{i:05d}" for i in range(args.tickers)]
+    strategies = [
+        ("requests.get", lambda: run_requests_get(url, tickers, args.workers)),
+        ("requests.Session", lambda: run_session(url, tickers, args.workers)),
+        ("AsyncQuoteClient", lambda: run_async(url, tickers, args.connections, args.pipeline)),
+        ("HTTPQuoteProvider", lambda: run_provider(url, tickers, args.workers, args.connections, args.pipeline)),
+    ]
+    server, url = start_server(args.latency)
+    try:
+        print(f"{args.tickers} lookups, {args.latency * 1e3:.0f} ms server latency")
+        print(f"{'':<18} {'seconds':>8} {'req/s':>9} {'connections':>12} {'failures':>9}")
+        for label, run in strategies:
+            start = time.perf_counter()
+            failures, connections = run()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<18} {elapsed:>8.2f} {args.tickers / elapsed:>9.0f} {connections:>12} {len(failures):>9}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Incremental re-ranking vs the CLI's full score_data, on single-ticker updates.
+
+Run from the repository root:
+
+    python benchmarks/bench_incremental.py --tickers 10000 --updates 2000
+
+Builds a seeded synthetic universe in the CLI's units, feeds mtwb.incremental
+random single-ticker updates (some of them new tickers, some moving a
+column extreme) and times them against rescoring the whole universe with
+score_data. Every --check-every updates the incremental order and scores
+are compared with score_data; the exit status is 1 on any mismatch.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_scoring import Universe  # noqa: E402
+from mtwb.evaluator import score_data  # noqa: E402
+from mtwb.incremental import INPUT_COLUMNS, IncrementalRanking  # noqa: E402
+
+
+def random_update(rng, frame):
+    """{input column: value} for one to three columns, drawn from the universe's own values"""
+    columns = rng.choice(INPUT_COLUMNS, rng.integers(1, 4), replace=False)
+    update = {}
+    for column in columns:
+        value = frame[column].iloc[rng.integers(len(frame))]
+        # Occasionally push past the column's extremes so a full renormalize is needed
+        update[column] = value * 3 if rng.random() < 0.02 else value * rng.uniform(0.9, 1.1)
+    return update
+
+
+def reference(ranking):
+    """(tickers best first, their scores) from score_data over the ranking's current inputs"""
+    frame = pd.DataFrame(ranking._inputs, columns=INPUT_COLUMNS)
+    frame.insert(0, "company", ranking.tickers)
+    frame["sector"] = "Technology"
+    scored = score_data(frame, risk_weight=0)
+    order = np.argsort(-scored["mtwb_score"].to_numpy(), kind="stable")
+    return [ranking.tickers[row] for row in order], scored["mtwb_score"].to_numpy()[order]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=10000, help="universe size (default 10000)")
+    parser.add_argument("--updates", type=int, default=2000, help="single-ticker updates to apply (default 2000)")
+    parser.add_argument("--new-share", type=float, default=0.05, help="share of updates that add a ticker (default 0.05)")
+    parser.add_argument("--check-every", type=int, default=250, help="compare with score_data every N updates (default 250)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    universe = Universe(args.tickers)
+    frame = universe.cli_frame[["company"] + INPUT_COLUMNS]
+    ranking = IncrementalRanking.from_frame(frame, risk_weight=0)
+
+    start = time.perf_counter()
+    reference(ranking)
+    full_seconds = time.perf_counter() - start
+
+    mismatches = 0
+    elapsed = 0.0
+    renormalized = 0
+    for i in range(1, args.updates + 1):
+        if rng.random() < args.new_share:
+            ticker = f"N{i:07d}"
+        else:
+            ticker = ranking.tickers[rng.integers(len(ranking))]
+        update = random_update(rng, frame)
+        start = time.perf_counter()
+        renormalized += ranking.update(ticker, update)
+        elapsed += time.perf_counter() - start
+
+        if i % args.check_every == 0 or i == args.updates:
+            tickers, scores = reference(ranking)
+            top = ranking.to_frame()
+            same_order = list(top["company"]) == tickers
+            max_diff = float(np.max(np.abs(top["mtwb_score"].to_numpy() - scores)))
+            if not same_order or max_diff > 1e-9:
+                mismatches += 1
+                print(f"update {i}: order {'matches' if same_order else 'DIFFERS'}, max score difference {max_diff:.3g}")
+
+    print(f"{len(ranking)} tickers after {args.updates} updates ({renormalized} needed a full renormalize)")
+    print(f"incremental update  {elapsed / args.updates * 1e3:>9.3f} ms average")
+    print(f"full score_data     {full_seconds * 1e3:>9.3f} ms")
+    print("matches score_data" if not mismatches else f"{mismatches} check(s) differ from score_data")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Memory and pickling cost of full .info payloads vs projected SecurityRecords.
+
+Run from the repository root:
+
+    python benchmarks/bench_records.py --tickers 5000
+
+Payloads are synthesized with the shape of a real Yahoo .info dict (about
+150 keys of numbers, strings and a nested officers list), or loaded from
+--fixture-dir recordings and cycled to the requested count.
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mtwb.records import INFO_FIELDS, SecurityRecord  # noqa: E402
+
+SECTORS = ["Technology", "Healthcare", "Financial Services", "Energy", "Utilities", "Industrials"]
+
+
+def synthetic_info(rng, i):
+    """A payload shaped like yf.Ticker(...).info: ~150 keys, nested officers list"""
+    info = {
+        "trailingPE": rng.uniform(5, 60),
+        "beta": rng.uniform(0.2, 2.5),
+        "dividendYield": rng.uniform(0, 0.06),
+        "profitMargins": rng.uniform(-0.2, 0.4),
+        "returnOnEquity": rng.uniform(-0.1, 0.6),
+        "52WeekChange": rng.uniform(-0.5, 1.0),
+        "marketCap": rng.randint(10**8, 3 * 10**12),
+        "currentPrice": rng.uniform(5, 900),
+        "sector": rng.choice(SECTORS),
+        "longBusinessSummary": " ".join(rng.choice(SECTORS).lower() for _ in range(120)),
+        "companyOfficers": [
+            {"name": f"Officer {i}-{n}", "title": "Executive", "age": rng.randint(35, 75), "totalPay": rng.randint(10**5, 10**7)}
+            for n in range(10)
+        ],
+    }
+    for n in range(80):
+        info[f"numericField{n}"] = rng.uniform(-1e6, 1e6)
+    for n in range(40):
+        info[f"textField{n}"] = f"value-{i}-{n}"
+    for n in range(20):
+        info[f"intField{n}"] = rng.randint(0, 10**9)
+    return info
+
+
+def load_payloads(count, fixture_dir=None, seed=0):
+    if fixture_dir:
+        recordings = []
+        for name in sorted(os.listdir(fixture_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(fixture_dir, name)) as f:
+                    recordings.append(json.load(f))
+        if not recordings:
+            raise SystemExit(f"No recordings in {fixture_dir}")
+        return [dict(recordings[i % len(recordings)]) for i in range(count)]
+    rng = random.Random(seed)
+    return [synthetic_info(rng, i) for i in range(count)]
+
+
+def measure(label, build):
+    """Peak traced bytes to build the collection, plus pickle size and round-trip time"""
+    tracemalloc.start()
+    values = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    blob = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+    dumped = time.perf_counter()
+    pickle.loads(blob)
+    loaded = time.perf_counter()
+    return {
+        "label": label,
+        "peak_bytes": peak,
+        "pickle_bytes": len(blob),
+        "dumps_seconds": dumped - start,
+        "loads_seconds": loaded - dumped,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=5000, help="number of payloads (default 5000)")
+    parser.add_argument("--fixture-dir", help="use recorded .info payloads instead of synthetic ones")
+    args = parser.parse_args(argv)
+
+    payloads = load_payloads(args.tickers, args.fixture_dir)
+    results = [
+        measure("full .info dicts", lambda: [json.loads(json.dumps(p)) for p in payloads]),
+        measure("projected dicts", lambda: [{k: p[k] for k in INFO_FIELDS if k in p} for p in payloads]),
+        measure("SecurityRecord", lambda: [SecurityRecord.from_info(p) for p in payloads]),
+    ]
+
+    print(f"{args.tickers} tickers")
+    print(f"{'':<18} {'peak MB':>9} {'per ticker':>11} {'pickle MB':>10} {'dumps ms':>9} {'loads ms':>9}")
+    for r in results:
+        print(
+            f"{r['label']:<18} {r['peak_bytes'] / 1e6:>9.2f} {r['peak_bytes'] / args.tickers:>10.0f}B "
+            f"{r['pickle_bytes'] / 1e6:>10.2f} {r['dumps_seconds'] * 1e3:>9.1f} {r['loads_seconds'] * 1e3:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Micro-benchmarks for normalization, scoring and top-N selection.
+
+Run from the repository root:
+
+    python benchmarks/bench_scoring.py                   # 100, 10k and 1M securities
+    python benchmarks/bench_scoring.py --sizes 100,10000 --only per_row
+    python benchmarks/bench_scoring.py --update-baseline  # accept the current numbers
+
+Each benchmark runs on a seeded synthetic universe. Timings (best and median
+of several runs) and peak traced memory go to a JSON results file and are
+compared with benchmarks/baseline.json. The exit status is 1 when any
+benchmark is more than --tolerance slower than its baseline, so the script
+can gate a CI job. Baselines are machine-specific; regenerate them with
+--update-baseline on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.app_loader import load_app_functions  # noqa: E402
+from mtwb.evaluator import (  # noqa: E402
+    SECTOR_MAP,
+    WEIGHTS,
+    add_esg_scores,
+    calculate_esg_score,
+    normalize,
+    score_data,
+    select_top,
+)
+from mtwb.scoring import (  # noqa: E402
+    EVALUATOR_WEIGHTS,
+    V2_WEIGHTS,
+    calculate_mtwb_scores_v1,
+    calculate_mtwb_scores_v2,
+)
+from mtwb.parallel import score_parallel  # noqa: E402
+from mtwb.reweight import ScoreMatrix  # noqa: E402
+from mtwb.screening import ScreeningIndex  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_SIZES = (100, 10_000, 1_000_000)
+
+# Per-row scorers see records in chunks this size, so 1M rows never need 1M dicts at once
+CHUNK_SIZE = 100_000
+
+SECTORS = ["Technology", "Healthcare", "Financial Services", "Consumer Cyclical", "Energy", "Utilities", "Industrials"]
+ESG_RATINGS = ["AAA", "AA", "A", "BBB", "BB"]
+
+
+class Universe:
+    """Seeded synthetic securities in the CLI's (percentage) and v2's (decimal) units"""
+
+    def __init__(self, size, seed=0):
+        rng = np.random.default_rng(seed)
+        self.size = size
+        self.tickers = [f"T{i:07d}" for i in range(size)]
+        decimals = {
+            "pe_ratio": rng.lognormal(3.0, 0.5, size),
+            "beta": rng.normal(1.0, 0.4, size),
+            "dividend_yield": rng.exponential(0.02, size),
+            "profit_margin": rng.normal(0.12, 0.15, size),
+            "roe": rng.normal(0.15, 0.2, size),
+            "fiftytwo_wk_change": rng.normal(0.1, 0.3, size),
+            "esg_score": rng.uniform(10, 25, size),
+        }
+        self.v2_frame = pd.DataFrame(decimals)
+        self.v1_frame = self.v2_frame.copy()
+        for column in ("dividend_yield", "profit_margin", "roe", "fiftytwo_wk_change"):
+            self.v1_frame[column] *= 100
+        self.cli_frame = self.v1_frame.copy()
+        self.cli_frame.insert(0, "company", self.tickers)
+        self.cli_frame["sector"] = rng.choice(SECTORS, size)
+        self.cli_frame["etf"] = rng.random(size) < 0.1
+        self.cli_frame["esg_rating"] = rng.choice(ESG_RATINGS, size)
+
+    def record_chunks(self, frame):
+        """Lists of per-security dicts, CHUNK_SIZE at a time"""
+        for start in range(0, self.size, CHUNK_SIZE):
+            yield frame.iloc[start:start + CHUNK_SIZE].to_dict("records")
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register fn(universe) -> workload, where workload() runs the measured
+    code once. Setup done in fn itself is not timed. A workload may return
+    the seconds it wants counted instead of its own wall time (for chunked
+    runs whose record building should not count).
+    """
+    def decorator(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+
+def _timed_chunks(score_fn, chunks):
+    elapsed = 0.0
+    for records in chunks:
+        start = time.perf_counter()
+        for record in records:
+            score_fn(record)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+@benchmark("cli_normalize")
+def bench_cli_normalize(universe):
+    series = universe.cli_frame["pe_ratio"]
+    return lambda: normalize(series, inverse=True)
+
+
+@benchmark("cli_score_data")
+def bench_cli_score_data(universe):
+    frame = universe.cli_frame.copy()
+    return lambda: score_data(frame)
+
+
+@benchmark("cli_score_parallel")
+def bench_cli_score_parallel(universe):
+    # One worker per core; universes under MIN_PARALLEL_ROWS are scored in-process
+    frame = universe.cli_frame.copy()
+    # Start the pool outside the timed runs
+    score_parallel(frame, WEIGHTS, SECTOR_MAP, workers=0)
+    return lambda: score_parallel(frame, WEIGHTS, SECTOR_MAP, workers=0)
+
+
+@benchmark("v1_per_row_score")
+def bench_v1_per_row(universe):
+    app = load_app_functions("streamlit_app.py", ["calculate_mtwb_score"])
+    return lambda: _timed_chunks(app.calculate_mtwb_score, universe.record_chunks(universe.v1_frame))
+
+
+@benchmark("v2_per_row_score")
+def bench_v2_per_row(universe):
+    app = load_app_functions("streamlit_app_v2.py", ["calculate_mtwb_score"])
+    return lambda: _timed_chunks(app.calculate_mtwb_score, universe.record_chunks(universe.v2_frame))
+
+
+@benchmark("v1_batch_score")
+def bench_v1_batch(universe):
+    return lambda: calculate_mtwb_scores_v1(universe.v1_frame)
+
+
+@benchmark("v2_batch_score")
+def bench_v2_batch(universe):
+    app = load_app_functions("streamlit_app_v2.py", [])
+    weights = app.namespace["MTWB_WEIGHTS"]
+    return lambda: calculate_mtwb_scores_v2(universe.v2_frame, weights)
+
+
+@benchmark("cli_esg_score")
+def bench_cli_esg(universe):
+    tickers = universe.tickers
+
+    def run():
+        for ticker in tickers:
+            calculate_esg_score(ticker)
+    return run
+
+
+@benchmark("v1_esg_score")
+def bench_v1_esg(universe):
+    app = load_app_functions("streamlit_app.py", ["calculate_esg_score", "get_esg_data"])
+    tickers = universe.tickers
+
+    def run():
+        for ticker in tickers:
+            app.calculate_esg_score(ticker)
+    return run
+
+
+@benchmark("cli_esg_impute")
+def bench_cli_esg_impute(universe):
+    frame = universe.cli_frame[["company", "sector", "etf"]]
+    return lambda: add_esg_scores(frame.copy())
+
+
+@benchmark("v2_esg_score")
+def bench_v2_esg(universe):
+    app = load_app_functions("streamlit_app_v2.py", ["calculate_esg_score", "get_esg_data"])
+    tickers = universe.tickers
+
+    def run():
+        for i, ticker in enumerate(tickers):
+            app.calculate_esg_score(ticker, i % 10 == 0)
+    return run
+
+
+@benchmark("v2_top_n")
+def bench_v2_top_n(universe):
+    # The selection step of compute_rankings in streamlit_app_v2.py
+    app = load_app_functions("streamlit_app_v2.py", [])
+    scores = calculate_mtwb_scores_v2(universe.v2_frame, app.namespace["MTWB_WEIGHTS"])["mtwb_score"].to_numpy()
+    return lambda: np.argsort(-scores, kind="stable")[:50]
+
+
+@benchmark("v2_rerank")
+def bench_v2_rerank(universe):
+    # Sidebar weight change in streamlit_app_v2.py: re-score and pick the top 50 from the cached score matrix
+    scores = calculate_mtwb_scores_v2(universe.v2_frame, V2_WEIGHTS)
+    matrix = ScoreMatrix.from_frame(scores)
+    return lambda: matrix.top(EVALUATOR_WEIGHTS, 50)
+
+
+@benchmark("cli_select_top")
+def bench_cli_select_top(universe):
+    frame = score_data(universe.cli_frame.copy())
+    return lambda: select_top(frame, "all", top=50)
+
+
+@benchmark("screen_index_build")
+def bench_screen_index_build(universe):
+    frame = score_data(universe.cli_frame.copy())
+    return lambda: ScreeningIndex(frame)
+
+
+@benchmark("screen_query")
+def bench_screen_query(universe):
+    # "Top 25 Healthcare stocks rated A or better" against a prebuilt index
+    index = ScreeningIndex(score_data(universe.cli_frame.copy()))
+    return lambda: index.query(25, "stocks", "Healthcare", min_esg_rating="A")
+
+
+@benchmark("screen_query_empty")
+def bench_screen_query_empty(universe):
+    # Every ESG-filtered match of a universe with no ETFs, as `--universe etfs --top 0` asks for
+    frame = score_data(universe.cli_frame[~universe.cli_frame["etf"]].reset_index(drop=True))
+    index = ScreeningIndex(frame)
+    if len(index.query(None, "etfs", min_esg_rating="A")):
+        raise AssertionError("an empty group returned rows")
+    return lambda: index.query(None, "etfs", min_esg_rating="A")
+
+
+def measure(workload, min_time=0.5, max_runs=25):
+    """Best/median seconds over repeated runs, then peak traced bytes of one more run"""
+    durations = []
+    total = 0.0
+    while len(durations) < max_runs and (total < min_time or len(durations) < 3):
+        start = time.perf_counter()
+        counted = workload()
+        elapsed = time.perf_counter() - start
+        if isinstance(counted, float):
+            elapsed = counted
+        durations.append(elapsed)
+        total += elapsed
+        # Don't repeat multi-second runs just to reach three samples
+        if elapsed > 2.0:
+            break
+    tracemalloc.start()
+    workload()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_seconds": min(durations),
+        "median_seconds": statistics.median(durations),
+        "runs": len(durations),
+        "peak_bytes": peak,
+    }
+
+
+def run(sizes, only=None):
+    results = {}
+    for size in sizes:
+        universe = Universe(size)
+        for name, setup in BENCHMARKS.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            key = f"{name}[{size}]"
+            results[key] = measure(setup(universe))
+            print(f"{key:<36} {results[key]['best_seconds'] * 1e3:>11.3f} ms {results[key]['peak_bytes'] / 1e6:>9.2f} MB", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print current vs baseline best times; return the keys that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:<36} {'-':>12} {current['best_seconds'] * 1e3:>12.3f}")
+            continue
+        ratio = current["best_seconds"] / previous["best_seconds"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<36} {previous['best_seconds'] * 1e3:>12.3f} {current['best_seconds'] * 1e3:>12.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def parse_sizes(text):
+    return [int(size) for size in text.split(",") if size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MTWB normalization, scoring and ranking")
+    parser.add_argument("--sizes", type=parse_sizes, default=list(DEFAULT_SIZES), help="comma-separated universe sizes (default 100,10000,1000000)")
+    parser.add_argument("--only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="results JSON path")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline before failing (default 0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="write these results to the baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.only)
+    report = {"environment": environment(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nWrote {args.output}")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "results": baseline}, f, indent=2, sort_keys=True)
+        print(f"Updated {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared data, fetch and scoring helpers for the MTWB evaluators."""
@@ -0,0 +1,53 @@
+"""Streamlit admin panel for the in-process performance metrics."""
+import pandas as pd
+import streamlit as st
+
+from mtwb import metrics
+
+
+def render_admin_panel():
+    """Sidebar expander with fetch, cache and scoring metrics plus a Prometheus export"""
+    with st.expander("Admin: Performance Metrics"):
+        rates = metrics.cache_hit_rates()
+        st.markdown("**Cache hit rates**")
+        if rates:
+            st.dataframe(pd.DataFrame(
+                [{"Cache": cache, "Lookups": lookups, "Hits": hits, "Hit Rate": f"{rate:.0%}"}
+                 for cache, (lookups, hits, rate) in sorted(rates.items())]
+            ), hide_index=True)
+        else:
+            st.caption("No cache lookups yet")
+
+        st.markdown("**Fetch latency**")
+        fetches = metrics.FETCH_SECONDS.summary()
+        for labels, count, mean in fetches:
+            st.caption(f"{labels.get('provider', 'all')}: {count} fetches, {mean * 1000:.0f} ms average")
+        failures = metrics.FETCH_FAILURES.snapshot()
+        if failures:
+            st.caption("Failures: " + ", ".join(
+                f"{dict(key)['site']} × {count}" for key, count in sorted(failures.items())
+            ))
+        slowest = metrics.slowest_tickers()
+        if slowest:
+            st.dataframe(pd.DataFrame(
+                [{"Ticker": ticker, "Last Fetch (ms)": round(seconds * 1000)} for ticker, seconds in slowest]
+            ), hide_index=True)
+        if not fetches and not failures:
+            st.caption("No upstream fetches yet")
+
+        st.markdown("**Scoring, refresh and render time**")
+        timings = metrics.SCORING_SECONDS.summary() + metrics.REFRESH_SECONDS.summary() + metrics.RENDER_SECONDS.summary()
+        for labels, count, mean in timings:
+            name = labels.get("scorer") or labels.get("job") or f"render {labels.get('section')}"
+            st.caption(f"{name}: {count} runs, {mean * 1000:.1f} ms average")
+
+        prometheus_text = metrics.render_prometheus()
+        st.download_button(
+            "Download Prometheus metrics",
+            prometheus_text,
+            file_name="mtwb_metrics.prom",
+            mime="text/plain"
+        )
+        if st.button("Write metrics file"):
+            path = metrics.write_prometheus()
+            st.success(f"Metrics written to {path}")
@@ -0,0 +1,105 @@
+"""Stale-while-revalidate snapshots refreshed off the request path."""
+import threading
+import time
+from typing import Any, NamedTuple
+
+
+class Snapshot(NamedTuple):
+    """An immutable computed value and when it was produced"""
+
+    value: Any
+    created_at: float
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+
+class SnapshotRefresher:
+    """
+    Recompute a value on a background thread every `interval` seconds.
+
+    Readers always get the last good snapshot immediately; a refresh in
+    flight never blocks them, and a failed refresh keeps the previous
+    snapshot in place. New snapshots are swapped in with a single reference
+    assignment, so readers never observe a partially built value.
+    """
+
+    def __init__(self, compute_fn, interval, name="mtwb-refresh"):
+        self.compute_fn = compute_fn
+        self.interval = interval
+        self.name = name
+        self.last_error = None
+        self._snapshot = None
+        self._refreshing = False
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def refreshing(self):
+        """True while a refresh is computing in the background"""
+        return self._refreshing
+
+    def start(self, delay=0):
+        """Start the refresh loop; the first refresh begins after `delay` seconds (or a request_refresh)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(delay,), name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_refresh(self):
+        """Ask the background thread to refresh now instead of waiting for the timer"""
+        self._wake.set()
+
+    def get(self, timeout=None):
+        """
+        Return the latest Snapshot. Only blocks if no snapshot has ever been
+        produced, waiting up to `timeout` seconds (None waits indefinitely)
+        for the first refresh attempt; returns None if that attempt failed or
+        has not finished by then.
+        """
+        if self._snapshot is None:
+            self._ready.wait(timeout)
+        return self._snapshot
+
+    def refresh(self):
+        """Compute a new snapshot on the calling thread and swap it in"""
+        with self._refresh_lock:
+            self._refreshing = True
+            try:
+                value = self.compute_fn()
+                self._snapshot = Snapshot(value, time.time())
+                self.last_error = None
+                return True
+            except Exception as e:
+                self.last_error = e
+                return False
+            finally:
+                self._refreshing = False
+                self._ready.set()
+
+    def _run(self, delay=0):
+        if delay > 0:
+            self._wake.wait(delay)
+            self._wake.clear()
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+def describe_age(seconds):
+    """Human-readable snapshot age, e.g. '42 sec ago' or '3 min ago'"""
+    if seconds < 60:
+        return f"{int(seconds)} sec ago"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    return f"{seconds / 3600:.1f} h ago"
@@ -0,0 +1,338 @@
+"""Historical backtest of MTWB rankings over the local price history.
+
+At each rebalance date (the last trading day of every month, week or
+quarter) the universe is re-scored from what was known on that day, the top
+N securities are held in equal weight until the next rebalance, and the
+portfolio is marked to market daily. Every step works on dates x tickers
+arrays: inputs, scores, selection, returns, turnover and drawdown are
+array operations, with no loop over dates or tickers.
+
+Point-in-time inputs come from the history store (python -m mtwb.history):
+the 52-week change is the trailing year's adjusted-close return and beta is
+the rolling beta against the benchmark. The store has no fundamentals
+history, so P/E, dividend yield, margins, ROE and ESG are the cached
+current values held constant over the whole backtest (or left neutral with
+--no-fundamentals); treat results as indicative, not free of look-ahead.
+
+    python -m mtwb.backtest --weights v2 --top 50
+    python -m mtwb.backtest --weights cli --freq Q --cost-bps 10 --output periods.csv
+"""
+import argparse
+import sys
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from mtwb.bulk_fetch import fetch_many
+from mtwb.evaluator import WEIGHTS, add_esg_scores, get_financials
+from mtwb.history import DEFAULT_HISTORY_DIR, HistoryStore
+from mtwb.metrics import SCORING_SECONDS, timed_function
+from mtwb.risk import DEFAULT_BENCHMARK, DEFAULT_WINDOW, TRADING_DAYS, daily_returns, forward_fill, rolling_beta
+from mtwb.scoring import V2_WEIGHTS, calculate_mtwb_scores_v2, frame_from_columns_v2
+from mtwb.universe import COMPANIES, ETFS
+
+# Weight sets by name: the v2 app's MTWB_WEIGHTS and the CLI's weights
+WEIGHT_SETS = {"v2": V2_WEIGHTS, "cli": WEIGHTS}
+# Rebalance frequencies: pandas period alias and periods per year
+FREQUENCIES = {"M": ("M", 12), "W": ("W", 52), "Q": ("Q", 4)}
+# Trading days of history needed before the first rebalance (for the 52-week change)
+LOOKBACK = TRADING_DAYS
+
+# Fundamentals held constant over the backtest; beta and fiftytwo_wk_change are point-in-time
+FUNDAMENTAL_INPUTS = ["pe_ratio", "beta", "dividend_yield", "profit_margin", "roe", "esg_score"]
+COMPONENTS = ["pe_score", "volatility_score", "dividend_score", "profit_score", "roe_score",
+              "growth_score", "esg_score_normalized"]
+
+
+class BacktestResult(NamedTuple):
+    """Per-period returns and statistics, the daily equity curve and holdings"""
+
+    # Indexed by rebalance date, for the period starting there: return (net of costs),
+    # universe_return (equal weight, every eligible security), benchmark_return,
+    # turnover, ic (rank correlation of scores with the period's returns), holdings
+    periods: pd.DataFrame
+    # Net asset value from 1.0 at the first rebalance, every trading day
+    equity: pd.Series
+    # Portfolio weights at each rebalance (rebalance dates x tickers)
+    weights: pd.DataFrame
+    summary: dict
+
+
+def rebalance_rows(dates, freq="M", start=None, end=None):
+    """Row of the last trading day in each period, from the first with LOOKBACK days of history"""
+    dates = pd.DatetimeIndex(dates)
+    rows = pd.Series(np.arange(len(dates))).groupby(dates.to_period(FREQUENCIES[freq][0])).max().to_numpy()
+    keep = rows >= LOOKBACK
+    if start is not None:
+        keep &= dates[rows] >= pd.Timestamp(start)
+    if end is not None:
+        keep &= dates[rows] <= pd.Timestamp(end)
+    return rows[keep]
+
+
+def point_in_time_inputs(prices, benchmark_prices, rows, window=DEFAULT_WINDOW):
+    """
+    {input: rebalances x tickers array} of the scorer inputs the price
+    history gives as of each rebalance row: fiftytwo_wk_change and beta
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = prices[rows] / prices[rows - LOOKBACK] - 1
+    if benchmark_prices is None:
+        beta = np.full((len(rows), prices.shape[1]), np.nan)
+    else:
+        # returns[i] ends on day i + 1, so the beta as of day r is row r - 1
+        beta = rolling_beta(daily_returns(prices), daily_returns(benchmark_prices), window)[rows - 1]
+    return {"fiftytwo_wk_change": change, "beta": beta}
+
+
+def _weight_keys(weights):
+    """weights with both spellings of the ESG key, so either weight set fits either scorer"""
+    weights = dict(weights)
+    weights.setdefault("esg_score", weights.get("esg_score_normalized"))
+    weights.setdefault("esg_score_normalized", weights["esg_score"])
+    return weights
+
+
+def _normalize_rows(values, inverse=False):
+    """mtwb.evaluator.normalize applied to every row at once, over its non-NaN entries"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        low = np.nanmin(values, axis=1, keepdims=True)
+        high = np.nanmax(values, axis=1, keepdims=True)
+        scaled = 100 * ((high - values) if inverse else (values - low)) / (high - low)
+    flat = np.where(np.isnan(values), np.nan, 50.0)
+    return np.where(high == low, flat, scaled)
+
+
+@timed_function(SCORING_SECONDS, scorer="backtest_panel")
+def score_panel(inputs, eligible, weights, method="v2"):
+    """
+    mtwb_score for every rebalance x ticker (NaN where not eligible).
+
+    method "v2" uses the v2 app's absolute scales; "cli" normalizes each
+    input over the securities eligible that day, as the CLI does over its
+    universe. inputs maps scorer input names to rebalances x tickers arrays.
+    """
+    weights = _weight_keys(weights)
+    shape = eligible.shape
+    if method == "v2":
+        frame = frame_from_columns_v2({name: np.ravel(values) for name, values in inputs.items()}, rows=eligible.size)
+        scores = calculate_mtwb_scores_v2(frame, weights)["mtwb_score"].to_numpy().reshape(shape)
+        return np.where(eligible, scores, np.nan)
+    if method != "cli":
+        raise ValueError(f"unknown scoring method {method!r}; expected v2 or cli")
+
+    # The CLI fills missing inputs with 0 before normalizing
+    values = {name: np.where(eligible, np.nan_to_num(np.asarray(inputs.get(name, 0.0), dtype=float)), np.nan)
+              for name in ("pe_ratio", "beta", "dividend_yield", "profit_margin", "roe", "fiftytwo_wk_change", "esg_score")}
+    components = {
+        "pe_score": _normalize_rows(values["pe_ratio"], inverse=True),
+        "volatility_score": _normalize_rows(values["beta"], inverse=True),
+        "dividend_score": _normalize_rows(values["dividend_yield"]),
+        "profit_score": _normalize_rows(values["profit_margin"]),
+        "roe_score": _normalize_rows(values["roe"]),
+        "growth_score": _normalize_rows(values["fiftytwo_wk_change"]),
+        "esg_score_normalized": values["esg_score"] * 4,
+    }
+    mtwb_score = sum(components[name] * weights[name] for name in COMPONENTS)
+    return _normalize_rows(mtwb_score)
+
+
+def top_weights(scores, top_n):
+    """Equal weights over the top_n scores of each row (fewer if fewer are eligible); ties keep column order"""
+    filled = np.where(np.isnan(scores), -np.inf, scores)
+    order = np.argsort(-filled, axis=1, kind="stable")[:, :top_n]
+    held = np.take_along_axis(filled, order, axis=1) > -np.inf
+    counts = held.sum(axis=1, keepdims=True)
+    weights = np.zeros_like(filled)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        np.put_along_axis(weights, order, np.where(held, 1.0 / counts, 0.0), axis=1)
+    return weights
+
+
+def _rank_correlation(scores, returns):
+    """Spearman correlation of each row's scores with its returns, over entries where both are known"""
+    both = ~np.isnan(scores) & ~np.isnan(returns)
+    score_ranks = pd.DataFrame(np.where(both, scores, np.nan)).rank(axis=1).to_numpy()
+    return_ranks = pd.DataFrame(np.where(both, returns, np.nan)).rank(axis=1).to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score_ranks = score_ranks - np.nanmean(score_ranks, axis=1, keepdims=True)
+        return_ranks = return_ranks - np.nanmean(return_ranks, axis=1, keepdims=True)
+        return (np.nansum(score_ranks * return_ranks, axis=1)
+                / np.sqrt(np.nansum(score_ranks ** 2, axis=1) * np.nansum(return_ranks ** 2, axis=1)))
+
+
+def _max_drawdown(equity):
+    return float(np.min(equity / np.maximum.accumulate(equity) - 1)) if len(equity) else np.nan
+
+
+@timed_function(SCORING_SECONDS, scorer="backtest")
+def backtest(prices, benchmark_prices=None, fundamentals=None, weights="v2", method=None, top_n=50,
+             freq="M", cost_bps=0.0, window=DEFAULT_WINDOW, start=None, end=None):
+    """
+    Backtest top-N MTWB portfolios.
+
+    prices is a DataFrame of adjusted closes (trading dates x tickers);
+    benchmark_prices a Series on the same dates, for realized beta and the
+    benchmark return. fundamentals, indexed by ticker with
+    FUNDAMENTAL_INPUTS, supplies the inputs without history (reported beta
+    is used only where no rolling beta is available). weights is a name in
+    WEIGHT_SETS or a dict of component weights; method ("v2" or "cli")
+    defaults to the named weight set's own scorer, else v2. cost_bps is
+    charged on the value traded at each rebalance.
+    """
+    weights_name = weights if isinstance(weights, str) else "custom"
+    if isinstance(weights, str):
+        method = method or weights
+        weights = WEIGHT_SETS[weights]
+    method = method or "v2"
+    dates = pd.DatetimeIndex(prices.index)
+    tickers = list(prices.columns)
+    raw = prices.to_numpy(dtype=float)
+    filled = forward_fill(raw)
+    bench = None if benchmark_prices is None else np.asarray(benchmark_prices, dtype=float)
+
+    rows = rebalance_rows(dates, freq, start, end)
+    if len(rows) < 2:
+        raise ValueError(f"need at least two rebalance dates after {LOOKBACK} trading days of history; got {len(rows)}")
+
+    # Inputs and scores at every rebalance
+    inputs = point_in_time_inputs(raw, bench, rows, window)
+    if fundamentals is not None:
+        static = fundamentals.reindex(tickers)
+        for name in FUNDAMENTAL_INPUTS:
+            column = np.broadcast_to(static[name].to_numpy(dtype=float), inputs["beta"].shape)
+            inputs[name] = np.where(np.isnan(inputs[name]), column, inputs[name]) if name in inputs else column
+    eligible = ~np.isnan(raw[rows])
+    scores = score_panel(inputs, eligible, weights, method)
+    held = top_weights(scores, top_n)
+
+    # Returns over each holding period, per ticker and for the portfolio
+    with np.errstate(divide="ignore", invalid="ignore"):
+        forward = filled[rows[1:]] / filled[rows[:-1]] - 1
+    gross = np.nansum(held[:-1] * forward, axis=1)
+    universe = np.nanmean(np.where(eligible[:-1], forward, np.nan), axis=1)
+
+    # Value traded at each rebalance against the drifted previous holdings (everything at the first)
+    drifted = np.zeros_like(held)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drifted[1:] = np.nan_to_num(held[:-1] * (1 + forward) / (1 + gross)[:, None])
+    traded = np.abs(held - drifted).sum(axis=1)
+    kept = 1 - traded * cost_bps / 1e4
+    net = kept[:-1] * (1 + gross) - 1
+    # NAV just after each rebalance, costs paid
+    nav = np.cumprod(np.concatenate([[1.0], 1 + gross])) * np.cumprod(kept)
+
+    # Daily marks: each day from the first rebalance values the holdings set at the latest one before it
+    days = np.arange(rows[0], rows[-1] + 1)
+    period = np.clip(np.searchsorted(rows, days, side="left") - 1, 0, len(rows) - 2)
+    cash = 1 - held.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = cash[period] + np.nansum(held[period] * (filled[days] / filled[rows[period]]), axis=1)
+    equity = nav[period] * growth
+    equity[0] = 1.0
+
+    benchmark_return = (bench[rows[1:]] / bench[rows[:-1]] - 1) if bench is not None else np.full(len(rows) - 1, np.nan)
+    ic = _rank_correlation(scores[:-1], np.where(eligible[:-1], forward, np.nan))
+    turnover = traded[:-1] / 2
+
+    periods_per_year = FREQUENCIES[freq][1]
+    years = len(net) / periods_per_year
+    total = float(np.prod(1 + net) - 1)
+    volatility = float(np.std(net, ddof=1) * np.sqrt(periods_per_year)) if len(net) > 1 else np.nan
+    summary = {
+        "weights": weights_name,
+        "method": method,
+        "top_n": top_n,
+        "start": str(dates[rows[0]].date()),
+        "end": str(dates[rows[-1]].date()),
+        "periods": len(net),
+        "total_return": total,
+        "cagr": float((1 + total) ** (1 / years) - 1) if years else np.nan,
+        "volatility": volatility,
+        "sharpe": float(np.mean(net) * periods_per_year / volatility) if volatility else np.nan,
+        "max_drawdown": _max_drawdown(equity),
+        "universe_total_return": float(np.prod(1 + np.nan_to_num(universe)) - 1),
+        "benchmark_total_return": float(np.prod(1 + benchmark_return) - 1),
+        # First rebalance (buying from cash) excluded
+        "average_turnover": float(np.mean(turnover[1:])) if len(turnover) > 1 else np.nan,
+        "mean_ic": float(np.nanmean(ic)) if np.isfinite(ic).any() else np.nan,
+        "hit_rate": float(np.mean(net > universe)),
+    }
+    rebalance_dates = dates[rows]
+    periods = pd.DataFrame({
+        "end": rebalance_dates[1:],
+        "return": net,
+        "universe_return": universe,
+        "benchmark_return": benchmark_return,
+        "turnover": turnover,
+        "ic": ic,
+        "holdings": (held[:-1] > 0).sum(axis=1),
+    }, index=pd.DatetimeIndex(rebalance_dates[:-1], name="start"))
+    return BacktestResult(
+        periods=periods,
+        equity=pd.Series(equity, index=pd.DatetimeIndex(dates[days], name="date"), name="equity"),
+        weights=pd.DataFrame(held, index=pd.DatetimeIndex(rebalance_dates, name="date"), columns=tickers),
+        summary=summary
+    )
+
+
+def load_fundamentals(tickers):
+    """FUNDAMENTAL_INPUTS indexed by ticker, fetched (through the fundamentals cache) as the CLI fetches them"""
+    jobs = [(ticker, ticker in ETFS) for ticker in tickers]
+    results, failures = fetch_many(jobs, lambda job: get_financials(*job))
+    for (ticker, _), error in failures.items():
+        print(f"No fundamentals for {ticker}: {error}", file=sys.stderr)
+    data = [row for row in results if row]
+    if not data:
+        return pd.DataFrame(columns=FUNDAMENTAL_INPUTS)
+    return add_esg_scores(pd.DataFrame(data)).set_index("company")[FUNDAMENTAL_INPUTS]
+
+
+def run_backtest(tickers=None, store=None, benchmark=DEFAULT_BENCHMARK, fundamentals=True, **kwargs):
+    """backtest() over tickers (default: the stored stock and ETF universe) from the history store"""
+    # An empty store is falsy, so test for None
+    store = HistoryStore() if store is None else store
+    tickers = [ticker for ticker in (tickers or COMPANIES + ETFS) if ticker in store]
+    if not tickers:
+        raise ValueError(f"no price history for the requested tickers in {store.path}; run python -m mtwb.history first")
+    prices = store.frame("adj_close", tickers)
+    benchmark_prices = store.frame("adj_close", [benchmark])[benchmark] if benchmark in store else None
+    return backtest(prices, benchmark_prices, load_fundamentals(tickers) if fundamentals else None, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest top-N MTWB portfolios over the local price history")
+    parser.add_argument("tickers", nargs="*", help="universe to rank (default: all stored stocks and ETFs)")
+    parser.add_argument("--weights", choices=sorted(WEIGHT_SETS), default="v2",
+                        help="weight set: the v2 app's MTWB_WEIGHTS or the CLI's weights (default v2)")
+    parser.add_argument("--method", choices=["v2", "cli"],
+                        help="scoring: v2 absolute scales or CLI universe normalization (default: the weight set's own)")
+    parser.add_argument("--top", type=int, default=50, help="securities held (default 50)")
+    parser.add_argument("--freq", choices=sorted(FREQUENCIES), default="M", help="rebalance monthly, weekly or quarterly (default M)")
+    parser.add_argument("--start", help="first rebalance on or after this date")
+    parser.add_argument("--end", help="last rebalance on or before this date")
+    parser.add_argument("--cost-bps", type=float, default=0.0, help="trading cost in basis points of value traded")
+    parser.add_argument("--benchmark", default=DEFAULT_BENCHMARK, help=f"benchmark ticker (default {DEFAULT_BENCHMARK})")
+    parser.add_argument("--no-fundamentals", action="store_true",
+                        help="score on price history alone, leaving the other inputs neutral")
+    parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR, help="price history store directory")
+    parser.add_argument("--output", help="write per-period results to this CSV file")
+    args = parser.parse_args(argv)
+
+    try:
+        result = run_backtest(
+            args.tickers or None, HistoryStore(args.history_dir), args.benchmark, not args.no_fundamentals,
+            weights=args.weights, method=args.method, top_n=args.top, freq=args.freq,
+            cost_bps=args.cost_bps, start=args.start, end=args.end
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    for key, value in result.summary.items():
+        print(f"{key:<24} {value:.4f}" if isinstance(value, float) else f"{key:<24} {value}")
+    if args.output:
+        result.periods.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Bounded-concurrency fetching for whole ticker universes."""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Number of concurrent outbound requests; override with MTWB_FETCH_WORKERS
+DEFAULT_MAX_WORKERS = int(os.environ.get("MTWB_FETCH_WORKERS", "16"))
+
+
+def fetch_many(items, fetch_fn, max_workers=None):
+    """
+    Call fetch_fn(item) for every item on a bounded thread pool.
+
+    Returns (results, failures): results is a list aligned with items holding
+    each fetched value (None where the fetch failed or returned nothing), and
+    failures maps each failed item to the exception it raised. One bad ticker
+    never aborts the rest of the batch.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    failures = {}
+    if not items:
+        return results, failures
+
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(items)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mtwb-fetch") as pool:
+        futures = {pool.submit(fetch_fn, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                failures[items[i]] = e
+
+    return results, failures
@@ -0,0 +1,320 @@
+"""ESG ratings, carbon and community scores loaded from a data file.
+
+The dataset is a CSV, JSON or Parquet file with one row per security:
+ticker, esg_rating, carbon_targets and community, plus optional
+community_initiatives, sector and etf columns (data/esg.csv ships with the
+repo). It is loaded into column arrays with a (ticker, is ETF) -> row index,
+so a lookup is one dict probe however many tickers the file holds.
+
+Tickers the dataset doesn't cover are imputed from their sector peers: the
+median rating, carbon and community scores of covered securities in the same
+sector, or of all covered stocks (or ETFs) when the sector has fewer than
+MIN_PEERS. Estimates depend only on the dataset and the sector, so they are
+the same in every process and run and can be cached alongside real values.
+
+Every caller in a process shares one ESGStore per path. The store checks
+the file's modification time at most every RELOAD_CHECK_SECONDS and, when
+it changed, loads the new file and swaps it in with a single assignment.
+A file that fails to load leaves the previous dataset in place.
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from mtwb.metrics import counter, gauge
+from mtwb.screening import ESG_RATINGS
+
+# Dataset file; override with MTWB_ESG_PATH (.csv, .json or .parquet)
+DEFAULT_ESG_PATH = os.environ.get(
+    "MTWB_ESG_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "esg.csv")
+)
+# How often lookups stat() the file for changes
+RELOAD_CHECK_SECONDS = 2.0
+
+REQUIRED_COLUMNS = ["ticker", "esg_rating", "carbon_targets", "community"]
+
+# Covered securities a sector needs before its own medians are used for imputation
+MIN_PEERS = 3
+# community_initiatives of an imputed ticker
+IMPUTED_INITIATIVES = "Not in the ESG dataset; scores estimated from sector peers"
+# Estimate when the dataset has no peers at all (the midpoint of the old random fallback)
+DEFAULT_ESTIMATE = ("A", 65, 72, IMPUTED_INITIATIVES)
+
+ESG_LOADS = counter("mtwb_esg_loads_total", "ESG dataset loads, by result")
+ESG_ROWS = gauge("mtwb_esg_rows", "Securities in the loaded ESG dataset")
+
+
+def read_esg_file(path):
+    """
+    The dataset at `path` as a DataFrame, by file extension. JSON may be a
+    list of row objects or an object mapping ticker -> fields.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        frame = pd.read_csv(path, dtype={"ticker": str, "esg_rating": str, "community_initiatives": str})
+    elif extension == ".json":
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [{"ticker": ticker, **fields} for ticker, fields in data.items()]
+        frame = pd.DataFrame(data)
+    elif extension in (".parquet", ".pq"):
+        frame = pd.read_parquet(path)
+    else:
+        raise ValueError(f"{path}: ESG data must be .csv, .json or .parquet")
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{path} is missing ESG column(s): {', '.join(missing)}")
+    return frame
+
+
+def _scores(values):
+    """Numeric column as int64 when every value is whole (as the old inline data was), else float64"""
+    values = pd.to_numeric(values).to_numpy(dtype=float)
+    if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+        return values.astype(np.int64)
+    return values
+
+
+def _text(frame, column):
+    if column not in frame.columns:
+        return np.full(len(frame), "", dtype=object)
+    return frame[column].fillna("").astype(str).str.strip().to_numpy(dtype=object)
+
+
+def _flags(values):
+    if values.dtype == bool:
+        return values.to_numpy()
+    return values.astype(str).str.strip().str.lower().isin(["true", "1", "yes", "y"]).to_numpy()
+
+
+class ESGTable:
+    """One load of the dataset: column arrays plus a (ticker, is ETF) -> row index"""
+
+    def __init__(self, frame, version=None):
+        self.version = version
+        self.tickers = frame["ticker"].astype(str).str.strip().str.upper().to_numpy()
+        self.etf = _flags(frame["etf"]) if "etf" in frame.columns else np.zeros(len(frame), dtype=bool)
+        self.esg_rating = frame["esg_rating"].astype(str).str.strip().str.upper().to_numpy()
+        self.carbon_targets = _scores(frame["carbon_targets"])
+        self.community = _scores(frame["community"])
+        self.community_initiatives = _text(frame, "community_initiatives")
+        self.sectors = _text(frame, "sector")
+        # Later rows win when a ticker is listed twice
+        self._rows = {key: row for row, key in enumerate(zip(self.tickers.tolist(), self.etf.tolist()))}
+        # Per asset type, a ticker index and the dataset row of each entry, for bulk lookups
+        self._indexes = {}
+        for flag in (False, True):
+            keys = [(ticker, row) for (ticker, etf), row in self._rows.items() if etf == flag]
+            self._indexes[flag] = (pd.Index([ticker for ticker, _ in keys], dtype=object),
+                                   np.array([row for _, row in keys], dtype=np.int64))
+        # (sector, is ETF) -> imputed field tuple; a table never changes, so neither do these
+        self._estimates = {}
+        # Plain-Python copies of the columns, so single lookups skip NumPy scalar boxing
+        self._values = list(zip(
+            self.esg_rating.tolist(),
+            self.carbon_targets.tolist(),
+            self.community.tolist(),
+            self.community_initiatives.tolist()
+        ))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def get(self, ticker, etf=False):
+        """A fresh dict of the ticker's ESG fields, or None if the dataset has no row for it"""
+        row = self._rows.get((ticker, etf))
+        if row is None:
+            return None
+        esg_rating, carbon_targets, community, community_initiatives = self._values[row]
+        return {
+            "esg_rating": esg_rating,
+            "carbon_targets": carbon_targets,
+            "community": community,
+            "community_initiatives": community_initiatives,
+        }
+
+    def estimate(self, sector=None, etf=False):
+        """Imputed (esg_rating, carbon_targets, community, community_initiatives) for an uncovered ticker"""
+        key = (sector or "", bool(etf))
+        values = self._estimates.get(key)
+        if values is None:
+            values = self._estimates[key] = self._peer_medians(*key)
+        return values
+
+    def _peer_medians(self, sector, etf):
+        peers = self.etf == etf
+        in_sector = peers & (self.sectors == sector)
+        if sector and in_sector.sum() >= MIN_PEERS:
+            peers = in_sector
+        if not peers.any():
+            return DEFAULT_ESTIMATE
+        # Upper median of the known ratings, so a tie rounds toward the worse rating
+        ranks = np.sort([ESG_RATINGS.index(rating) for rating in self.esg_rating[peers] if rating in ESG_RATINGS])
+        esg_rating = ESG_RATINGS[int(ranks[len(ranks) // 2])] if len(ranks) else DEFAULT_ESTIMATE[0]
+        return (esg_rating, _median(self.carbon_targets[peers]), _median(self.community[peers]), IMPUTED_INITIATIVES)
+
+    def lookup(self, ticker, sector=None, etf=False):
+        """get(), falling back to the sector-peer estimate for tickers the dataset doesn't cover"""
+        esg_data = self.get(ticker, etf)
+        if esg_data is not None:
+            return esg_data
+        esg_rating, carbon_targets, community, community_initiatives = self.estimate(sector, etf)
+        return {
+            "esg_rating": esg_rating,
+            "carbon_targets": carbon_targets,
+            "community": community,
+            "community_initiatives": community_initiatives,
+        }
+
+    def impute(self, tickers, sectors=None, etf=None):
+        """
+        ESG fields for a whole universe in one pass: dataset values for covered
+        tickers and sector-peer estimates for the rest. Returns a DataFrame
+        row-aligned with `tickers`, plus an esg_imputed flag column.
+        """
+        tickers = np.asarray(tickers, dtype=object)
+        size = len(tickers)
+        etf = np.zeros(size, dtype=bool) if etf is None else np.asarray(etf, dtype=bool)
+        sectors = np.full(size, "", dtype=object) if sectors is None else np.asarray(sectors, dtype=object)
+        rows = np.full(size, -1, dtype=np.int64)
+        # Uncovered tickers point into `estimates`, one per distinct (sector, is ETF)
+        estimate_codes = np.zeros(size, dtype=np.int64)
+        estimates = []
+        for flag in (False, True):
+            part = np.flatnonzero(etf == flag)
+            if not len(part):
+                continue
+            index, index_rows = self._indexes[flag]
+            positions = index.get_indexer(tickers[part])
+            found = positions >= 0
+            rows[part[found]] = index_rows[positions[found]]
+            uncovered = part[~found]
+            codes, uniques = pd.factorize(sectors[uncovered], use_na_sentinel=False)
+            estimate_codes[uncovered] = codes + len(estimates)
+            estimates.extend(self.estimate(None if pd.isna(sector) else str(sector), flag) for sector in uniques)
+        covered = rows >= 0
+        estimates = list(zip(*estimates)) or [[]] * 4
+
+        result = {}
+        names = ["esg_rating", "carbon_targets", "community", "community_initiatives"]
+        for name, imputed in zip(names, estimates):
+            column = getattr(self, name)
+            values = np.empty(size, dtype=column.dtype)
+            values[covered] = column[rows[covered]]
+            values[~covered] = np.asarray(imputed, dtype=column.dtype)[estimate_codes[~covered]]
+            result[name] = values
+        result["esg_imputed"] = ~covered
+        return pd.DataFrame(result)
+
+
+def _median(values):
+    """Median of a score column, whole when the column is (as the shipped data is)"""
+    values = values[~np.isnan(values)] if values.dtype.kind == "f" else values
+    if not len(values):
+        return np.nan
+    median = float(np.median(values))
+    return int(round(median)) if values.dtype.kind == "i" else median
+
+
+def _signature(stat):
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class ESGStore:
+    """
+    The dataset at `path`, reloaded when the file changes.
+
+    `version` changes on every successful reload, so callers that cache
+    ESG-derived values can include it in their cache key.
+    """
+
+    def __init__(self, path=DEFAULT_ESG_PATH, check_interval=RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self._table = self._load(_signature(os.stat(path)))
+
+    def _load(self, signature):
+        try:
+            table = ESGTable(read_esg_file(self.path), version=signature)
+        except Exception:
+            ESG_LOADS.inc(result="error")
+            raise
+        ESG_LOADS.inc(result="ok")
+        ESG_ROWS.set(len(table))
+        return table
+
+    def maybe_reload(self):
+        """Reload if the check interval has passed and the file changed; returns True if it did"""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return False
+            self._checked = now
+            try:
+                signature = _signature(os.stat(self.path))
+                if signature == self._table.version:
+                    return False
+                self._table = self._load(signature)
+                self.last_error = None
+                return True
+            except Exception as e:
+                # Keep serving the last good dataset
+                self.last_error = e
+                return False
+
+    @property
+    def table(self):
+        self.maybe_reload()
+        return self._table
+
+    @property
+    def version(self):
+        return self.table.version
+
+    def __len__(self):
+        return len(self.table)
+
+    def get(self, ticker, etf=False):
+        """ESG fields for a stock (or, with etf=True, an ETF), or None if the dataset doesn't cover it"""
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.maybe_reload()
+        return self._table.get(ticker, etf)
+
+    def lookup(self, ticker, sector=None, etf=False):
+        """ESG fields for any ticker, imputed from `sector` peers when the dataset doesn't cover it"""
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.maybe_reload()
+        return self._table.lookup(ticker, sector, etf)
+
+    def impute(self, tickers, sectors=None, etf=None):
+        """ESGTable.impute on the current dataset"""
+        return self.table.impute(tickers, sectors, etf)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_esg_store(path=DEFAULT_ESG_PATH):
+    """The process-wide ESGStore for `path`, loading it on first use"""
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = _stores[path] = ESGStore(path)
+    return store
@@ -0,0 +1,282 @@
+"""The CLI evaluator's pipeline: fetch, ESG, universe-relative scoring and selection.
+
+Shared by "WHARTON Stock Evaluator.py" and the scoring service
+(mtwb.service), so a ranking served over HTTP is the one the CLI would
+compute locally. Scores are min-max normalized over the frame being
+scored, so they depend on which securities are scored together.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from mtwb.bulk_fetch import fetch_many
+from mtwb.esg import get_esg_store
+from mtwb.fundamentals_cache import cached_info
+from mtwb.metrics import REFRESH_SECONDS, SCORING_SECONDS, timed_function
+from mtwb.risk import DEFAULT_RISK_WEIGHT, add_risk_components
+from mtwb.scoring import EVALUATOR_WEIGHTS as WEIGHTS
+from mtwb.screening import ScreeningIndex
+from mtwb.universe import COMPANIES, ETFS
+
+# MTWB ESG Scoring System (25 points total)
+ESG_WEIGHTS = {
+    "esg_rating": 0.40,      # 10 points - External ESG ratings
+    "carbon_targets": 0.35,  # 8.75 points - Carbon reduction/renewable energy
+    "community": 0.25        # 6.25 points - Community engagement initiatives
+}
+
+# ESG Rating Scale (AAA to CCC)
+ESG_RATING_SCORES = {
+    "AAA": 100, "AA": 90, "A": 80, "BBB": 70, "BB": 60, "B": 50, "CCC": 30, "CC": 20, "C": 10
+}
+
+# Yahoo sector -> the sector used for filtering
+SECTOR_MAP = {
+    # Industrials
+    "Industrials": "Industrials",
+    "Industrial": "Industrials",
+    "Aerospace & Defense": "Industrials",
+    "Business Services": "Industrials",
+    "Conglomerates": "Industrials",
+    "Engineering & Construction": "Industrials",
+    "Marine Shipping": "Industrials",
+    "Transportation": "Industrials",
+    "Trucking": "Industrials",
+    
+    # Real Estate
+    "Real Estate": "Real Estate",
+    "REIT": "Real Estate",
+    "Real Estate - General": "Real Estate",
+    
+    # Utilities
+    "Utilities": "Utilities",
+    "Utilities - Regulated": "Utilities",
+    "Utilities - Independent Power Producers": "Utilities",
+    
+    # Consumer Staples
+    "Consumer Defensive": "Consumer Staples",
+    "Consumer Staples": "Consumer Staples",
+    "Beverages": "Consumer Staples",
+    "Food": "Consumer Staples",
+    "Household Products": "Consumer Staples",
+    "Tobacco": "Consumer Staples",
+    
+    # Healthcare
+    "Healthcare": "Healthcare",
+    "Biotechnology": "Healthcare",
+    "Pharmaceuticals": "Healthcare",
+    "Medical": "Healthcare",
+    "Healthcare Plans": "Healthcare",
+    
+    # Technology
+    "Technology": "Technology",
+    "Software": "Technology",
+    "Hardware": "Technology",
+    "Semiconductors": "Technology",
+    
+    # Financials
+    "Financial Services": "Financials",
+    "Banks": "Financials",
+    "Insurance": "Financials",
+    "Capital Markets": "Financials",
+    
+    # Energy
+    "Energy": "Energy",
+    "Oil & Gas": "Energy",
+    
+    # Communication Services
+    "Communication Services": "Communication Services",
+    "Telecom": "Communication Services",
+    "Media": "Communication Services",
+    
+    # Consumer Discretionary
+    "Consumer Cyclical": "Consumer Discretionary",
+    "Consumer Discretionary": "Consumer Discretionary",
+    "Retail": "Consumer Discretionary",
+    "Automotive": "Consumer Discretionary",
+    
+    # Materials
+    "Basic Materials": "Materials",
+    "Chemicals": "Materials",
+    "Metals & Mining": "Materials",
+    "Paper & Forest Products": "Materials"
+}
+
+# Sectors available for filtering
+SECTORS = [
+    "All Sectors",
+    "Industrials",
+    "Real Estate",
+    "Utilities",
+    "Consumer Staples",
+    "Healthcare",
+    "Technology",
+    "Financials",
+    "Energy",
+    "Communication Services",
+    "Consumer Discretionary",
+    "Materials"
+]
+
+# Columns of a ranked row in batch output and service responses
+OUTPUT_COLUMNS = [
+    "rank", "company", "mtwb_score", "main_sector", "sector", "etf",
+    "esg_rating", "esg_score", "carbon_targets", "community",
+    "pe_ratio", "beta", "dividend_yield", "profit_margin", "roe", "fiftytwo_wk_change",
+    "pe_score", "volatility_score", "dividend_score", "profit_score", "roe_score",
+    "growth_score", "esg_score_normalized"
+]
+
+
+def normalize(series, inverse=False):
+    if series.max() == series.min():
+        return pd.Series([50]*len(series), index=series.index)
+    if inverse:
+        return 100 * (series.max() - series) / (series.max() - series.min())
+    else:
+        return 100 * (series - series.min()) / (series.max() - series.min())
+
+
+def get_esg_data(ticker, sector=None):
+    """
+    Get ESG data for a company. In practice, this would integrate with:
+    - MSCI ESG Ratings API
+    - Sustainalytics API  
+    - Morningstar ESG API
+    - Company sustainability reports
+    """
+    # Known tickers come from the ESG dataset (data/esg.csv or MTWB_ESG_PATH);
+    # others get the medians of their sector peers in it
+    return get_esg_store().lookup(ticker, sector)
+
+
+def calculate_esg_score(ticker, sector=None):
+    """
+    Calculate MTWB ESG Score (0-25 points)
+    """
+    esg_data = get_esg_data(ticker, sector)
+    
+    # Convert ESG rating to score
+    esg_rating_score = ESG_RATING_SCORES.get(esg_data["esg_rating"], 50)
+    
+    # Calculate weighted ESG score (0-25 points)
+    esg_score = (
+        esg_rating_score * ESG_WEIGHTS["esg_rating"] +
+        esg_data["carbon_targets"] * ESG_WEIGHTS["carbon_targets"] +
+        esg_data["community"] * ESG_WEIGHTS["community"]
+    )
+    
+    return {
+        "esg_rating": esg_data["esg_rating"],
+        "carbon_targets": esg_data["carbon_targets"],
+        "community": esg_data["community"],
+        "esg_score": esg_score
+    }
+
+
+def add_esg_scores(df):
+    """
+    ESG columns for the whole universe in one pass. Stocks the dataset
+    doesn't cover are imputed from sector peers; ETFs get neutral values.
+    """
+    esg = get_esg_store().impute(df["company"], df["sector"])
+    stock = ~df["etf"].to_numpy(dtype=bool)
+    esg_score = (
+        esg["esg_rating"].map(ESG_RATING_SCORES).fillna(50) * ESG_WEIGHTS["esg_rating"] +
+        esg["carbon_targets"] * ESG_WEIGHTS["carbon_targets"] +
+        esg["community"] * ESG_WEIGHTS["community"]
+    ).to_numpy()
+    df["esg_rating"] = np.where(stock, esg["esg_rating"].to_numpy(), "N/A")
+    df["carbon_targets"] = np.where(stock, esg["carbon_targets"].to_numpy(), 50)
+    df["community"] = np.where(stock, esg["community"].to_numpy(), 50)
+    df["esg_score"] = np.where(stock, esg_score, 12.5)  # Neutral ESG score for ETFs
+    return df
+
+
+def get_financials(ticker, etf=False, info=None):
+    info = cached_info(ticker) if info is None else info
+
+    pe_ratio = info.get("trailingPE", np.nan)
+    beta = info.get("beta", np.nan)
+    dividend_yield = info.get("dividendYield", 0) or 0
+    sector = info.get("sector", "ETF" if etf else "Unknown")
+    profit_margin = info.get("profitMargins", np.nan)
+    roe = info.get("returnOnEquity", np.nan)
+    fiftytwo_wk_change = info.get("52WeekChange", np.nan)
+    
+    # ESG columns are added for the whole universe at once by add_esg_scores
+    return {
+        "company": ticker,
+        "sector": sector,
+        "pe_ratio": pe_ratio,
+        "beta": beta,
+        "dividend_yield": dividend_yield,
+        "profit_margin": profit_margin,
+        "roe": roe,
+        "fiftytwo_wk_change": fiftytwo_wk_change,
+        "etf": etf
+    }
+
+
+def fetch_frame(jobs, fetch_fn=get_financials):
+    """
+    (input frame with ESG columns, failures) for (ticker, is ETF) jobs fetched
+    concurrently; failures maps each job that raised to its exception
+    """
+    results, failures = fetch_many(jobs, lambda job: fetch_fn(*job))
+    df = pd.DataFrame([data for data in results if data])
+    if df.empty:
+        return df, failures
+    return add_esg_scores(df).fillna(0), failures
+
+
+@timed_function(REFRESH_SECONDS, job="cli_collect")
+def collect_data():
+    """Fetch financials for every stock and ETF concurrently, skipping failures"""
+    jobs = [(c, False) for c in COMPANIES] + [(e, True) for e in ETFS]
+    df, failures = fetch_frame(jobs)
+    for (ticker, _), error in failures.items():
+        print(f"Skipping {ticker}: {error}", file=sys.stderr)
+    return df
+
+
+@timed_function(SCORING_SECONDS, scorer="cli_normalize")
+def score_data(df, risk_weight=DEFAULT_RISK_WEIGHT):
+    df["pe_score"] = normalize(df["pe_ratio"], inverse=True)   
+    df["volatility_score"] = normalize(df["beta"], inverse=True)   
+    df["dividend_score"] = normalize(df["dividend_yield"])  
+    df["profit_score"] = normalize(df["profit_margin"])     
+    df["roe_score"] = normalize(df["roe"])                   
+    df["growth_score"] = normalize(df["fiftytwo_wk_change"]) 
+
+    # --- ESG Score normalization (0-25 points scaled to 0-100) ---
+    df["esg_score_normalized"] = df["esg_score"] * 4  # Scale 0-25 to 0-100
+
+    df["mtwb_score"] = (
+        df["pe_score"] * WEIGHTS["pe_score"] +
+        df["volatility_score"] * WEIGHTS["volatility_score"] +
+        df["dividend_score"] * WEIGHTS["dividend_score"] +
+        df["profit_score"] * WEIGHTS["profit_score"] +
+        df["roe_score"] * WEIGHTS["roe_score"] +
+        df["growth_score"] * WEIGHTS["growth_score"] +
+        df["esg_score_normalized"] * WEIGHTS["esg_score_normalized"]
+    )
+
+    # Optional realized-risk components from the local price history
+    df = add_risk_components(df, df["company"], risk_weight)
+
+    df["mtwb_score"] = normalize(df["mtwb_score"])
+
+    df["main_sector"] = df["sector"].map(SECTOR_MAP).fillna("Other")
+    return df
+
+
+def select_top(df, universe, sector="All Sectors", top=50, min_esg_rating=None, min_esg_score=None, index=None):
+    """
+    Filter to stocks, ETFs or both (optionally one sector and ESG minimums)
+    and keep the top N by MTWB score. Pass a ScreeningIndex built on df to
+    reuse its sector/asset-type indexes across queries.
+    """
+    index = ScreeningIndex(df) if index is None else index
+    return index.select(top or None, universe, None if sector == "All Sectors" else sector, min_esg_rating, min_esg_score)
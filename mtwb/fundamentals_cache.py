@@ -0,0 +1,187 @@
+"""Durable on-disk cache of ticker fundamentals shared by every entry point."""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from mtwb.metrics import FETCH_FAILURES, FETCH_SECONDS, record_cache_lookup, record_fetch_latency
+from mtwb.providers import get_provider
+from mtwb.records import SecurityRecord
+
+# Cache location and default entry lifetime; override with MTWB_CACHE_PATH / MTWB_CACHE_TTL
+DEFAULT_CACHE_PATH = os.environ.get("MTWB_CACHE_PATH", os.path.join(".mtwb_cache", "fundamentals.sqlite3"))
+DEFAULT_TTL = float(os.environ.get("MTWB_CACHE_TTL", "3600"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fundamentals (
+    ticker     TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    value      TEXT,
+    fetched_at REAL NOT NULL,
+    ttl        REAL NOT NULL,
+    PRIMARY KEY (ticker, field)
+) WITHOUT ROWID
+"""
+
+# Row written for every stored ticker so that empty payloads are cached too
+_MARKER_FIELD = ""
+
+
+class FundamentalsCache:
+    """
+    SQLite (WAL mode) store of provider payloads keyed by (ticker, field).
+
+    Every row carries its own fetch timestamp and TTL. A ticker is fresh while
+    all of its rows are within their TTL; stale rows are kept so they can be
+    served when the upstream fetch fails.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, ticker, allow_stale=False):
+        """Return the cached payload for ticker, or None if missing or expired"""
+        rows = self._connection().execute(
+            "SELECT field, value, fetched_at, ttl FROM fundamentals WHERE ticker = ?",
+            (ticker,)
+        ).fetchall()
+        return self._assemble(rows, allow_stale)
+
+    def get_many(self, tickers, allow_stale=False):
+        """Return {ticker: payload} for every ticker with a usable cached entry"""
+        tickers = list(tickers)
+        found = {}
+        conn = self._connection()
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(tickers), 500):
+            chunk = tickers[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT ticker, field, value, fetched_at, ttl FROM fundamentals WHERE ticker IN ({placeholders})",
+                chunk
+            ).fetchall()
+            grouped = {}
+            for ticker, *row in rows:
+                grouped.setdefault(ticker, []).append(row)
+            for ticker, ticker_rows in grouped.items():
+                payload = self._assemble(ticker_rows, allow_stale)
+                if payload is not None:
+                    found[ticker] = payload
+        return found
+
+    def put(self, ticker, payload, ttl=None):
+        """Replace the cached payload for ticker"""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        rows = [(ticker, _MARKER_FIELD, None, now, ttl)]
+        rows.extend(
+            (ticker, field, json.dumps(value, default=str), now, ttl)
+            for field, value in payload.items()
+            if field != _MARKER_FIELD
+        )
+        with self._connection() as conn:
+            conn.execute("DELETE FROM fundamentals WHERE ticker = ?", (ticker,))
+            conn.executemany("INSERT INTO fundamentals VALUES (?, ?, ?, ?, ?)", rows)
+
+    def invalidate(self, ticker=None):
+        """Drop one ticker, or everything when ticker is None"""
+        with self._connection() as conn:
+            if ticker is None:
+                conn.execute("DELETE FROM fundamentals")
+            else:
+                conn.execute("DELETE FROM fundamentals WHERE ticker = ?", (ticker,))
+
+    def get_or_fetch(self, ticker, fetch_fn, ttl=None):
+        """
+        Read-through lookup: serve a fresh entry from disk, otherwise call
+        fetch_fn(ticker) and store the result. If the fetch fails and a stale
+        entry exists, the stale entry is served instead of raising.
+        """
+        payload = self.get(ticker)
+        record_cache_lookup("fundamentals", miss=payload is None)
+        if payload is not None:
+            return payload
+        try:
+            payload = fetch_fn(ticker)
+        except Exception:
+            stale = self.get(ticker, allow_stale=True)
+            if stale is None:
+                raise
+            return stale
+        self.put(ticker, payload, ttl)
+        return payload
+
+    @staticmethod
+    def _assemble(rows, allow_stale):
+        if not rows:
+            return None
+        now = time.time()
+        payload = {}
+        for field, value, fetched_at, ttl in rows:
+            if not allow_stale and fetched_at + ttl < now:
+                return None
+            if field != _MARKER_FIELD:
+                payload[field] = json.loads(value)
+        return payload
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the process-wide cache at DEFAULT_CACHE_PATH"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = FundamentalsCache()
+        return _default_cache
+
+
+def fetch_info(provider, ticker):
+    """Fetch ticker from provider, recording latency and failures"""
+    start = time.perf_counter()
+    try:
+        return provider.get_info(ticker)
+    except Exception:
+        FETCH_FAILURES.inc(site=f"provider:{provider.name}")
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        FETCH_SECONDS.observe(elapsed, provider=provider.name)
+        record_fetch_latency(ticker, elapsed)
+
+
+def fetch_record(provider, ticker):
+    """fetch_info() projected to a SecurityRecord, dropping the fields nothing scores"""
+    return SecurityRecord.from_info(fetch_info(provider, ticker))
+
+
+def cached_info(ticker):
+    """
+    Return the active provider's data for ticker as a SecurityRecord, reading
+    through the disk cache. Only the projected fields are cached.
+    """
+    provider = get_provider()
+    if not provider.cacheable:
+        return fetch_record(provider, ticker)
+    payload = get_default_cache().get_or_fetch(ticker, lambda t: fetch_record(provider, t).to_info())
+    # Entries written before projection hold the full payload; project those on read
+    return SecurityRecord.from_info(payload)
@@ -0,0 +1,257 @@
+"""Daily price history in a memory-mapped, columnar on-disk store.
+
+Each OHLCV field is one row-major float64 matrix of trading days x tickers,
+stored raw in <dir>/<field>.f64 next to dates.i64 (days since the epoch)
+and a manifest.json naming the tickers and the current shape. Opening the
+store maps the files read-only, so loading years of history for the whole
+universe costs nothing until rows are touched.
+
+New trading days are appended to the end of every file and the manifest is
+replaced last, so readers only ever see complete rows. Adding tickers or
+inserting days before the last stored one rewrites the files, which is
+rare. The store expects one writer at a time.
+
+    python -m mtwb.history              # ingest or update the full universe
+"""
+import argparse
+import datetime
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from mtwb.metrics import REFRESH_SECONDS, timed_function
+from mtwb.providers import HISTORY_FIELDS, get_provider
+from mtwb.universe import COMPANIES, ETFS
+
+# Store location and how far back a first ingest goes; override with
+# MTWB_HISTORY_DIR / MTWB_HISTORY_YEARS
+DEFAULT_HISTORY_DIR = os.environ.get("MTWB_HISTORY_DIR", os.path.join(".mtwb_cache", "history"))
+DEFAULT_HISTORY_YEARS = int(os.environ.get("MTWB_HISTORY_YEARS", "10"))
+# Tickers per multi-symbol download request
+DEFAULT_BATCH_SIZE = 100
+
+FIELDS = tuple(HISTORY_FIELDS.values())
+_MANIFEST_VERSION = 1
+
+
+class HistoryStore:
+    """
+    Memory-mapped date x ticker matrices, one per OHLCV field.
+
+    `dates` is a datetime64[D] array and `tickers` a list; field(name)
+    returns a read-only (len(dates), len(tickers)) view with NaN where a
+    ticker has no bar.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_DIR):
+        self.path = path
+        self.reload()
+
+    def reload(self):
+        """Re-read the manifest and remap, picking up another process's writes"""
+        manifest_path = os.path.join(self.path, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        else:
+            manifest = {"version": _MANIFEST_VERSION, "tickers": [], "rows": 0}
+        self.tickers = manifest["tickers"]
+        self.rows = manifest["rows"]
+        self._columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.dates = self._map("dates.i64", np.int64, (self.rows,)).astype("datetime64[D]")
+        self._fields = {field: None for field in FIELDS}
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, ticker):
+        return ticker in self._columns
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if self.rows else None
+
+    def field(self, name):
+        """Read-only date x ticker matrix for one OHLCV field"""
+        if self._fields[name] is None:
+            self._fields[name] = self._map(f"{name}.f64", np.float64, (self.rows, len(self.tickers)))
+        return self._fields[name]
+
+    def columns(self, tickers):
+        """Column indices for tickers, in order"""
+        return [self._columns[ticker] for ticker in tickers]
+
+    def frame(self, name, tickers=None, start=None):
+        """One field as a DataFrame (dates x tickers), optionally limited to tickers and dates >= start"""
+        values = self.field(name)
+        dates = self.dates
+        first = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D")))
+        if tickers is None:
+            tickers = self.tickers
+            values = values[first:]
+        else:
+            values = values[first:, self.columns(tickers)]
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates[first:], name="date"), columns=list(tickers))
+
+    def write(self, history):
+        """
+        Merge {field: DataFrame(date index, ticker columns)} into the store.
+
+        Values overwrite what is stored for the same day and ticker, except
+        NaN, which never erases a stored bar. Days after the last stored day
+        are appended in place; new tickers or earlier days trigger a rewrite.
+        """
+        history = _align(history)
+        close = history["close"]
+        if close.empty:
+            return
+        # Created on first write rather than up front, so a read-only checkout is only read
+        os.makedirs(self.path, exist_ok=True)
+        new_dates = close.index.values.astype("datetime64[D]")
+        new_tickers = [ticker for ticker in close.columns if ticker not in self._columns]
+        existing = np.isin(new_dates, self.dates)
+        appended = ~existing & (new_dates > self.last_date if self.rows else True)
+        if new_tickers or not np.all(existing | appended):
+            self._rewrite(history, new_tickers, new_dates)
+            return
+
+        columns = self.columns(close.columns)
+        rows = np.searchsorted(self.dates, new_dates[existing])
+        for field in FIELDS:
+            values = history[field].reindex(columns=close.columns).to_numpy(dtype=np.float64)
+            if rows.size:
+                matrix = self._map(f"{field}.f64", np.float64, (self.rows, len(self.tickers)), mode="r+")
+                update = values[existing]
+                block = matrix[np.ix_(rows, columns)]
+                matrix[np.ix_(rows, columns)] = np.where(np.isnan(update), block, update)
+                matrix.flush()
+                del matrix
+            if appended.any():
+                full = np.full((int(appended.sum()), len(self.tickers)), np.nan)
+                full[:, columns] = values[appended]
+                self._append_bytes(f"{field}.f64", full)
+        if appended.any():
+            self._append_bytes("dates.i64", new_dates[appended].astype(np.int64))
+            self._write_manifest(self.tickers, self.rows + int(appended.sum()))
+        self.reload()
+
+    def _rewrite(self, history, new_tickers, new_dates):
+        tickers = self.tickers + new_tickers
+        dates = np.union1d(self.dates, new_dates)
+        old_rows = np.searchsorted(dates, self.dates)
+        new_rows = np.searchsorted(dates, new_dates)
+        columns = [tickers.index(ticker) for ticker in history["close"].columns]
+        for field in FIELDS:
+            matrix = np.full((len(dates), len(tickers)), np.nan)
+            if self.rows:
+                matrix[old_rows, :len(self.tickers)] = self.field(field)
+            values = history[field].reindex(columns=history["close"].columns).to_numpy(dtype=np.float64)
+            block = matrix[np.ix_(new_rows, columns)]
+            matrix[np.ix_(new_rows, columns)] = np.where(np.isnan(values), block, values)
+            self._replace_bytes(f"{field}.f64", matrix)
+        self._replace_bytes("dates.i64", dates.astype(np.int64))
+        self._write_manifest(tickers, len(dates))
+        self.reload()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _map(self, name, dtype, shape, mode="r"):
+        if 0 in shape:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode=mode, shape=shape)
+
+    def _append_bytes(self, name, array):
+        path = self._file(name)
+        # Drop any tail left by an interrupted append; the manifest says how much is valid
+        valid = self.rows * (array.shape[1] if array.ndim == 2 else 1) * array.itemsize
+        with open(path, "ab") as f:
+            f.truncate(valid)
+            f.write(np.ascontiguousarray(array).tobytes())
+
+    def _replace_bytes(self, name, array):
+        path = self._file(name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+
+    def _write_manifest(self, tickers, rows):
+        path = self._file("manifest.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": _MANIFEST_VERSION, "tickers": tickers, "rows": rows}, f)
+        os.replace(tmp_path, path)
+
+
+def _days(index):
+    """Timezone-naive midnight timestamps for a download's date index"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def _align(history):
+    """Sort by day, drop days with no bars at all, and line every field up with close"""
+    aligned = {}
+    for field in FIELDS:
+        frame = history[field].set_axis(_days(history[field].index), axis=0)
+        aligned[field] = frame[~frame.index.duplicated(keep="last")].sort_index()
+    close = aligned["close"]
+    close = close.loc[close.notna().any(axis=1)]
+    return {field: frame.reindex(index=close.index, columns=close.columns) for field, frame in aligned.items()}
+
+
+@timed_function(REFRESH_SECONDS, job="history_ingest")
+def update_history(store, tickers=None, provider=None, years=DEFAULT_HISTORY_YEARS,
+                   batch_size=DEFAULT_BATCH_SIZE, today=None):
+    """
+    Bring the store up to date for tickers (default: the full universe).
+
+    Tickers already stored are fetched from their last stored day onwards
+    (re-fetching that day, which may have been partial); new tickers get
+    `years` of history. Each group is downloaded in multi-symbol batches.
+    Returns the number of batches requested.
+    """
+    tickers = list(tickers or COMPANIES + ETFS)
+    provider = provider or get_provider()
+    today = pd.Timestamp(today or datetime.date.today()).normalize()
+    end = today + pd.Timedelta(days=1)
+
+    groups = []
+    known = [ticker for ticker in tickers if ticker in store]
+    new = [ticker for ticker in tickers if ticker not in store]
+    if known and store.last_date is not None:
+        groups.append((known, pd.Timestamp(store.last_date)))
+    if new:
+        groups.append((new, today - pd.DateOffset(years=years)))
+
+    batches = 0
+    for group, start in groups:
+        if start >= end:
+            continue
+        for i in range(0, len(group), batch_size):
+            store.write(provider.get_history(group[i:i + batch_size], start, end))
+            batches += 1
+    return batches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest daily price history into the memory-mapped store")
+    parser.add_argument("tickers", nargs="*", help="tickers to ingest (default: all stocks and ETFs)")
+    parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR, help="store directory")
+    parser.add_argument("--years", type=int, default=DEFAULT_HISTORY_YEARS, help="history to fetch for new tickers")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="tickers per download request")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.history_dir)
+    batches = update_history(store, args.tickers or None, years=args.years, batch_size=args.batch_size)
+    print(f"{len(store.tickers)} tickers x {len(store)} days in {args.history_dir} ({batches} download batches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Incremental re-ranking for the CLI evaluator's min-max scoring.
+
+The CLI scores every component with a global min-max normalize(), so a
+change to one ticker can move every other row's score, but only when it
+moves a column's min or max. IncrementalRanking keeps the per-column bounds
+and a sorted score index so single-ticker updates touch just that row, and a
+full vectorized renormalize happens only when an extreme actually moves.
+
+The realized-risk blend of score_data (MTWB_RISK_WEIGHT) is not applied, so
+a nonzero risk weight is refused rather than silently ranking differently.
+benchmarks/bench_incremental.py checks the ranking against score_data.
+"""
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+from mtwb.risk import DEFAULT_RISK_WEIGHT
+from mtwb.scoring import EVALUATOR_WEIGHTS
+
+# Component score -> (input column, lower-is-better), as scored in the CLI
+NORMALIZED_COMPONENTS = {
+    "pe_score": ("pe_ratio", True),
+    "volatility_score": ("beta", True),
+    "dividend_score": ("dividend_yield", False),
+    "profit_score": ("profit_margin", False),
+    "roe_score": ("roe", False),
+    "growth_score": ("fiftytwo_wk_change", False)
+}
+
+INPUT_COLUMNS = [column for column, _ in NORMALIZED_COMPONENTS.values()] + ["esg_score"]
+
+
+def _normalize(values, low, high, inverse):
+    """Array version of the CLI's normalize() given precomputed bounds"""
+    if high == low:
+        return np.full(np.shape(values), 50.0)
+    if inverse:
+        return 100 * (high - values) / (high - low)
+    return 100 * (values - low) / (high - low)
+
+
+class IncrementalRanking:
+    """
+    Ranked universe that can absorb single-ticker updates cheaply.
+
+    Scores match the CLI pipeline: min-max normalized components, ESG score
+    scaled by 4, a weighted sum, and a final min-max normalize of that sum.
+    The final normalize is monotonic, so the order is kept on the raw
+    weighted sum and final scores are derived from its current bounds.
+    """
+
+    def __init__(self, weights=None, risk_weight=DEFAULT_RISK_WEIGHT):
+        if risk_weight:
+            raise ValueError(
+                f"IncrementalRanking has no realized-risk blend; got risk_weight={risk_weight} "
+                "(set MTWB_RISK_WEIGHT=0 or score with score_data)"
+            )
+        self.weights = weights or EVALUATOR_WEIGHTS
+        self.tickers = []
+        self._rows = {}
+        self._inputs = np.empty((0, len(INPUT_COLUMNS)))
+        self._raw = np.empty(0)
+        self._low = np.zeros(len(NORMALIZED_COMPONENTS))
+        self._high = np.zeros(len(NORMALIZED_COMPONENTS))
+        # Sorted (-raw score, row) keys; ties keep insertion order
+        self._order = []
+        self.row_updates = 0
+        self.full_recomputes = 0
+
+    @classmethod
+    def from_frame(cls, frame, ticker_column="company", weights=None, risk_weight=DEFAULT_RISK_WEIGHT):
+        """Build from a DataFrame with the CLI's input columns (e.g. its `df`)"""
+        ranking = cls(weights, risk_weight)
+        ranking.tickers = list(frame[ticker_column])
+        ranking._rows = {ticker: row for row, ticker in enumerate(ranking.tickers)}
+        ranking._inputs = np.column_stack([
+            np.nan_to_num(np.asarray(frame[column], dtype=float), nan=0.0)
+            for column in INPUT_COLUMNS
+        ]) if len(frame) else np.empty((0, len(INPUT_COLUMNS)))
+        ranking._renormalize()
+        return ranking
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._rows
+
+    def update(self, ticker, values):
+        """
+        Set some or all input columns for ticker (adding it if new).
+
+        Only the ticker's own row is rescored unless the update moves a
+        column's min or max, in which case every row is renormalized.
+        Returns True if a full renormalize was needed. Unknown columns or
+        non-numeric values raise ValueError and leave the ranking unchanged.
+        """
+        unknown = [column for column in values if column not in INPUT_COLUMNS]
+        if unknown:
+            raise ValueError(
+                f"unknown input column(s) {', '.join(map(repr, unknown))}; expected some of {', '.join(INPUT_COLUMNS)}"
+            )
+        parsed = {}
+        for column, value in values.items():
+            try:
+                parsed[INPUT_COLUMNS.index(column)] = 0.0 if value is None or pd.isna(value) else float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{column} for {ticker} must be numeric, got {value!r}")
+
+        row = self._rows.get(ticker)
+        if row is None:
+            row = self._append(ticker)
+            new_row = True
+        else:
+            new_row = False
+        old = self._inputs[row].copy()
+        for column, value in parsed.items():
+            self._inputs[row, column] = value
+
+        if new_row and len(self.tickers) == 1:
+            bounds_moved = True
+        else:
+            bounds_moved = self._update_bounds(old, self._inputs[row], new_row)
+
+        if bounds_moved:
+            self._renormalize()
+            return True
+
+        if not new_row:
+            del self._order[bisect_left(self._order, (-self._raw[row], row))]
+        self._raw[row] = self._raw_scores(self._inputs[row:row + 1])[0]
+        insort(self._order, (-self._raw[row], row))
+        self.row_updates += 1
+        return False
+
+    def score(self, ticker):
+        """Final 0-100 MTWB score for ticker, as the CLI would compute it"""
+        return float(self._final(self._raw[self._rows[ticker]]))
+
+    def rank(self, ticker):
+        """1-based position of ticker in the ranking"""
+        row = self._rows[ticker]
+        return bisect_left(self._order, (-self._raw[row], row)) + 1
+
+    def top(self, n=50):
+        """[(ticker, mtwb_score)] for the n best-scoring tickers"""
+        return [(self.tickers[row], float(self._final(-neg_raw))) for neg_raw, row in self._order[:n]]
+
+    def to_frame(self):
+        """Component and final scores for every ticker, in ranked order"""
+        rows = [row for _, row in self._order]
+        inputs = self._inputs[rows]
+        frame = pd.DataFrame(inputs, columns=INPUT_COLUMNS)
+        frame.insert(0, "company", [self.tickers[row] for row in rows])
+        for name, values in self._components(inputs).items():
+            frame[name] = values
+        frame["mtwb_score"] = self._final(self._raw[rows])
+        return frame
+
+    def _append(self, ticker):
+        row = len(self.tickers)
+        self.tickers.append(ticker)
+        self._rows[ticker] = row
+        self._inputs = np.vstack([self._inputs, np.zeros((1, len(INPUT_COLUMNS)))])
+        self._raw = np.append(self._raw, 0.0)
+        return row
+
+    def _update_bounds(self, old, new, new_row):
+        """Refresh per-column bounds after one row changed; True if any moved"""
+        moved = False
+        for i in range(len(NORMALIZED_COMPONENTS)):
+            if not new_row and old[i] == new[i]:
+                continue
+            low, high = self._low[i], self._high[i]
+            if new[i] < low or new[i] > high:
+                moved = True
+            elif not new_row and (old[i] == low or old[i] == high):
+                # The old value was an extreme; it only moved if no other row shares it
+                column = self._inputs[:, i]
+                moved = moved or column.min() != low or column.max() != high
+            if moved:
+                break
+        return moved
+
+    def _components(self, inputs):
+        components = {}
+        for i, (name, (_, inverse)) in enumerate(NORMALIZED_COMPONENTS.items()):
+            components[name] = _normalize(inputs[:, i], self._low[i], self._high[i], inverse)
+        components["esg_score_normalized"] = inputs[:, -1] * 4
+        return components
+
+    def _raw_scores(self, inputs):
+        components = self._components(inputs)
+        return (
+            components["pe_score"] * self.weights["pe_score"] +
+            components["volatility_score"] * self.weights["volatility_score"] +
+            components["dividend_score"] * self.weights["dividend_score"] +
+            components["profit_score"] * self.weights["profit_score"] +
+            components["roe_score"] * self.weights["roe_score"] +
+            components["growth_score"] * self.weights["growth_score"] +
+            components["esg_score_normalized"] * self.weights["esg_score_normalized"]
+        )
+
+    def _renormalize(self):
+        """Recompute bounds, every row's score and the sorted index"""
+        if len(self.tickers):
+            columns = self._inputs[:, :len(NORMALIZED_COMPONENTS)]
+            self._low = columns.min(axis=0)
+            self._high = columns.max(axis=0)
+            self._raw = self._raw_scores(self._inputs)
+        order = np.lexsort((np.arange(len(self._raw)), -self._raw))
+        self._order = [(-self._raw[row], int(row)) for row in order]
+        self.full_recomputes += 1
+
+    def _final(self, raw):
+        if not self._order:
+            return raw
+        return _normalize(raw, -self._order[-1][0], -self._order[0][0], inverse=False)
@@ -0,0 +1,239 @@
+"""In-process counters and latency histograms for the fetch, cache and scoring paths.
+
+Metrics live in a module-level registry for the lifetime of the process and
+can be rendered in the Prometheus text exposition format.
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from mtwb.universe import COMPANIES, ETFS
+
+# Where exported metrics are written; override with MTWB_METRICS_PATH
+DEFAULT_METRICS_PATH = os.environ.get("MTWB_METRICS_PATH", os.path.join(".mtwb_cache", "metrics.prom"))
+
+# Latency buckets in seconds, from sub-millisecond scoring up to slow fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry = {}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(_label_key(labels), 0)
+
+    def snapshot(self):
+        """Copy of {label key: value}, safe to iterate while other threads record"""
+        with _lock:
+            return dict(self.values)
+
+    def samples(self):
+        with _lock:
+            return [(self.name, key, value) for key, value in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    """Last observed value, optionally split by labels"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with _lock:
+            self.values[_label_key(labels)] = value
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # label key -> [bucket counts..., +Inf count, sum]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with _lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def count(self, **labels):
+        state = self.values.get(_label_key(labels))
+        return state[-2] if state else 0
+
+    def total(self, **labels):
+        state = self.values.get(_label_key(labels))
+        return state[-1] if state else 0.0
+
+    def summary(self):
+        """[(labels, count, mean seconds)] for every label set observed"""
+        with _lock:
+            return [
+                (dict(key), state[-2], state[-1] / state[-2] if state[-2] else 0.0)
+                for key, state in sorted(self.values.items())
+            ]
+
+    def samples(self):
+        out = []
+        with _lock:
+            for key, state in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, state):
+                    out.append((f"{self.name}_bucket", key + (("le", repr(bound)),), count))
+                out.append((f"{self.name}_bucket", key + (("le", "+Inf"),), state[-2]))
+                out.append((f"{self.name}_count", key, state[-2]))
+                out.append((f"{self.name}_sum", key, state[-1]))
+        return out
+
+
+def _register(metric):
+    with _lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name, help_text):
+    return _register(Counter(name, help_text))
+
+
+def gauge(name, help_text):
+    return _register(Gauge(name, help_text))
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, help_text, buckets))
+
+
+@contextmanager
+def timed(hist, **labels):
+    """Observe the duration of the with-block in hist"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        hist.observe(time.perf_counter() - start, **labels)
+
+
+def timed_function(hist, **labels):
+    """Decorator form of timed()"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(hist, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Metrics shared across the apps and CLI ---
+FETCH_SECONDS = histogram("mtwb_fetch_seconds", "Upstream .info fetch latency in seconds")
+FETCH_LAST_SECONDS = gauge("mtwb_fetch_last_seconds", "Latency of the most recent upstream fetch per universe ticker")
+FETCH_FAILURES = counter("mtwb_fetch_failures_total", "Fetches that raised, by call site")
+CACHE_LOOKUPS = counter("mtwb_cache_lookups_total", "Cache lookups, by cache")
+CACHE_MISSES = counter("mtwb_cache_misses_total", "Cache lookups that had to compute or fetch, by cache")
+SCORING_SECONDS = histogram("mtwb_scoring_seconds", "Scoring time in seconds, by scorer")
+REFRESH_SECONDS = histogram("mtwb_refresh_seconds", "Full fetch-and-score refresh time in seconds, by job")
+RENDER_SECONDS = histogram("mtwb_render_seconds", "Streamlit script and fragment run time in seconds, by section")
+
+
+# Tickers with their own mtwb_fetch_last_seconds series; any other ticker shares
+# OTHER_TICKER, so lookups of arbitrary tickers can't grow the label set
+LATENCY_TICKERS = frozenset(COMPANIES) | frozenset(ETFS)
+OTHER_TICKER = "other"
+
+
+def record_fetch_latency(ticker, seconds):
+    FETCH_LAST_SECONDS.set(seconds, ticker=ticker if ticker in LATENCY_TICKERS else OTHER_TICKER)
+
+
+def record_cache_lookup(cache, miss=False):
+    CACHE_LOOKUPS.inc(cache=cache)
+    if miss:
+        CACHE_MISSES.inc(cache=cache)
+
+
+def record_cache_miss(cache):
+    """Count a miss from inside a cached body (e.g. an st.cache_data function)"""
+    CACHE_MISSES.inc(cache=cache)
+
+
+def cache_hit_rates():
+    """{cache: (lookups, hits, hit rate)} for every cache with lookups"""
+    rates = {}
+    for key, lookups in CACHE_LOOKUPS.snapshot().items():
+        labels = dict(key)
+        misses = CACHE_MISSES.get(**labels)
+        # st.cache_data misses are counted inside the cached body, so never exceed lookups
+        hits = max(0, lookups - misses)
+        rates[labels["cache"]] = (lookups, hits, hits / lookups if lookups else 0.0)
+    return rates
+
+
+def slowest_tickers(n=10):
+    """[(ticker, seconds)] for the n tickers whose most recent fetch was slowest"""
+    latest = [(dict(key).get("ticker"), value) for key, value in FETCH_LAST_SECONDS.snapshot().items()]
+    latest = [item for item in latest if item[0] != OTHER_TICKER]
+    return sorted(latest, key=lambda item: item[1], reverse=True)[:n]
+
+
+def render_prometheus():
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, key, value in metric.samples():
+            lines.append(f"{name}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=DEFAULT_METRICS_PATH):
+    """Write render_prometheus() to path atomically, for a node-exporter textfile collector"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,227 @@
+"""Multi-process scoring for very large universes.
+
+The CLI's score_data min-max normalizes every input over the whole
+universe, so a chunk can't be scored on its own. score_parallel splits the
+universe into row chunks and makes two passes over them in a process pool:
+
+1. every chunk reports the minimum and maximum of each input column, and
+   the parent merges them into global normalization bounds;
+2. every chunk is scored against those bounds (plus, optionally, the
+   realized-risk components from the memory-mapped history store) and
+   reports the bounds of its raw MTWB scores.
+
+The parent then rescales the raw scores to 0-100 with the merged bounds.
+Input and output columns live in shared memory blocks that workers attach
+to by name, so only chunk ranges, bounds and (for risk) ticker lists are
+pickled. Results are identical to score_data's.
+"""
+import atexit
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from mtwb.metrics import SCORING_SECONDS, timed_function
+from mtwb.risk import RISK_SCORE_COLUMNS, load_risk_metrics, risk_component_scores
+from mtwb.scoring import _weighted_sum
+
+# Score column -> (input column, lower is better), normalized over the universe
+NORMALIZED_INPUTS = {
+    "pe_score": ("pe_ratio", True),
+    "volatility_score": ("beta", True),
+    "dividend_score": ("dividend_yield", False),
+    "profit_score": ("profit_margin", False),
+    "roe_score": ("roe", False),
+    "growth_score": ("fiftytwo_wk_change", False),
+}
+COMPONENT_COLUMNS = list(NORMALIZED_INPUTS) + ["esg_score_normalized"]
+
+# Processes used by score_parallel; override with MTWB_SCORE_WORKERS (0 = one per core)
+DEFAULT_WORKERS = int(os.environ.get("MTWB_SCORE_WORKERS", "1"))
+# Smaller universes are scored in-process: starting work in the pool costs more than it saves
+MIN_PARALLEL_ROWS = 20_000
+# Several chunks per worker so a slow chunk doesn't leave the other cores idle
+CHUNKS_PER_WORKER = 4
+
+_INPUT_COLUMNS = [column for column, _ in NORMALIZED_INPUTS.values()] + ["esg_score"]
+# Output rows: the components, the raw score, the risk components and the risk-adjusted raw score
+_RAW = len(COMPONENT_COLUMNS)
+_RISK = slice(_RAW + 1, _RAW + 1 + len(RISK_SCORE_COLUMNS))
+_ADJUSTED = _RAW + 1 + len(RISK_SCORE_COLUMNS)
+_OUTPUT_ROWS = _ADJUSTED + 1
+
+
+def _bounds(values):
+    """(min, max) of each row, skipping NaN like Series.min()/max(); NaN for an all-NaN row"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmin(values, axis=1), np.nanmax(values, axis=1)
+
+
+def _merge(lows, highs):
+    return np.fmin.reduce(lows), np.fmax.reduce(highs)
+
+
+def _normalize(values, low, high, inverse=False):
+    """The CLI's normalize() against given bounds"""
+    if high == low:
+        return np.full(len(values), 50.0)
+    if inverse:
+        return 100 * (high - values) / (high - low)
+    return 100 * (values - low) / (high - low)
+
+
+def _score(inputs, outputs, lows, highs, weights, tickers, risk_weight):
+    """
+    Score one chunk (columns of `inputs` into columns of `outputs`);
+    returns the raw and risk-adjusted score bounds and whether any ticker
+    had stored history
+    """
+    components = {}
+    for row, (name, (_, inverse)) in enumerate(NORMALIZED_INPUTS.items()):
+        outputs[row] = _normalize(inputs[row], lows[row], highs[row], inverse)
+        components[name] = outputs[row]
+    outputs[_RAW - 1] = inputs[-1] * 4  # Scale 0-25 to 0-100
+    components["esg_score_normalized"] = outputs[_RAW - 1]
+    outputs[_RAW] = _weighted_sum(components, weights)
+
+    has_history = False
+    scores = [_RAW, _RAW]
+    if risk_weight:
+        metrics = load_risk_metrics(tickers)
+        has_history = not metrics.isna().all().all()
+        risk = risk_component_scores(metrics)
+        outputs[_RISK] = risk.to_numpy().T
+        outputs[_ADJUSTED] = (1 - risk_weight) * outputs[_RAW] + risk_weight * risk.mean(axis=1).to_numpy()
+        scores = [_RAW, _ADJUSTED]
+    lows, highs = _bounds(outputs[scores])
+    return lows, highs, has_history
+
+
+def _main_sectors(sectors, sector_map):
+    """sectors.map(sector_map).fillna("Other"), looking up each distinct sector once"""
+    codes, uniques = pd.factorize(sectors)
+    # Missing sectors get code -1, which takes the trailing "Other"
+    mapped = [sector_map.get(sector, "Other") for sector in uniques] + ["Other"]
+    return pd.Series(pd.array(mapped, dtype=sectors.dtype).take(codes), index=sectors.index)
+
+
+def _attach(name, shape):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _bounds_task(inputs_name, shape, start, stop):
+    block, inputs = _attach(inputs_name, shape)
+    try:
+        return _bounds(inputs[:len(NORMALIZED_INPUTS), start:stop])
+    finally:
+        del inputs
+        block.close()
+
+
+def _score_task(inputs_name, outputs_name, rows, start, stop, lows, highs, weights, tickers, risk_weight):
+    inputs_block, inputs = _attach(inputs_name, (len(_INPUT_COLUMNS), rows))
+    outputs_block, outputs = _attach(outputs_name, (_OUTPUT_ROWS, rows))
+    try:
+        return _score(inputs[:, start:stop], outputs[:, start:stop], lows, highs, weights, tickers, risk_weight)
+    finally:
+        del inputs, outputs
+        inputs_block.close()
+        outputs_block.close()
+
+
+_executor = None
+_executor_workers = 0
+
+
+def _pool(workers):
+    """A process pool of `workers` processes, kept for later calls"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown()
+        _executor = ProcessPoolExecutor(workers)
+        _executor_workers = workers
+    return _executor
+
+
+def shutdown():
+    """Stop the worker processes, if any were started"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+atexit.register(shutdown)
+
+
+def _shared(shape):
+    block = shared_memory.SharedMemory(create=True, size=max(8, int(np.prod(shape)) * 8))
+    return block, np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _score_in_pool(inputs, weights, tickers, risk_weight, workers):
+    rows = inputs.shape[1]
+    chunk = -(-rows // (workers * CHUNKS_PER_WORKER))
+    ranges = [(start, min(start + chunk, rows)) for start in range(0, rows, chunk)]
+    pool = _pool(workers)
+    inputs_block, shared_inputs = _shared(inputs.shape)
+    outputs_block, outputs = _shared((_OUTPUT_ROWS, rows))
+    try:
+        shared_inputs[:] = inputs
+        name = inputs_block.name
+        parts = list(pool.map(_bounds_task, *zip(*[(name, inputs.shape, start, stop) for start, stop in ranges])))
+        lows, highs = _merge(*map(np.array, zip(*parts)))
+        futures = [
+            pool.submit(_score_task, name, outputs_block.name, rows, start, stop, lows, highs, weights,
+                        tickers[start:stop] if risk_weight else None, risk_weight)
+            for start, stop in ranges
+        ]
+        parts = [future.result() for future in futures]
+        result = outputs.copy()
+    finally:
+        del shared_inputs, outputs
+        inputs_block.close()
+        inputs_block.unlink()
+        outputs_block.close()
+        outputs_block.unlink()
+    raw_lows, raw_highs = _merge(*map(np.array, zip(*[part[:2] for part in parts])))
+    return result, raw_lows, raw_highs, any(part[2] for part in parts)
+
+
+@timed_function(SCORING_SECONDS, scorer="parallel")
+def score_parallel(df, weights, sector_map, risk_weight=0, workers=None, min_rows=MIN_PARALLEL_ROWS):
+    """
+    The CLI's score_data, run across `workers` processes (None for
+    DEFAULT_WORKERS, 0 for one per core). Adds the same columns to df and
+    returns the same frame; universes under min_rows are scored in-process.
+    """
+    workers = DEFAULT_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    inputs = np.vstack([df[column].to_numpy(dtype=np.float64) for column in _INPUT_COLUMNS])
+    tickers = df["company"].tolist() if risk_weight else None
+
+    if workers > 1 and len(df) >= min_rows:
+        outputs, raw_lows, raw_highs, has_history = _score_in_pool(inputs, weights, tickers, risk_weight, workers)
+    else:
+        outputs = np.empty((_OUTPUT_ROWS, len(df)))
+        lows, highs = _bounds(inputs[:len(NORMALIZED_INPUTS)])
+        raw_lows, raw_highs, has_history = _score(inputs, outputs, lows, highs, weights, tickers, risk_weight)
+
+    for row, name in enumerate(COMPONENT_COLUMNS):
+        df[name] = outputs[row]
+    # Placeholder, so columns come out in score_data's order
+    df["mtwb_score"] = outputs[_RAW]
+    # As in add_risk_components, risk only counts when some ticker has history
+    adjusted = bool(risk_weight and has_history)
+    if adjusted:
+        for name, values in zip(RISK_SCORE_COLUMNS, outputs[_RISK]):
+            df[name] = values
+    row, bound = (_ADJUSTED, 1) if adjusted else (_RAW, 0)
+    df["mtwb_score"] = _normalize(outputs[row], raw_lows[bound], raw_highs[bound])
+    df["main_sector"] = _main_sectors(df["sector"], sector_map)
+    return df
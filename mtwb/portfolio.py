@@ -0,0 +1,208 @@
+"""Holdings-weighted MTWB scores for whole portfolios, streamed from CSV.
+
+A holdings file has a ticker column (`ticker` or `symbol`) and one sizing
+column: `weight`, `value` / `market_value`, or `shares`, which is valued at
+each security's current price. Duplicate tickers are summed.
+
+PortfolioScorer reads the file `chunk_rows` rows at a time and keeps one
+row per distinct ticker: the summed position size and that security's
+component scores. Memory therefore grows with the number of distinct
+securities, not positions. Tickers not seen before are scored in batches
+of `batch_size` through the caller's score function, and the portfolio
+aggregate is a matrix-vector product of position weights and the score
+matrix. Partial PortfolioResults are yielded as the file is read, so
+callers can show results while a large file is still being scored.
+"""
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from mtwb.scoring import SCORE_COLUMNS
+
+# Rows read per chunk and tickers scored per batch; override with
+# MTWB_PORTFOLIO_CHUNK_ROWS and MTWB_PORTFOLIO_BATCH
+DEFAULT_CHUNK_ROWS = int(os.environ.get("MTWB_PORTFOLIO_CHUNK_ROWS", "20000"))
+DEFAULT_BATCH_SIZE = int(os.environ.get("MTWB_PORTFOLIO_BATCH", "200"))
+# Minimum seconds between partial results
+DEFAULT_INTERVAL = 0.5
+
+TICKER_COLUMNS = ("ticker", "symbol")
+# Preferred first when a file has several
+SIZING_COLUMNS = ("weight", "value", "market_value", "shares")
+
+# Score matrix layout: SCORE_COLUMNS, then the price used to value shares
+_PRICE = len(SCORE_COLUMNS)
+
+
+class PortfolioResult(NamedTuple):
+    """The portfolio aggregate over every position read and scored so far"""
+
+    # Weighted average of each of SCORE_COLUMNS over scored positions
+    scores: pd.Series
+    # One row per distinct ticker: size (in the sizing column's units), weight, SCORE_COLUMNS
+    # and contribution to mtwb_score, largest weight first
+    holdings: pd.DataFrame
+    sizing: str
+    rows_read: int
+    # Rows without a ticker or a positive numeric size
+    rows_skipped: int
+    # Tickers that could not be scored (or, for shares, priced)
+    failed: list
+    # Distinct tickers read but not scored yet
+    pending: int
+    # Share of the portfolio's size that is scored; None when sized by shares of unpriced securities
+    coverage: float
+    done: bool
+
+
+def _match_column(columns, names):
+    for name in names:
+        if name in columns:
+            return name
+    return None
+
+
+class PortfolioScorer:
+    """
+    Streams holdings and aggregates their scores. score_fn(tickers) returns
+    (scores, failed): a DataFrame indexed by ticker with SCORE_COLUMNS and
+    current_price, and the tickers it could not score. Each ticker is
+    scored at most once per scorer.
+    """
+
+    def __init__(self, score_fn, chunk_rows=DEFAULT_CHUNK_ROWS, batch_size=DEFAULT_BATCH_SIZE):
+        self.score_fn = score_fn
+        self.chunk_rows = chunk_rows
+        self.batch_size = batch_size
+        self.sizing = None
+        self.rows_read = 0
+        self.rows_skipped = 0
+        self._tickers = pd.Index([], dtype="string")
+        # Grown by doubling; rows past len(self._tickers) are unused
+        self._size = np.zeros(0)
+        self._matrix = np.empty((0, _PRICE + 1))
+        self._pending = []
+        self._failed = []
+
+    def _grow(self, count):
+        if count <= len(self._size):
+            return
+        capacity = max(count, 2 * len(self._size), 64)
+        size = np.zeros(capacity)
+        size[:len(self._size)] = self._size
+        matrix = np.full((capacity, _PRICE + 1), np.nan)
+        matrix[:len(self._matrix)] = self._matrix
+        self._size, self._matrix = size, matrix
+
+    def _columns(self, chunk):
+        """(ticker column, sizing column) of a chunk, by preference order"""
+        ticker = _match_column(chunk.columns, TICKER_COLUMNS)
+        sizing = _match_column(chunk.columns, SIZING_COLUMNS)
+        if ticker is None or sizing is None:
+            raise ValueError(
+                f"holdings need a {' or '.join(TICKER_COLUMNS)} column and one of {', '.join(SIZING_COLUMNS)}"
+            )
+        return ticker, sizing
+
+    def add_chunk(self, chunk):
+        """Add a chunk of holdings rows (columns already lower-cased); new tickers are queued for scoring"""
+        ticker_column, sizing = self._columns(chunk)
+        if self.sizing is None:
+            self.sizing = sizing
+        tickers = chunk[ticker_column].astype("string").str.strip().str.upper()
+        size = pd.to_numeric(chunk[sizing], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        valid = (tickers.fillna("") != "").to_numpy(dtype=bool) & np.isfinite(size) & (size > 0)
+        self.rows_read += len(chunk)
+        self.rows_skipped += int((~valid).sum())
+
+        # Sum positions per distinct ticker; tickers not seen before are appended to the index
+        inverse, uniques = pd.factorize(tickers[valid])
+        unique_codes = self._tickers.get_indexer(uniques)
+        new = unique_codes < 0
+        if new.any():
+            unique_codes[new] = np.arange(len(self._tickers), len(self._tickers) + int(new.sum()))
+            self._tickers = self._tickers.append(uniques[new])
+            self._pending.extend(uniques[new])
+        count = len(self._tickers)
+        self._grow(count)
+        self._size[:count] += np.bincount(unique_codes[inverse], weights=size[valid], minlength=count)
+
+    def score_pending(self):
+        """Score the next batch of queued tickers; returns how many were scored"""
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        if not batch:
+            return 0
+        scores, failed = self.score_fn(batch)
+        self._failed.extend(failed)
+        if len(scores):
+            codes = self._tickers.get_indexer(scores.index)
+            self._matrix[codes, :_PRICE] = scores[SCORE_COLUMNS].to_numpy(dtype=float)
+            self._matrix[codes, _PRICE] = pd.to_numeric(scores["current_price"], errors="coerce").to_numpy(dtype=float)
+        return len(batch)
+
+    def result(self, done=False):
+        """The aggregate over everything read and scored so far"""
+        count = len(self._tickers)
+        size = self._size[:count]
+        matrix = self._matrix[:count]
+        scored = ~np.isnan(matrix[:, 0])
+        value = size * matrix[:, _PRICE] if self.sizing == "shares" else size.copy()
+        usable = scored & np.isfinite(value)
+        weight = np.where(usable, value, 0.0)
+        total = weight.sum()
+        if total > 0:
+            weight /= total
+            aggregate = weight[usable] @ matrix[usable, :_PRICE]
+        else:
+            aggregate = np.full(_PRICE, np.nan)
+
+        holdings = pd.DataFrame(matrix[:, :_PRICE], columns=SCORE_COLUMNS)
+        holdings.insert(0, "ticker", self._tickers)
+        holdings.insert(1, "size", size)
+        holdings.insert(2, "weight", np.where(usable, weight, np.nan))
+        holdings["contribution"] = holdings["weight"] * holdings["mtwb_score"]
+        order = np.lexsort((np.arange(count), -np.nan_to_num(holdings["weight"].to_numpy(), nan=-1.0)))
+
+        unpriced = list(self._tickers[scored & ~usable])
+        if self.sizing == "shares":
+            coverage = None if (~usable).any() else 1.0
+        else:
+            coverage = float(size[usable].sum() / size.sum()) if size.sum() else 0.0
+        return PortfolioResult(
+            scores=pd.Series(aggregate, index=SCORE_COLUMNS),
+            holdings=holdings.iloc[order].reset_index(drop=True),
+            sizing=self.sizing,
+            rows_read=self.rows_read,
+            rows_skipped=self.rows_skipped,
+            failed=self._failed + unpriced,
+            pending=len(self._pending),
+            coverage=coverage,
+            done=done
+        )
+
+    def stream(self, source, interval=DEFAULT_INTERVAL):
+        """
+        Read holdings from a CSV path or file object, yielding a
+        PortfolioResult at most every `interval` seconds as chunks are read
+        and batches scored. The last result has done=True.
+        """
+        reader = pd.read_csv(
+            source, chunksize=self.chunk_rows, dtype=str, skipinitialspace=True,
+            usecols=lambda name: name.strip().lower() in TICKER_COLUMNS + SIZING_COLUMNS
+        )
+        last = time.monotonic()
+        with reader:
+            for chunk in reader:
+                chunk.columns = [name.strip().lower() for name in chunk.columns]
+                self.add_chunk(chunk)
+                while True:
+                    scored = self.score_pending()
+                    if time.monotonic() - last >= interval:
+                        yield self.result()
+                        last = time.monotonic()
+                    if not scored:
+                        break
+        yield self.result(done=True)
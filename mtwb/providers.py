@@ -0,0 +1,271 @@
+"""Pluggable sources of raw ticker fundamentals (.info payloads)."""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+
+# Provider selection; override with MTWB_DATA_PROVIDER (yahoo, replay, record, http or service)
+DEFAULT_PROVIDER = os.environ.get("MTWB_DATA_PROVIDER", "yahoo")
+DEFAULT_FIXTURE_DIR = os.environ.get("MTWB_FIXTURE_DIR", os.path.join("fixtures", "info"))
+DEFAULT_REPLAY_LATENCY = float(os.environ.get("MTWB_REPLAY_LATENCY", "0"))
+# yf.download column -> history field name
+HISTORY_FIELDS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adj Close": "adj_close",
+    "Volume": "volume",
+}
+# Fraction of lookups that fail with a simulated HTTP 429, for exercising the fetch scheduler
+DEFAULT_INJECTED_429_RATE = float(os.environ.get("MTWB_INJECT_429_RATE", "0"))
+
+
+class ThrottledError(Exception):
+    """The upstream refused a request because of rate limiting (HTTP 429)"""
+
+
+class DataProvider:
+    """Base class for anything that can return a ticker's .info payload"""
+
+    name = "base"
+    # Whether payloads should go through the on-disk fundamentals cache
+    cacheable = True
+
+    def get_info(self, ticker):
+        raise NotImplementedError
+
+    def get_history(self, tickers, start, end):
+        """
+        Daily OHLCV for tickers on [start, end), as {field: DataFrame} with a
+        date index and one column per ticker, for every HISTORY_FIELDS field
+        """
+        raise NotImplementedError
+
+
+class YahooProvider(DataProvider):
+    """Live Yahoo Finance data via yfinance"""
+
+    name = "yahoo"
+
+    def get_info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def get_history(self, tickers, start, end):
+        # One multi-symbol request for the whole batch
+        data = yf.download(
+            list(tickers), start=start, end=end, interval="1d", group_by="column",
+            auto_adjust=False, actions=False, threads=True, progress=False
+        )
+        history = {}
+        for column, field in HISTORY_FIELDS.items():
+            frame = data[column] if column in data.columns.get_level_values(0) else pd.DataFrame(index=data.index)
+            history[field] = frame.reindex(columns=list(tickers))
+        return history
+
+
+class ReplayProvider(DataProvider):
+    """
+    Serve recorded .info payloads from <fixture_dir>/<TICKER>.json.
+
+    Each lookup sleeps for `latency` seconds to simulate a network round trip,
+    so fetch strategies can be compared offline against identical inputs.
+    When an upstream provider is given, tickers without a recording are
+    fetched from it and recorded; otherwise they raise LookupError.
+    """
+
+    name = "replay"
+    cacheable = False
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR, upstream=None, latency=DEFAULT_REPLAY_LATENCY):
+        self.fixture_dir = fixture_dir
+        self.upstream = upstream
+        self.latency = latency
+
+    def path_for(self, ticker):
+        return os.path.join(self.fixture_dir, f"{ticker}.json")
+
+    def history_path_for(self, ticker):
+        return os.path.join(self.fixture_dir, "history", f"{ticker}.csv")
+
+    def get_info(self, ticker):
+        path = self.path_for(ticker)
+        if os.path.exists(path):
+            if self.latency:
+                time.sleep(self.latency)
+            with open(path) as f:
+                return json.load(f)
+        if self.upstream is None:
+            raise LookupError(f"No recorded payload for {ticker} in {self.fixture_dir}")
+        info = self.upstream.get_info(ticker)
+        self.record(ticker, info)
+        return info
+
+    def get_history(self, tickers, start, end):
+        """Recorded daily bars from <fixture_dir>/history/<TICKER>.csv, clipped to [start, end)"""
+        tickers = list(tickers)
+        missing = [t for t in tickers if not os.path.exists(self.history_path_for(t))]
+        fetched = {}
+        if missing:
+            if self.upstream is None:
+                raise LookupError(f"No recorded history for {', '.join(missing)} in {self.fixture_dir}")
+            fetched = self.upstream.get_history(missing, start, end)
+            self.record_history(fetched)
+        if self.latency:
+            time.sleep(self.latency)
+        frames = {}
+        for ticker in tickers:
+            if ticker in missing:
+                continue
+            frame = pd.read_csv(self.history_path_for(ticker), index_col="date", parse_dates=True)
+            frames[ticker] = frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+        history = {}
+        for field in HISTORY_FIELDS.values():
+            columns = {ticker: frame[field] for ticker, frame in frames.items()}
+            recorded = pd.DataFrame(columns)
+            if fetched:
+                recorded = pd.concat([recorded, fetched[field]], axis=1)
+            history[field] = recorded.reindex(columns=tickers).sort_index()
+        return history
+
+    def record_history(self, history):
+        """Write {field: date x ticker DataFrame} as one CSV per ticker"""
+        os.makedirs(os.path.join(self.fixture_dir, "history"), exist_ok=True)
+        tickers = history["close"].columns
+        for ticker in tickers:
+            frame = pd.DataFrame({field: history[field][ticker] for field in HISTORY_FIELDS.values()})
+            frame.index.name = "date"
+            path = self.history_path_for(ticker)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            frame.dropna(how="all").to_csv(tmp_path)
+            os.replace(tmp_path, path)
+
+    def record(self, ticker, info):
+        """Write a payload for ticker, replacing any existing recording"""
+        # Created here rather than up front, so replaying never writes to disk
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        path = self.path_for(ticker)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(info, f, default=str, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+class FaultInjectingProvider(DataProvider):
+    """
+    Wrap a provider and answer some lookups with ThrottledError, like Yahoo's 429s.
+
+    A seeded random `throttle_rate` fraction of lookups fail, and when
+    `max_rate` is set, any lookup beyond that many in the trailing second
+    fails too, as a server-side rate limit would.
+    """
+
+    def __init__(self, upstream, throttle_rate=0.0, max_rate=None, seed=0):
+        self.upstream = upstream
+        self.throttle_rate = throttle_rate
+        self.max_rate = max_rate
+        self.name = upstream.name
+        self.cacheable = upstream.cacheable
+        self._random = random.Random(seed)
+        self._recent = []
+        self._lock = threading.Lock()
+
+    def _maybe_throttle(self, what):
+        with self._lock:
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            self._recent.append(now)
+            throttled = self._random.random() < self.throttle_rate
+            if self.max_rate is not None and len(self._recent) > self.max_rate:
+                throttled = True
+        if throttled:
+            raise ThrottledError(f"429 Too Many Requests (injected) for {what}")
+
+    def get_info(self, ticker):
+        self._maybe_throttle(ticker)
+        return self.upstream.get_info(ticker)
+
+    def get_history(self, tickers, start, end):
+        self._maybe_throttle(f"history of {len(tickers)} tickers")
+        return self.upstream.get_history(tickers, start, end)
+
+
+def make_provider(kind=DEFAULT_PROVIDER, inject_429_rate=DEFAULT_INJECTED_429_RATE):
+    """
+    Build a provider by name: yahoo, replay, record (replay backed by Yahoo),
+    http (the pooled async client for the quote API at MTWB_QUOTE_URL) or
+    service (that client pointed at the scoring service at MTWB_SERVICE_URL).
+
+    Providers that reach the network, or that have injected 429s, are wrapped
+    in the rate-limited fetch scheduler.
+    """
+    # Imported here because the scheduler itself builds on DataProvider
+    from mtwb.rate_limit import ScheduledProvider
+
+    if kind == "yahoo":
+        provider = YahooProvider()
+    elif kind == "replay":
+        provider = ReplayProvider()
+    elif kind == "record":
+        provider = ReplayProvider(upstream=ScheduledProvider(YahooProvider()))
+    elif kind == "http":
+        from mtwb.quote_client import HTTPQuoteProvider
+        provider = HTTPQuoteProvider()
+    elif kind == "service":
+        from mtwb.service import ServiceProvider
+        provider = ServiceProvider()
+    else:
+        raise ValueError(f"Unknown data provider: {kind!r}")
+
+    if inject_429_rate:
+        provider = FaultInjectingProvider(provider, throttle_rate=inject_429_rate)
+    if kind == "yahoo" or inject_429_rate:
+        provider = ScheduledProvider(provider)
+    return provider
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Return the process-wide provider, built from MTWB_DATA_PROVIDER on first use"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = make_provider()
+        return _provider
+
+
+def set_provider(provider):
+    """Replace the process-wide provider (e.g. for benchmarks)"""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record Yahoo Finance .info payloads for offline replay")
+    parser.add_argument("tickers", nargs="+", help="ticker symbols to record")
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR, help="directory to write <TICKER>.json files to")
+    args = parser.parse_args(argv)
+
+    from mtwb.rate_limit import ScheduledProvider
+
+    upstream = ScheduledProvider(YahooProvider())
+    replay = ReplayProvider(args.fixture_dir)
+    for ticker in args.tickers:
+        try:
+            replay.record(ticker, upstream.get_info(ticker))
+            print(f"Recorded {ticker}")
+        except Exception as e:
+            print(f"Failed to record {ticker}: {e}")
+
+
+if __name__ == "__main__":
+    main()
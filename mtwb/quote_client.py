@@ -0,0 +1,302 @@
+"""Asynchronous HTTP client for a JSON quote API, with pooled keep-alive connections.
+
+AsyncQuoteClient fetches .info payloads from GET <base_url>/v1/info/<TICKER>.
+It opens at most `max_connections` HTTP/1.1 connections and keeps them
+open between requests. Each connection carries up to `pipeline_depth`
+requests at once: requests are written without waiting for earlier
+responses, which come back in request order. A request cut off because the
+server closed the connection is resent, alone on an idle or new connection,
+which is safe because lookups are idempotent GETs.
+
+HTTPQuoteProvider runs the client on a background event loop, so the
+thread-based fetch paths can use it as a DataProvider
+(MTWB_DATA_PROVIDER=http). `python -m mtwb.quote_server` is a local server
+that speaks the same protocol.
+"""
+import asyncio
+import json
+import os
+import ssl
+import threading
+from collections import deque
+from urllib.parse import quote, urlsplit
+
+from mtwb.metrics import counter
+from mtwb.providers import DataProvider, ThrottledError
+
+# Quote API location and connection pool shape; override with MTWB_QUOTE_URL,
+# MTWB_QUOTE_CONNECTIONS and MTWB_QUOTE_PIPELINE (requests in flight per connection)
+DEFAULT_QUOTE_URL = os.environ.get("MTWB_QUOTE_URL", "http://127.0.0.1:8765")
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("MTWB_QUOTE_CONNECTIONS", "8"))
+DEFAULT_PIPELINE_DEPTH = int(os.environ.get("MTWB_QUOTE_PIPELINE", "8"))
+# Seconds to wait for a connection or a response
+DEFAULT_TIMEOUT = 30.0
+# Sends per request when the server closes connections under it
+REQUEST_ATTEMPTS = 3
+
+INFO_PATH = "/v1/info/"
+
+CONNECTIONS_OPENED = counter("mtwb_quote_connections_total", "HTTP connections opened by the quote client")
+REQUEST_RETRIES = counter("mtwb_quote_retries_total", "Quote requests resent after their connection closed")
+
+
+class QuoteHTTPError(OSError):
+    """The quote API answered with an unexpected HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_response(reader):
+    """(status, headers, body) of the next response on a connection"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed by the quote server")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n"):
+            break
+        if not line:
+            raise ConnectionResetError("connection closed mid-response")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Skip any trailers
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+        body = bytes(body)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        # Delimited by the server closing the connection
+        body = await reader.read()
+        headers["connection"] = "close"
+    return status, headers, body
+
+
+class _Connection:
+    """One keep-alive connection; requests are written as they come and answered in order"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+        # Futures of requests written but not yet answered, oldest first
+        self._waiting = deque()
+        self._reading = None
+
+    @property
+    def in_flight(self):
+        return len(self._waiting)
+
+    @property
+    def usable(self):
+        """False once either side has closed; an idle connection notices the server's close via EOF"""
+        return not (self.closed or self.reader.at_eof() or self.writer.is_closing())
+
+    def send(self, request):
+        """Write a request and return a future for its (status, body)"""
+        future = asyncio.get_running_loop().create_future()
+        self.writer.write(request)
+        self._waiting.append(future)
+        if self._reading is None or self._reading.done():
+            self._reading = asyncio.create_task(self._read_responses())
+        return future
+
+    async def _read_responses(self):
+        try:
+            while self._waiting:
+                status, headers, body = await _read_response(self.reader)
+                future = self._waiting.popleft()
+                # A caller that timed out has cancelled its future; the response is dropped
+                if not future.done():
+                    future.set_result((status, body))
+                if headers.get("connection", "").lower() == "close":
+                    self.close()
+        except (OSError, EOFError, ValueError) as e:
+            self.close(e)
+
+    def close(self, error=None):
+        """Close the socket and fail every unanswered request so it can be retried"""
+        self.closed = True
+        self.writer.close()
+        while self._waiting:
+            future = self._waiting.popleft()
+            if not future.done():
+                future.set_exception(ConnectionResetError(f"quote connection closed: {error}" if error else "quote connection closed"))
+
+
+class AsyncQuoteClient:
+    """
+    Pooled, pipelining quote client. Use it from one event loop; create one
+    per loop. Concurrency is bounded by max_connections * pipeline_depth
+    requests in flight; more callers wait for a free slot.
+    """
+
+    def __init__(self, base_url=DEFAULT_QUOTE_URL, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 pipeline_depth=DEFAULT_PIPELINE_DEPTH, timeout=DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"quote URL must be http:// or https://, not {base_url!r}")
+        self.base_url = base_url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.max_connections = max_connections
+        self.pipeline_depth = pipeline_depth
+        self.timeout = timeout
+        self._ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self._host_header = parts.netloc
+        self._connections = []
+        self._opening = 0
+        self._waiters = deque()
+
+    def _wake(self):
+        """Let one caller waiting for a connection slot try again"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def _connection(self, idle_only=False):
+        """
+        A connection with room for another request: an idle one, else a new
+        one while under max_connections, else (unless idle_only) the least
+        busy one below pipeline_depth. Waits when every slot is taken.
+        """
+        while True:
+            for conn in self._connections:
+                if not conn.closed and not conn.usable:
+                    conn.close()
+            self._connections = [conn for conn in self._connections if not conn.closed]
+            for conn in self._connections:
+                if not conn.in_flight:
+                    return conn
+            if len(self._connections) + self._opening < self.max_connections:
+                self._opening += 1
+                try:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port, ssl=self._ssl), self.timeout
+                    )
+                finally:
+                    self._opening -= 1
+                    self._wake()
+                conn = _Connection(reader, writer)
+                self._connections.append(conn)
+                CONNECTIONS_OPENED.inc()
+                return conn
+            open_slots = [] if idle_only else [conn for conn in self._connections if conn.in_flight < self.pipeline_depth]
+            if open_slots:
+                return min(open_slots, key=lambda conn: conn.in_flight)
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    async def request(self, path):
+        """GET path on the quote API; returns (status, body bytes)"""
+        request = (
+            f"GET {self.prefix}{path} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            "Accept: application/json\r\n"
+            "User-Agent: mtwb-quote-client\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        for attempt in range(REQUEST_ATTEMPTS):
+            # A resend goes first in line, so a server closing after N requests can't cut it off again
+            conn = await self._connection(idle_only=attempt > 0)
+            try:
+                return await asyncio.wait_for(conn.send(request), self.timeout)
+            except ConnectionResetError:
+                if attempt == REQUEST_ATTEMPTS - 1:
+                    raise
+                REQUEST_RETRIES.inc()
+            finally:
+                self._wake()
+
+    async def get_info(self, ticker):
+        """The .info payload for ticker"""
+        status, body = await self.request(f"{INFO_PATH}{quote(ticker)}")
+        if status == 200:
+            return json.loads(body)
+        if status == 404:
+            raise LookupError(f"No quote data for {ticker}")
+        if status == 429:
+            raise ThrottledError(f"429 Too Many Requests for {ticker}")
+        raise QuoteHTTPError(status, f"HTTP {status} from the quote API for {ticker}")
+
+    async def get_many(self, tickers):
+        """
+        (results, failures) for many tickers at once, like bulk_fetch.fetch_many:
+        results is aligned with tickers (None where a lookup failed) and
+        failures maps each failed ticker to its exception
+        """
+        tickers = list(tickers)
+        outcomes = await asyncio.gather(*(self.get_info(ticker) for ticker in tickers), return_exceptions=True)
+        results = []
+        failures = {}
+        for ticker, outcome in zip(tickers, outcomes):
+            if isinstance(outcome, Exception):
+                failures[ticker] = outcome
+                results.append(None)
+            else:
+                results.append(outcome)
+        return results, failures
+
+    async def close(self):
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+
+class HTTPQuoteProvider(DataProvider):
+    """
+    DataProvider backed by AsyncQuoteClient on a private event loop thread.
+
+    get_info() may be called from any number of threads at once; their
+    requests share the client's pooled, pipelined connections. get_many()
+    fetches a whole batch in one call without a thread per request.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url=DEFAULT_QUOTE_URL, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 pipeline_depth=DEFAULT_PIPELINE_DEPTH, timeout=DEFAULT_TIMEOUT):
+        self.client = AsyncQuoteClient(base_url, max_connections, pipeline_depth, timeout)
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _event_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="mtwb-quote-client", daemon=True).start()
+            return self._loop
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._event_loop()).result()
+
+    def get_info(self, ticker):
+        return self._run(self.client.get_info(ticker))
+
+    def get_many(self, tickers):
+        """(results, failures) for a batch of tickers; see AsyncQuoteClient.get_many"""
+        return self._run(self.client.get_many(tickers))
+
+    def close(self):
+        """Close the pooled connections and stop the event loop thread"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.client.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
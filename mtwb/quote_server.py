@@ -0,0 +1,238 @@
+"""Local stand-in for a quote API, for tests and benchmarks.
+
+Serves .info payloads as JSON over HTTP/1.1 at GET /v1/info/<TICKER>, the
+protocol mtwb.quote_client speaks. Payloads come from the replay fixtures
+or, with --synthetic, are generated deterministically for any ticker.
+Connections are kept alive and pipelined requests are answered in order.
+Each request takes `latency` seconds of simulated upstream work, and the
+requests queued on one connection are worked on concurrently, as a
+pipelining-aware proxy would.
+
+    python -m mtwb.quote_server --port 8765 --latency 0.05
+    MTWB_DATA_PROVIDER=http MTWB_QUOTE_URL=http://127.0.0.1:8765 python "WHARTON Stock Evaluator.py" --universe all
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import zlib
+from urllib.parse import unquote
+
+from mtwb.providers import DEFAULT_FIXTURE_DIR
+from mtwb.quote_client import INFO_PATH
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+_SECTORS = ["Technology", "Healthcare", "Financial Services", "Consumer Cyclical", "Energy", "Utilities", "Industrials"]
+
+
+def synthetic_info(ticker):
+    """A plausible .info payload for any ticker, the same on every call"""
+    rng = random.Random(zlib.crc32(ticker.encode("utf-8")))
+    return {
+        "symbol": ticker,
+        "shortName": f"{ticker} Holdings",
+        "sector": rng.choice(_SECTORS),
+        "trailingPE": round(rng.uniform(5, 60), 2),
+        "beta": round(rng.uniform(0.2, 2.5), 3),
+        "dividendYield": round(rng.uniform(0, 0.06), 4),
+        "profitMargins": round(rng.uniform(-0.2, 0.4), 4),
+        "returnOnEquity": round(rng.uniform(-0.1, 0.6), 4),
+        "52WeekChange": round(rng.uniform(-0.5, 1.0), 4),
+        "marketCap": rng.randint(10**8, 3 * 10**12),
+        "currentPrice": round(rng.uniform(5, 900), 2),
+        # Real payloads carry a long description; keep responses a realistic size
+        "longBusinessSummary": " ".join(rng.choice(_SECTORS).lower() for _ in range(150)),
+    }
+
+
+class QuoteServer:
+    """
+    The stand-in server. Run it in the foreground with serve_forever(), or on
+    a background thread with start()/stop() (it is also a context manager).
+
+    After `max_keepalive_requests` requests a connection is closed, so
+    clients' reconnect handling can be exercised. `requests` and
+    `connections` count what the server has seen.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, fixture_dir=DEFAULT_FIXTURE_DIR, synthetic=False,
+                 latency=0.0, max_keepalive_requests=None):
+        self.host = host
+        self.port = port
+        self.fixture_dir = fixture_dir
+        self.synthetic = synthetic
+        self.latency = latency
+        self.max_keepalive_requests = max_keepalive_requests
+        self.requests = 0
+        self.connections = 0
+        self._payloads = {}
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _payload(self, ticker):
+        """Encoded JSON for ticker, or None if there is nothing to serve"""
+        body = self._payloads.get(ticker)
+        if body is None:
+            if self.synthetic:
+                info = synthetic_info(ticker)
+            else:
+                path = os.path.join(self.fixture_dir, f"{ticker}.json")
+                if not os.path.exists(path):
+                    return None
+                with open(path) as f:
+                    info = json.load(f)
+            body = self._payloads[ticker] = json.dumps(info).encode("utf-8")
+        return body
+
+    async def _respond(self, method, path):
+        """(status, body) for one request; method is None for a malformed request line"""
+        if method is None:
+            return 400, b'{"error": "bad request"}'
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method != "GET":
+            return 405, b'{"error": "only GET is supported"}'
+        if not path.startswith(INFO_PATH):
+            return 404, b'{"error": "unknown path"}'
+        ticker = unquote(path[len(INFO_PATH):]).upper()
+        body = self._payload(ticker)
+        if body is None:
+            return 404, json.dumps({"error": f"no data for {ticker}"}).encode("utf-8")
+        return 200, body
+
+    async def _write_responses(self, queue, writer):
+        """Write responses in request order as each one finishes"""
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            response, close = item
+            status, body = await response
+            head = (
+                f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                + ("Connection: close\r\n" if close else "")
+                + "\r\n"
+            )
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+            if close:
+                return
+
+    async def _read_requests(self, reader, queue):
+        """Queue a response task per request as requests arrive, until the connection should close"""
+        served = 0
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                return
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            if length:
+                await reader.readexactly(length)
+            parts = request_line.decode("latin-1").split()
+            method, path = parts[:2] if len(parts) == 3 else (None, None)
+            served += 1
+            self.requests += 1
+            close = (method is None or headers.get("connection", "").lower() == "close"
+                     or served == self.max_keepalive_requests)
+            await queue.put((asyncio.create_task(self._respond(method, path)), close))
+            if close:
+                return
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        queue = asyncio.Queue()
+        responding = asyncio.create_task(self._write_responses(queue, writer))
+        try:
+            await self._read_requests(reader, queue)
+            await queue.put(None)
+            await responding
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # stop() cancels open connections; finish quietly rather than as a cancelled task
+            pass
+        finally:
+            responding.cancel()
+            writer.close()
+
+    async def _start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def serve_forever(self):
+        async def run():
+            await self._start()
+            print(f"Serving quotes on {self.url}{INFO_PATH}<TICKER>", flush=True)
+            async with self._server:
+                await self._server.serve_forever()
+        asyncio.run(run())
+
+    def start(self):
+        """Serve on a background thread; returns once the port is bound"""
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            self._ready.set()
+            self._loop.run_forever()
+            self._server.close()
+            # Drop open connections along with the listener
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+        self._thread = threading.Thread(target=run, name="mtwb-quote-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve .info payloads over HTTP for the http data provider")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on, 0 for any free port (default: 8765)")
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR, help="directory of <TICKER>.json payloads to serve")
+    parser.add_argument("--synthetic", action="store_true", help="generate a payload for any ticker instead")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds of upstream work per request")
+    parser.add_argument("--max-keepalive-requests", type=int,
+                        help="close each connection after this many requests")
+    args = parser.parse_args(argv)
+    server = QuoteServer(args.host, args.port, args.fixture_dir, args.synthetic, args.latency, args.max_keepalive_requests)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Rate-limit-aware fetch scheduling: token bucket, coordinated backoff, circuit breaker."""
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from mtwb.metrics import counter, gauge
+from mtwb.providers import DataProvider, ThrottledError
+
+# Outbound request budget; override with MTWB_FETCH_RATE (requests/sec) and MTWB_FETCH_BURST.
+# A cold refresh of N tickers takes at least (N - burst) / rate seconds: about 7 s
+# for the ~200-ticker universe at these defaults, and the rate halves on 429s anyway
+DEFAULT_RATE = float(os.environ.get("MTWB_FETCH_RATE", "25"))
+DEFAULT_BURST = int(os.environ.get("MTWB_FETCH_BURST", "50"))
+
+THROTTLED = counter("mtwb_fetch_throttled_total", "Upstream responses that signalled rate limiting")
+RETRIES = counter("mtwb_fetch_retries_total", "Fetch retries after a throttling error")
+CIRCUIT_REJECTIONS = counter("mtwb_circuit_rejections_total", "Fetches refused while the circuit breaker was open")
+CIRCUIT_OPEN = gauge("mtwb_circuit_open", "1 while the fetch circuit breaker is open")
+FETCH_RATE = gauge("mtwb_fetch_rate", "Current outbound request rate limit in requests/sec")
+
+
+class CircuitOpenError(Exception):
+    """Fetching is paused because the upstream error rate spiked"""
+
+
+def is_throttling_error(error):
+    """True for HTTP 429 / rate-limit errors from yfinance, requests or the providers"""
+    if isinstance(error, ThrottledError) or type(error).__name__ == "YFRateLimitError":
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    # Fallback for wrappers that keep only the text, e.g. requests' "429 Client Error: Too Many Requests for url"
+    message = str(error)
+    return "429 Client Error" in message or "Too Many Requests" in message or "Rate limited" in message
+
+
+def is_upstream_error(error):
+    """Errors that say the upstream is unhealthy, as opposed to a bad ticker"""
+    if is_throttling_error(error):
+        return True
+    # requests.HTTPError is an OSError; a 4xx is about the request (e.g. a delisted ticker), not the upstream
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None and status < 500:
+        return False
+    return isinstance(error, (OSError, CircuitOpenError))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all fetch workers.
+
+    pause() stops every caller until a deadline, which is how a throttling
+    error on one worker backs off the whole pool instead of each thread
+    retrying on its own.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def update_rate(self, update):
+        """Set rate to update(rate) atomically and return the new rate"""
+        with self._lock:
+            # Tokens earned so far accrue at the old rate
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = update(self.rate)
+            return self.rate
+
+    def pause(self, seconds):
+        """Hold all callers for at least `seconds` and drain the burst allowance"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class CircuitBreaker:
+    """
+    Open when the upstream error rate over the last `window` calls reaches
+    `threshold`; after `cooldown` seconds a single probe call is let through
+    and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, window=20, threshold=0.5, min_calls=10, cooldown=30.0):
+        self.window = window
+        self.threshold = threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, success):
+        with self._lock:
+            if self._opened_at is not None:
+                if self._probing:
+                    self._probing = False
+                    if success:
+                        self._close()
+                    else:
+                        self._opened_at = time.monotonic()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.threshold:
+                self._opened_at = time.monotonic()
+                CIRCUIT_OPEN.set(1)
+
+    def _close(self):
+        self._opened_at = None
+        self._outcomes.clear()
+        CIRCUIT_OPEN.set(0)
+
+
+class ScheduledProvider(DataProvider):
+    """
+    Route another provider's fetches through a shared token bucket.
+
+    Throttling errors pause the whole bucket with jittered exponential
+    backoff, halve the request rate, and are retried up to `max_retries`
+    times; each success nudges the rate back up towards `max_rate`
+    (additive increase, multiplicative decrease), so long refreshes settle
+    at the highest rate the upstream tolerates. While the circuit breaker
+    is open, fetches fail fast with CircuitOpenError so callers can serve
+    cached data instead.
+    """
+
+    def __init__(self, upstream, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=0.5,
+                 max_retries=4, backoff_base=0.5, max_backoff=30.0, breaker=None):
+        self.upstream = upstream
+        self.name = upstream.name
+        self.cacheable = upstream.cacheable
+        self.bucket = TokenBucket(rate, burst)
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._last_slowdown = 0.0
+        FETCH_RATE.set(rate)
+
+    def backoff(self, attempt):
+        """Jittered exponential delay before retry number `attempt` (0-based)"""
+        cap = min(self.max_backoff, self.backoff_base * 2 ** attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def get_info(self, ticker):
+        return self._call(self.upstream.get_info, ticker, what=ticker)
+
+    def get_history(self, tickers, start, end):
+        # A multi-symbol download is one request as far as the rate limit is concerned
+        return self._call(self.upstream.get_history, tickers, start, end, what=f"history of {len(tickers)} tickers")
+
+    def _call(self, fn, *args, what):
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                CIRCUIT_REJECTIONS.inc()
+                raise CircuitOpenError(f"Fetching paused after repeated upstream errors; {what} not fetched")
+            self.bucket.acquire()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self.breaker.record(not is_upstream_error(e))
+                if not is_throttling_error(e):
+                    raise
+                THROTTLED.inc()
+                self._slow_down()
+                if attempt == self.max_retries:
+                    raise
+                RETRIES.inc()
+                self.bucket.pause(self.backoff(attempt))
+                continue
+            self.breaker.record(True)
+            self._speed_up()
+            return result
+
+    def _slow_down(self):
+        # Requests already in flight when the first 429 arrived will likely be
+        # throttled too; count them as one signal rather than halving per worker
+        def halve(rate):
+            now = time.monotonic()
+            if now - self._last_slowdown < 1.0:
+                return rate
+            self._last_slowdown = now
+            return max(self.min_rate, rate / 2)
+        FETCH_RATE.set(self.bucket.update_rate(halve))
+
+    def _speed_up(self):
+        if self.bucket.rate < self.max_rate:
+            FETCH_RATE.set(self.bucket.update_rate(lambda rate: min(self.max_rate, rate + self.max_rate / 20)))
@@ -0,0 +1,70 @@
+"""Compact projections of provider .info payloads.
+
+A Yahoo .info payload carries well over a hundred fields, but the scorers
+only read the nine in INFO_FIELDS. Payloads are projected to a
+SecurityRecord as soon as they are fetched, so caches, pickles and session
+state hold a small fixed-width tuple instead of the full dict.
+"""
+from typing import NamedTuple, Optional
+
+# Yahoo .info key -> SecurityRecord field, for every key the scorers read
+INFO_FIELDS = {
+    "trailingPE": "trailing_pe",
+    "beta": "beta",
+    "dividendYield": "dividend_yield",
+    "profitMargins": "profit_margins",
+    "returnOnEquity": "return_on_equity",
+    "52WeekChange": "fiftytwo_week_change",
+    "marketCap": "market_cap",
+    "currentPrice": "current_price",
+    "sector": "sector",
+}
+
+_FIELD_BITS = {key: 1 << i for i, key in enumerate(INFO_FIELDS)}
+
+
+class SecurityRecord(NamedTuple):
+    """
+    The scored subset of a ticker's .info payload.
+
+    `present` is a bitmask of the keys the payload actually had, so get()
+    can tell a missing key (returns the default) from one that was present
+    but None, exactly as dict.get() on the full payload would.
+    """
+
+    trailing_pe: Optional[float] = None
+    beta: Optional[float] = None
+    dividend_yield: Optional[float] = None
+    profit_margins: Optional[float] = None
+    return_on_equity: Optional[float] = None
+    fiftytwo_week_change: Optional[float] = None
+    market_cap: Optional[float] = None
+    current_price: Optional[float] = None
+    sector: Optional[str] = None
+    present: int = 0
+
+    @classmethod
+    def from_info(cls, info):
+        """Project an .info payload (or anything with .get) down to the scored fields"""
+        if isinstance(info, cls):
+            return info
+        values = {}
+        present = 0
+        for key, field in INFO_FIELDS.items():
+            if key in info:
+                values[field] = info[key]
+                present |= _FIELD_BITS[key]
+        return cls(present=present, **values)
+
+    def get(self, key, default=None):
+        """dict.get() by Yahoo .info key, so records drop in for full payloads"""
+        if not self.present & _FIELD_BITS.get(key, 0):
+            return default
+        return getattr(self, INFO_FIELDS[key])
+
+    def __contains__(self, key):
+        return bool(self.present & _FIELD_BITS.get(key, 0))
+
+    def to_info(self):
+        """{Yahoo key: value} for the keys the original payload had"""
+        return {key: getattr(self, field) for key, field in INFO_FIELDS.items() if self.present & _FIELD_BITS[key]}
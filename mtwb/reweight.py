@@ -0,0 +1,85 @@
+"""Instant re-ranking of a scored universe under different component weights.
+
+The MTWB score is a weighted sum of component scores that don't depend on
+the weights, so a rankings snapshot can be re-ranked without refetching or
+re-scoring: ScoreMatrix keeps the components of every security as one
+(securities x components) float64 matrix, and a new mtwb_score is a single
+matrix-vector product. The best k rows are then picked with a partial
+selection (screening.top_k). When the snapshot includes realized-risk
+components, they keep their share of the score as in mtwb.risk.
+"""
+import numpy as np
+
+from mtwb.risk import RISK_SCORE_COLUMNS
+from mtwb.scoring import SCORE_COLUMNS, round_like_python
+from mtwb.screening import top_k
+
+COMPONENTS = SCORE_COLUMNS[1:]
+
+
+def component_weights(weights):
+    """weights keyed by COMPONENTS, scaled to sum to 1; v2's `esg_score` key stands for esg_score_normalized"""
+    weights = dict(weights)
+    if "esg_score_normalized" not in weights:
+        weights["esg_score_normalized"] = weights.pop("esg_score")
+    vector = np.array([float(weights[name]) for name in COMPONENTS])
+    total = vector.sum()
+    if total <= 0:
+        raise ValueError("at least one component weight must be positive")
+    return dict(zip(COMPONENTS, (vector / total).tolist()))
+
+
+class ScoreMatrix:
+    """
+    Component scores of a ranked universe, for re-ranking under new weights.
+
+    Built from the ranked DataFrame (from_frame) or a memory-mapped
+    RankingSnapshot (from_snapshot); rows keep the source's ranking order,
+    which breaks ties. records(rows) returns those rows' ranking dicts.
+    """
+
+    def __init__(self, matrix, risk_weight=0.0, records_fn=None):
+        self.matrix = np.ascontiguousarray(matrix, dtype=float)
+        self.risk_weight = risk_weight if self.matrix.shape[1] > len(COMPONENTS) else 0.0
+        self._records_fn = records_fn
+
+    @classmethod
+    def _columns(cls, has_column):
+        risk = [name for name in RISK_SCORE_COLUMNS if has_column(name)]
+        return COMPONENTS + (risk if len(risk) == len(RISK_SCORE_COLUMNS) else [])
+
+    @classmethod
+    def from_frame(cls, frame, risk_weight=0.0):
+        columns = cls._columns(lambda name: name in frame)
+        # A refresh that fetched nothing returns a frame without any columns
+        matrix = frame[columns].to_numpy(dtype=float) if len(frame) else np.empty((0, len(columns)))
+        return cls(matrix, risk_weight, lambda rows: frame.iloc[rows].to_dict("records"))
+
+    @classmethod
+    def from_snapshot(cls, snapshot, risk_weight=0.0):
+        columns = cls._columns(lambda name: name in snapshot.columns)
+        matrix = np.column_stack([snapshot.column(name) for name in columns]) if len(snapshot) else np.empty((0, len(columns)))
+        return cls(matrix, risk_weight, lambda rows: [snapshot.records(row, row + 1)[0] for row in rows])
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def weight_vector(self, weights):
+        """One weight per matrix column; risk components share risk_weight equally"""
+        base = np.array([component_weights(weights)[name] for name in COMPONENTS])
+        if not self.risk_weight:
+            return base
+        risk = np.full(self.matrix.shape[1] - len(COMPONENTS), self.risk_weight / (self.matrix.shape[1] - len(COMPONENTS)))
+        return np.concatenate([(1 - self.risk_weight) * base, risk])
+
+    def scores(self, weights):
+        """mtwb_score of every row under weights, rounded like the scorers round it"""
+        return round_like_python(self.matrix @ self.weight_vector(weights))
+
+    def top(self, weights, k=50):
+        """(rows of the best k under weights, best first; every row's score)"""
+        scores = self.scores(weights)
+        return top_k(scores, np.arange(len(scores)), k), scores
+
+    def records(self, rows):
+        return self._records_fn(list(rows))
@@ -0,0 +1,184 @@
+"""Realized risk metrics from the local price history, for the whole universe at once.
+
+Every function takes a dates x tickers matrix (as stored by mtwb.history)
+and works column-wise with NumPy, so a 500-ticker x 10-year universe is a
+handful of array passes rather than a loop over tickers. Missing bars are
+NaN and are skipped rather than treated as zero returns.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from mtwb.history import HistoryStore
+from mtwb.metrics import SCORING_SECONDS, timed_function
+
+TRADING_DAYS = 252
+
+# Share of the MTWB score taken by the realized risk components (0 disables
+# them), the benchmark for beta and the lookback window in trading days;
+# override with MTWB_RISK_WEIGHT / MTWB_RISK_BENCHMARK / MTWB_RISK_WINDOW
+DEFAULT_RISK_WEIGHT = float(os.environ.get("MTWB_RISK_WEIGHT", "0"))
+DEFAULT_BENCHMARK = os.environ.get("MTWB_RISK_BENCHMARK", "VOO")
+DEFAULT_WINDOW = int(os.environ.get("MTWB_RISK_WINDOW", str(TRADING_DAYS)))
+# Fewer usable returns than this in the window leaves a metric NaN
+MIN_PERIODS = 60
+
+RISK_METRICS = ["realized_volatility", "downside_deviation", "max_drawdown", "realized_beta"]
+RISK_SCORE_COLUMNS = [f"{name}_score" for name in RISK_METRICS]
+
+
+def daily_returns(prices):
+    """Simple daily returns; NaN wherever either day's price is missing"""
+    prices = np.asarray(prices, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return prices[1:] / prices[:-1] - 1
+
+
+def _valid_count(returns):
+    return np.sum(~np.isnan(returns), axis=0)
+
+
+def realized_volatility(returns, min_periods=MIN_PERIODS):
+    """Annualized standard deviation of daily returns, per column"""
+    count = _valid_count(returns)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vol = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS) if returns.size else np.full(returns.shape[1], np.nan)
+    return np.where(count >= min_periods, vol, np.nan)
+
+
+def downside_deviation(returns, target=0.0, min_periods=MIN_PERIODS):
+    """Annualized root-mean-square shortfall of daily returns below target, per column"""
+    count = _valid_count(returns)
+    shortfall = np.minimum(returns - target, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviation = np.sqrt(np.nansum(shortfall ** 2, axis=0) / count) * np.sqrt(TRADING_DAYS)
+    return np.where(count >= min_periods, deviation, np.nan)
+
+
+def forward_fill(prices):
+    """Carry each column's last price forward over missing bars (leading NaNs stay NaN)"""
+    valid = ~np.isnan(prices)
+    rows = np.where(valid, np.arange(len(prices))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return prices[rows, np.arange(prices.shape[1])]
+
+
+def max_drawdown(prices):
+    """Largest peak-to-trough fall as a negative fraction (e.g. -0.35), per column"""
+    prices = forward_fill(np.asarray(prices, dtype=float))
+    peaks = np.fmax.accumulate(prices, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdowns = prices / peaks - 1
+    all_missing = np.all(np.isnan(drawdowns), axis=0)
+    drawdowns[:, all_missing] = 0.0
+    return np.where(all_missing, np.nan, np.nanmin(drawdowns, axis=0))
+
+
+def rolling_beta(returns, benchmark_returns, window=DEFAULT_WINDOW, min_periods=MIN_PERIODS):
+    """
+    Beta of every column against benchmark_returns over a trailing window,
+    for every day: a matrix shaped like returns. Uses running sums over the
+    days where both the ticker and the benchmark have a return.
+    """
+    benchmark = np.asarray(benchmark_returns, dtype=float)[:, None]
+    paired = ~np.isnan(returns) & ~np.isnan(benchmark)
+    x = np.where(paired, benchmark, 0.0)
+    y = np.where(paired, returns, 0.0)
+
+    def trailing(values):
+        sums = np.cumsum(values, axis=0)
+        sums[window:] = sums[window:] - sums[:-window]
+        return sums
+
+    n = trailing(paired.astype(float))
+    sx, sy = trailing(x), trailing(y)
+    sxy, sxx = trailing(x * y), trailing(x * x)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    return np.where(n >= min_periods, beta, np.nan)
+
+
+@timed_function(SCORING_SECONDS, scorer="risk_metrics")
+def risk_metrics(prices, benchmark_prices, window=DEFAULT_WINDOW):
+    """
+    {metric: per-column array} over the last `window` returns of a dates x
+    tickers price matrix; realized_beta is the latest rolling beta against
+    benchmark_prices (a price series on the same dates)
+    """
+    prices = np.asarray(prices, dtype=float)[-(window + 1):]
+    returns = daily_returns(prices)
+    benchmark_returns = daily_returns(np.asarray(benchmark_prices, dtype=float)[-(window + 1):, None])[:, 0]
+    beta = rolling_beta(returns, benchmark_returns, window)
+    return {
+        "realized_volatility": realized_volatility(returns),
+        "downside_deviation": downside_deviation(returns),
+        "max_drawdown": max_drawdown(prices),
+        "realized_beta": beta[-1] if len(beta) else np.full(prices.shape[1], np.nan),
+    }
+
+
+def load_risk_metrics(tickers, store=None, benchmark=DEFAULT_BENCHMARK, window=DEFAULT_WINDOW):
+    """
+    DataFrame of RISK_METRICS indexed by ticker, from the local history
+    store's adjusted closes. Tickers without stored history get NaN.
+    """
+    tickers = list(tickers)
+    metrics = pd.DataFrame(np.nan, index=pd.Index(tickers, name="ticker"), columns=RISK_METRICS)
+    store = store or HistoryStore()
+    stored = [ticker for ticker in tickers if ticker in store]
+    if not stored or benchmark not in store:
+        return metrics
+    prices = store.field("adj_close")
+    start = max(0, len(store) - window - 1)
+    values = risk_metrics(
+        prices[start:, store.columns(stored)],
+        prices[start:, store.columns([benchmark])[0]],
+        window
+    )
+    for name in RISK_METRICS:
+        metrics.loc[stored, name] = values[name]
+    return metrics
+
+
+def risk_component_scores(metrics):
+    """
+    0-100 scores (higher is safer) for each realized risk metric, on the
+    same absolute scales as the v2 scorer's components; 50 where a metric
+    is unavailable
+    """
+    volatility = np.asarray(metrics["realized_volatility"], dtype=float)
+    downside = np.asarray(metrics["downside_deviation"], dtype=float)
+    drawdown = np.asarray(metrics["max_drawdown"], dtype=float)
+    beta = np.asarray(metrics["realized_beta"], dtype=float)
+    scores = {
+        # 0% annualized volatility scores 100, 50% or more scores 0
+        "realized_volatility_score": np.clip(100 - volatility * 200, 0, 100),
+        "downside_deviation_score": np.clip(100 - downside * 250, 0, 100),
+        # No drawdown scores 100, losing half from the peak scores 0
+        "max_drawdown_score": np.clip(100 + drawdown * 200, 0, 100),
+        # Same scale as the v2 volatility_score on reported beta
+        "realized_beta_score": np.clip(100 - beta * 40, 0, 100),
+    }
+    return pd.DataFrame(
+        {name: np.where(np.isnan(values), 50.0, values) for name, values in scores.items()},
+        index=getattr(metrics, "index", None)
+    )
+
+
+def add_risk_components(scores, tickers, risk_weight=DEFAULT_RISK_WEIGHT, store=None):
+    """
+    Join RISK_SCORE_COLUMNS onto a scores DataFrame (one row per ticker, in
+    order) and give their equally weighted mean `risk_weight` of its
+    mtwb_score, scaling the existing score by the remainder. Returns scores
+    unchanged when risk_weight is 0 or no ticker has stored history.
+    """
+    if not risk_weight:
+        return scores
+    metrics = load_risk_metrics(tickers, store)
+    if metrics.isna().all().all():
+        return scores
+    risk = risk_component_scores(metrics).set_axis(scores.index)
+    scores = scores.join(risk)
+    scores["mtwb_score"] = (1 - risk_weight) * scores["mtwb_score"] + risk_weight * risk.mean(axis=1)
+    return scores
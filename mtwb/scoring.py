@@ -0,0 +1,224 @@
+"""Vectorized MTWB scoring over whole universes.
+
+The batch scorers here compute the same component scores as the per-row
+calculate_mtwb_score functions in streamlit_app.py and streamlit_app_v2.py,
+but with NumPy array operations over every security at once. Their results
+are bit-identical to calling the per-row function on each security.
+"""
+import numpy as np
+import pandas as pd
+
+from mtwb.metrics import SCORING_SECONDS, timed_function
+
+# MTWB weighting used by streamlit_app.py and the CLI evaluator (mtwb.evaluator
+# imports it as WEIGHTS): traditional financial metrics 85 points, ESG 25 points.
+# It sums to 1.10 by design: the financial weights were cut from the original
+# 100 points and ESG's 25 added on top. The CLI rescales its final score to 0-100
+# with normalize(), so only the ratios matter there; streamlit_app.py's per-row
+# score can reach 110. Left as is so existing scores don't move; the v2 app's
+# weight sliders rescale this preset to 100%.
+EVALUATOR_WEIGHTS = {
+    "pe_score": 0.08,              # 8 points (reduced from 10)
+    "volatility_score": 0.20,      # 20 points (reduced from 25)
+    "dividend_score": 0.12,        # 12 points (reduced from 15)
+    "profit_score": 0.08,          # 8 points (reduced from 10)
+    "roe_score": 0.12,             # 12 points (reduced from 15)
+    "growth_score": 0.25,          # 25 points (reduced from 30)
+    "esg_score_normalized": 0.25   # 25 points (new ESG component)
+}
+
+# Weighting used by streamlit_app_v2.py (its MTWB_WEIGHTS); esg_score weights esg_score_normalized.
+# Sums to 1.00.
+V2_WEIGHTS = {
+    "pe_score": 0.10,              # 10% - Valuation
+    "volatility_score": 0.20,      # 20% - Risk management
+    "dividend_score": 0.20,        # 20% - Income generation
+    "profit_score": 0.10,          # 10% - Profitability
+    "roe_score": 0.10,             # 10% - Efficiency
+    "growth_score": 0.10,          # 10% - Growth potential
+    "esg_score": 0.20              # 20% - ESG & community
+}
+
+SCORE_COLUMNS = [
+    "mtwb_score",
+    "pe_score",
+    "volatility_score",
+    "dividend_score",
+    "profit_score",
+    "roe_score",
+    "growth_score",
+    "esg_score_normalized"
+]
+
+# Input columns and the defaults the per-row scorers use for missing keys
+_INPUT_DEFAULTS = {
+    "pe_ratio": 0,
+    "beta": 1,
+    "dividend_yield": 0,
+    "profit_margin": 0,
+    "roe": 0,
+    "fiftytwo_wk_change": 0,
+    "esg_score": 12.5
+}
+
+# Columns the v2 scorer reads with `value or default`
+_V2_OR_DEFAULTED = ("pe_ratio", "beta", "dividend_yield", "profit_margin", "roe", "fiftytwo_wk_change")
+
+
+def frame_from_records_v1(records):
+    """Build scorer input columns from streamlit_app.py stock_data dicts"""
+    return pd.DataFrame({
+        column: np.array([r.get(column, default) for r in records], dtype=float)
+        for column, default in _INPUT_DEFAULTS.items()
+    })
+
+
+def frame_from_records_v2(records):
+    """Build scorer input columns from streamlit_app_v2.py financial data dicts"""
+    columns = {}
+    for column, default in _INPUT_DEFAULTS.items():
+        if column in _V2_OR_DEFAULTED:
+            values = [r.get(column, default) or default for r in records]
+        else:
+            values = [r.get(column, default) for r in records]
+        columns[column] = np.array(values, dtype=float)
+    return pd.DataFrame(columns)
+
+
+def frame_from_columns_v2(columns, rows=None):
+    """
+    Like frame_from_records_v2, from {input column: array of raw values}.
+    Missing columns are filled with their defaults; rows defaults to the
+    length of the supplied columns.
+    """
+    if rows is None:
+        rows = len(next(iter(columns.values()))) if columns else 0
+    frame = {}
+    for column, default in _INPUT_DEFAULTS.items():
+        if column not in columns:
+            frame[column] = np.full(rows, float(default))
+            continue
+        values = np.asarray(columns[column], dtype=float)
+        if column in _V2_OR_DEFAULTED:
+            # `value or default`: only an exact zero is falsy; NaN passes through
+            values = np.where(values == 0, float(default), values)
+        frame[column] = values
+    return frame
+
+
+def round_like_python(values, ndigits=1):
+    """
+    Round an array exactly like the builtin round(x, ndigits).
+
+    np.round scales, rounds and unscales, which can disagree with Python's
+    correctly-rounded decimal result only when the scaled value sits next to
+    a .5 tie. Those few entries are re-rounded with the builtin.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, ndigits)
+    scaled = values * 10.0 ** ndigits
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded.flat[i] = round(float(values.flat[i]), ndigits)
+    return rounded
+
+
+def _clamp(values, low=0, high=100):
+    # max(low, min(high, x)) returns the int `low` for x == -0.0, so add 0.0
+    # to turn -0.0 into 0.0 the way the per-row scorers do
+    return np.clip(values, low, high) + 0.0
+
+
+def _column(frame, name):
+    if name in frame:
+        return np.asarray(frame[name], dtype=float)
+    return np.full(len(frame), float(_INPUT_DEFAULTS[name]))
+
+
+def _weighted_sum(components, weights):
+    # Same left-to-right accumulation order as the per-row scorers
+    return (
+        components["pe_score"] * weights["pe_score"] +
+        components["volatility_score"] * weights["volatility_score"] +
+        components["dividend_score"] * weights["dividend_score"] +
+        components["profit_score"] * weights["profit_score"] +
+        components["roe_score"] * weights["roe_score"] +
+        components["growth_score"] * weights["growth_score"] +
+        components["esg_score_normalized"] * weights["esg_score_normalized"]
+    )
+
+
+def _scores_frame(components, mtwb_score, index):
+    result = {"mtwb_score": round_like_python(mtwb_score)}
+    for name in SCORE_COLUMNS[1:]:
+        result[name] = round_like_python(components[name])
+    return pd.DataFrame(result, index=index)
+
+
+@timed_function(SCORING_SECONDS, scorer="batch_v1")
+def calculate_mtwb_scores_v1(frame, weights=None):
+    """
+    Batch equivalent of calculate_mtwb_score in streamlit_app.py.
+
+    frame is a DataFrame (or dict of arrays) with pe_ratio, beta,
+    dividend_yield, profit_margin, roe, fiftytwo_wk_change and esg_score in
+    that app's units (percentages). Returns a DataFrame of SCORE_COLUMNS.
+    """
+    weights = weights or EVALUATOR_WEIGHTS
+    pe_ratio = _column(frame, "pe_ratio")
+    beta = _column(frame, "beta")
+    dividend_yield = _column(frame, "dividend_yield")
+    profit_margin = _column(frame, "profit_margin")
+    roe = _column(frame, "roe")
+    fiftytwo_wk_change = _column(frame, "fiftytwo_wk_change")
+    esg_score = _column(frame, "esg_score")
+
+    with np.errstate(invalid="ignore"):
+        components = {
+            "pe_score": np.where(pe_ratio > 0, 100 - _clamp((pe_ratio - 10) * 2), 50.0),
+            "volatility_score": np.where(np.isnan(beta), 50.0, 100 - _clamp(beta * 50)),
+            "dividend_score": np.where(np.isnan(dividend_yield), 50.0, np.minimum(100, dividend_yield * 20)),
+            "profit_score": np.where(np.isnan(profit_margin), 50.0, _clamp(profit_margin)),
+            "roe_score": np.where(np.isnan(roe), 50.0, _clamp(roe)),
+            "growth_score": np.where(np.isnan(fiftytwo_wk_change), 50.0, _clamp(50 + fiftytwo_wk_change)),
+            "esg_score_normalized": esg_score * 4
+        }
+        mtwb_score = _weighted_sum(components, weights)
+
+    return _scores_frame(components, mtwb_score, getattr(frame, "index", None))
+
+
+@timed_function(SCORING_SECONDS, scorer="batch_v2")
+def calculate_mtwb_scores_v2(frame, weights):
+    """
+    Batch equivalent of calculate_mtwb_score in streamlit_app_v2.py.
+
+    frame holds the same input columns as for calculate_mtwb_scores_v1, in
+    v2's decimal units, after the `or` defaulting in frame_from_records_v2.
+    weights uses v2's MTWB_WEIGHTS keys (esg_score for the ESG weight).
+    """
+    pe_ratio = _column(frame, "pe_ratio")
+    beta = _column(frame, "beta")
+    dividend_yield = _column(frame, "dividend_yield")
+    profit_margin = _column(frame, "profit_margin")
+    roe = _column(frame, "roe")
+    fiftytwo_wk_change = _column(frame, "fiftytwo_wk_change")
+    esg_score = _column(frame, "esg_score")
+
+    with np.errstate(invalid="ignore"):
+        esg_score_normalized = _clamp(esg_score * 4)
+        components = {
+            "pe_score": np.where(pe_ratio > 0, _clamp(100 - (pe_ratio - 15) * 2), 50.0),
+            "volatility_score": np.where(beta > 0, _clamp(100 - beta * 40), 50.0),
+            "dividend_score": np.where(dividend_yield >= 0, np.minimum(100, dividend_yield * 1500), 50.0),
+            "profit_score": np.where(profit_margin >= 0, _clamp(profit_margin * 100), 50.0),
+            "roe_score": np.where(roe >= 0, _clamp(roe * 100), 50.0),
+            "growth_score": np.where(fiftytwo_wk_change >= -0.5, _clamp(50 + fiftytwo_wk_change * 100), 50.0),
+            # min(100, max(0, nan)) is 0 in the per-row scorer
+            "esg_score_normalized": np.where(np.isnan(esg_score_normalized), 0.0, esg_score_normalized)
+        }
+        v2_weights = dict(weights, esg_score_normalized=weights["esg_score"])
+        mtwb_score = _weighted_sum(components, v2_weights)
+
+    return _scores_frame(components, mtwb_score, getattr(frame, "index", None))
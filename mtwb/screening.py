@@ -0,0 +1,139 @@
+"""Indexed screening over a scored universe.
+
+ScreeningIndex groups rows once by (asset type, sector), with each group
+already in ranking order, so a query like "top 25 Healthcare stocks rated A
+or better" reads only the matching groups. It takes the first k rows of each
+group that pass the ESG thresholds, then a partial selection (np.partition)
+picks the overall top k from those candidates. No boolean mask over the
+whole universe and no full sort is needed per query.
+"""
+import numpy as np
+import pandas as pd
+
+# Best first; anything else (including missing ratings) ranks below C
+ESG_RATINGS = ["AAA", "AA", "A", "BBB", "BB", "B", "CCC", "CC", "C"]
+_RATING_RANKS = {rating: len(ESG_RATINGS) - i for i, rating in enumerate(ESG_RATINGS)}
+
+UNIVERSES = ("all", "stocks", "etfs")
+
+
+def top_k(scores, rows, k):
+    """
+    The best k of `rows` by scores[rows], best first. Uses a partial
+    partition rather than a full sort; ties keep the order rows are given in.
+    """
+    if k is None or k >= len(rows):
+        order = np.lexsort((np.arange(len(rows)), -scores[rows]))
+        return rows[order]
+    if k <= 0:
+        return rows[:0]
+    values = -scores[rows]
+    kth = np.partition(values, k - 1)[k - 1]
+    better = values < kth
+    # Fill the remaining places with the earliest rows tied at the cutoff
+    tied = np.flatnonzero(values == kth)[:k - int(better.sum())]
+    keep = np.flatnonzero(better)
+    keep = np.concatenate([keep, tied])
+    keep.sort()
+    candidates = rows[keep]
+    order = np.lexsort((keep, values[keep]))
+    return candidates[order]
+
+
+class ScreeningIndex:
+    """
+    Precomputed sector and asset-type indexes over a scored DataFrame.
+
+    query() returns row positions (for frame.iloc) best first; select()
+    returns the rows themselves. Missing scores rank last. Ties keep the
+    frame's row order, as a stable sort would.
+    """
+
+    def __init__(self, frame, score="mtwb_score", sector="main_sector", etf="etf",
+                 esg_rating="esg_rating", esg_score="esg_score"):
+        self.frame = frame
+        scores = frame[score].to_numpy(dtype=float)
+        self.scores = np.where(np.isnan(scores), -np.inf, scores)
+        rating_codes, ratings = pd.factorize(frame[esg_rating], use_na_sentinel=False)
+        self.esg_ranks = np.array([_RATING_RANKS.get(rating, 0) for rating in ratings], dtype=np.int8)[rating_codes]
+        self.esg_scores = frame[esg_score].to_numpy(dtype=float)
+
+        # Every row in ranking order, then grouped by (is ETF, sector) keeping that order
+        self.order = np.argsort(-self.scores, kind="stable")
+        is_etf = frame[etf].to_numpy(dtype=bool)
+        codes, sectors = pd.factorize(frame[sector], use_na_sentinel=False)
+        self.sectors = list(sectors)
+        group_ids = is_etf[self.order].astype(np.int64) * len(self.sectors) + codes[self.order]
+        # Stable sorts of 16-bit keys are radix sorts, linear in the number of rows
+        key_type = np.int16 if 2 * len(self.sectors) <= np.iinfo(np.int16).max else np.int64
+        grouped = self.order[np.argsort(group_ids.astype(key_type), kind="stable")]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(group_ids, minlength=2 * len(self.sectors)))])
+        self._groups = {}
+        for etf_flag in (False, True):
+            for code, name in enumerate(self.sectors):
+                group = int(etf_flag) * len(self.sectors) + code
+                rows = grouped[bounds[group]:bounds[group + 1]]
+                if len(rows):
+                    self._groups[(etf_flag, name)] = rows
+        self._universes = {
+            "all": self.order,
+            "stocks": self.order[~is_etf[self.order]],
+            "etfs": self.order[is_etf[self.order]],
+        }
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _candidates(self, universe, sector):
+        if universe not in UNIVERSES:
+            raise ValueError(f"universe must be one of {', '.join(UNIVERSES)}, not {universe!r}")
+        if sector is None:
+            return [self._universes[universe]]
+        flags = {"all": (False, True), "stocks": (False,), "etfs": (True,)}[universe]
+        return [self._groups[(flag, sector)] for flag in flags if (flag, sector) in self._groups]
+
+    def query(self, k=50, universe="all", sector=None, min_esg_rating=None, min_esg_score=None):
+        """
+        Row positions of the top k securities (all matches if k is None)
+        in `universe` ("all", "stocks" or "etfs"), optionally one sector,
+        rated at least min_esg_rating (e.g. "A") and with esg_score of at
+        least min_esg_score in the frame's own units
+        """
+        if min_esg_rating is not None and min_esg_rating not in _RATING_RANKS:
+            raise ValueError(f"unknown ESG rating {min_esg_rating!r}; choose from {', '.join(ESG_RATINGS)}")
+        min_rank = None if min_esg_rating is None else _RATING_RANKS[min_esg_rating]
+        # Each group is already in ranking order, so its first k matches are its best k
+        picked = [self._first_matches(rows, k, min_rank, min_esg_score) for rows in self._candidates(universe, sector)]
+        if not picked:
+            return np.empty(0, dtype=np.int64)
+        if len(picked) == 1:
+            return picked[0]
+        # Concatenated groups are not in frame order, so break ties by row position
+        rows = np.sort(np.concatenate(picked))
+        return top_k(self.scores, rows, k)
+
+    def _first_matches(self, rows, k, min_rank, min_score):
+        """The first k of `rows` passing the ESG thresholds, scanning in chunks so a large group stops early"""
+        if min_rank is None and min_score is None:
+            return rows if k is None else rows[:k]
+        # max(..., 1): an empty group still needs a nonzero range() step
+        chunk = max(len(rows), 1) if k is None else max(4 * k, 1024)
+        matches = []
+        found = 0
+        for start in range(0, len(rows), chunk):
+            part = rows[start:start + chunk]
+            if min_rank is not None:
+                part = part[self.esg_ranks[part] >= min_rank]
+            if min_score is not None:
+                part = part[self.esg_scores[part] >= min_score]
+            matches.append(part)
+            found += len(part)
+            if k is not None and found >= k:
+                break
+        rows = np.concatenate(matches) if matches else rows[:0]
+        return rows if k is None else rows[:k]
+
+    def select(self, k=50, universe="all", sector=None, min_esg_rating=None, min_esg_score=None):
+        """The rows query() picks, as a DataFrame in ranking order"""
+        return self.frame.iloc[self.query(k, universe, sector, min_esg_rating, min_esg_score)]
+
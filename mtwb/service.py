@@ -0,0 +1,431 @@
+"""Local HTTP/JSON scoring service shared by the CLI and the Streamlit apps.
+
+One service process owns the fetch tier: the provider and its rate limiter,
+the fundamentals cache and the ESG dataset. Front-ends ask it for data and
+rankings instead of each fetching from Yahoo, so adding UI replicas adds no
+upstream traffic. Endpoints:
+
+    GET  /v1/health              status and the age of the universe rankings
+    GET  /v1/info/<TICKER>       one .info record (the protocol of mtwb.quote_client)
+    POST /v1/info                {"tickers": [...]}: records and failures for a batch
+    POST /v1/score               {"tickers": [...], "etfs": [...]}: score a batch together
+    GET  /v1/top?universe=stocks&sector=Healthcare&top=50&min_esg_rating=A&min_esg_score=70
+    GET  /metrics                Prometheus text
+
+Scoring is the CLI evaluator's (mtwb.evaluator); /v1/score and /v1/top
+also take risk_weight (0 to 1). Rows come back as {"columns": [...],
+"rows": [...]} in rank order, one array per row in OUTPUT_COLUMNS order,
+and responses are gzipped for clients that accept it. Concurrent fetches
+of one ticker share a single upstream call, and the universe is refetched
+in the background every MTWB_SERVICE_REFRESH_SECONDS, so /v1/top only
+waits on the first refresh.
+
+    python -m mtwb.service --port 8780
+    MTWB_SERVICE_URL=http://127.0.0.1:8780 python "WHARTON Stock Evaluator.py" --universe stocks
+    MTWB_DATA_PROVIDER=service MTWB_SERVICE_URL=http://127.0.0.1:8780 streamlit run streamlit_app_v2.py
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import pandas as pd
+import requests
+
+from mtwb.background import SnapshotRefresher
+from mtwb.bulk_fetch import fetch_many
+from mtwb.evaluator import OUTPUT_COLUMNS, SECTORS, fetch_frame, get_financials, score_data
+from mtwb.fundamentals_cache import cached_info
+from mtwb.metrics import FETCH_FAILURES, counter, render_prometheus
+from mtwb.providers import ThrottledError
+from mtwb.quote_client import INFO_PATH, HTTPQuoteProvider
+from mtwb.rate_limit import CircuitOpenError
+from mtwb.risk import DEFAULT_RISK_WEIGHT
+from mtwb.screening import ScreeningIndex, UNIVERSES
+from mtwb.singleflight import SingleFlight
+from mtwb.universe import COMPANIES, ETFS
+
+# Where clients find the service (unset: front-ends fetch and score in-process)
+DEFAULT_SERVICE_URL = os.environ.get("MTWB_SERVICE_URL", "")
+DEFAULT_PORT = 8780
+# Seconds between background refetches of the full universe
+DEFAULT_REFRESH_SECONDS = float(os.environ.get("MTWB_SERVICE_REFRESH_SECONDS", "300"))
+# Tickers accepted by one batch request
+MAX_BATCH = 5000
+# Scored universes kept for non-default risk weights, least recently used dropped first
+MAX_CACHED_RISK_WEIGHTS = 4
+# Responses at least this many bytes are gzipped for clients that accept it
+GZIP_MIN_BYTES = 1024
+
+SERVICE_REQUESTS = counter("mtwb_service_requests_total", "Scoring service requests, by endpoint and status")
+
+
+class ServiceError(Exception):
+    """A request the service refused or could not answer; `status` is the HTTP status to send"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _plain_column(values):
+    """A column as JSON-ready Python values, NaN as null"""
+    return [None if isinstance(value, float) and math.isnan(value) else value for value in values.tolist()]
+
+
+def rows_payload(frame):
+    """{"columns", "rows"} for a ranked frame, with a 1-based rank column"""
+    columns = [list(range(1, len(frame) + 1))]
+    columns += [_plain_column(frame[column]) if column in frame else [None] * len(frame) for column in OUTPUT_COLUMNS[1:]]
+    return {"columns": OUTPUT_COLUMNS, "rows": [list(row) for row in zip(*columns)]}
+
+
+class ScoringService:
+    """
+    The service's state, independent of HTTP: coalesced fetches through the
+    fundamentals cache, and the universe refetched in the background and
+    scored once per refresh for the default risk weight and the last few
+    others asked for.
+    """
+
+    def __init__(self, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        self._records = SingleFlight("service_fetch")
+        self._refresher = SnapshotRefresher(self._collect_universe, refresh_seconds, name="mtwb-service-universe")
+        # (snapshot created_at, risk weight) -> (scored universe, ScreeningIndex), least recently used first
+        self._rankings = OrderedDict()
+        self._rankings_lock = threading.Lock()
+
+    def start(self):
+        self._refresher.start()
+        return self
+
+    def stop(self):
+        self._refresher.stop()
+
+    def record(self, ticker):
+        """The ticker's SecurityRecord; callers asking at the same time share one fetch"""
+        return self._records.do(ticker, cached_info, ticker)
+
+    def _financials(self, ticker, etf=False):
+        return get_financials(ticker, etf, self.record(ticker))
+
+    def info_many(self, tickers):
+        """({ticker: .info record}, {ticker: error message}) for a batch"""
+        records, failures = fetch_many(tickers, self.record)
+        results = {ticker: record.to_info() for ticker, record in zip(tickers, records) if record is not None}
+        return results, {ticker: str(error) for ticker, error in failures.items()}
+
+    def _collect_universe(self):
+        jobs = [(ticker, False) for ticker in COMPANIES] + [(ticker, True) for ticker in ETFS]
+        frame, failures = fetch_frame(jobs, self._financials)
+        if frame.empty:
+            raise RuntimeError(f"no universe data; {len(failures)} fetches failed")
+        return frame, [ticker for ticker, _ in failures]
+
+    def rankings(self, risk_weight=DEFAULT_RISK_WEIGHT):
+        """(scored universe, ScreeningIndex, Snapshot) for risk_weight; waits only for the first refresh"""
+        snapshot = self._refresher.get()
+        if snapshot is None:
+            raise ServiceError(503, f"universe rankings unavailable: {self._refresher.last_error}")
+        key = (snapshot.created_at, risk_weight)
+        with self._rankings_lock:
+            ranked = self._rankings.get(key)
+            if ranked is not None:
+                self._rankings.move_to_end(key)
+        if ranked is None:
+            frame, _ = snapshot.value
+            scored = score_data(frame.copy(), risk_weight)
+            ranked = (scored, ScreeningIndex(scored))
+            with self._rankings_lock:
+                # Rankings of older universes are never asked for again
+                for old in [k for k in self._rankings if k[0] != snapshot.created_at]:
+                    del self._rankings[old]
+                self._rankings[key] = ranked
+                # The default weight stays; clients can't grow the cache by varying the others
+                others = [k for k in self._rankings if k[1] != DEFAULT_RISK_WEIGHT]
+                for old in others[:max(0, len(others) - MAX_CACHED_RISK_WEIGHTS)]:
+                    del self._rankings[old]
+        return ranked[0], ranked[1], snapshot
+
+    def top(self, universe="all", sector=None, top=50, min_esg_rating=None, min_esg_score=None,
+            risk_weight=DEFAULT_RISK_WEIGHT):
+        """The CLI's select_top over the service's universe, as a response payload"""
+        if universe not in UNIVERSES:
+            raise ServiceError(400, f"universe must be one of {', '.join(UNIVERSES)}")
+        if sector is not None and sector not in SECTORS:
+            raise ServiceError(400, f"unknown sector {sector!r}; choose from: {', '.join(SECTORS)}")
+        _, index, snapshot = self.rankings(risk_weight)
+        try:
+            rows = index.select(top or None, universe, None if sector in (None, "All Sectors") else sector,
+                                min_esg_rating, min_esg_score)
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+        frame, failed = snapshot.value
+        return {**rows_payload(rows), "created_at": snapshot.created_at, "universe_size": len(frame), "failed": failed}
+
+    def score(self, tickers, etfs=None, risk_weight=DEFAULT_RISK_WEIGHT):
+        """Score a batch together, normalized over the batch; ETFs default to the ones in the universe"""
+        etfs = set(ETFS if etfs is None else etfs)
+        frame, failures = fetch_frame([(ticker, ticker in etfs) for ticker in tickers], self._financials)
+        payload = {"columns": OUTPUT_COLUMNS, "rows": []}
+        if not frame.empty:
+            scored = score_data(frame, risk_weight)
+            payload = rows_payload(ScreeningIndex(scored).select(None))
+        return {**payload, "failures": {ticker: str(error) for (ticker, _), error in failures.items()}}
+
+    def health(self):
+        snapshot = self._refresher.get(timeout=0)
+        return {
+            "status": "ok",
+            "universe_age": None if snapshot is None else snapshot.age,
+            "refreshing": self._refresher.refreshing,
+            "last_error": None if self._refresher.last_error is None else str(self._refresher.last_error),
+        }
+
+
+def _tickers(body):
+    tickers = body.get("tickers")
+    if not isinstance(tickers, list) or not all(isinstance(ticker, str) for ticker in tickers):
+        raise ServiceError(400, '"tickers" must be a list of ticker strings')
+    if len(tickers) > MAX_BATCH:
+        raise ServiceError(413, f"at most {MAX_BATCH} tickers per request")
+    return [ticker.strip().upper() for ticker in tickers]
+
+
+def _etfs(body):
+    etfs = body.get("etfs")
+    if etfs is not None and (not isinstance(etfs, list) or not all(isinstance(ticker, str) for ticker in etfs)):
+        raise ServiceError(400, '"etfs" must be a list of ticker strings')
+    return etfs
+
+
+def _risk_weight(value):
+    """A risk weight from a query string or JSON body, which must be a number in [0, 1]"""
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    weight = float(value)
+    if not 0 <= weight <= 1:
+        raise ValueError(f"out of range: {value!r}")
+    return weight
+
+
+def _body_value(body, name, parse, default=None):
+    if name not in body or body[name] is None:
+        return default
+    try:
+        return parse(body[name])
+    except (TypeError, ValueError):
+        raise ServiceError(400, f"invalid {name}: {body[name]!r}")
+
+
+def _query_value(query, name, parse=str):
+    values = query.get(name)
+    if not values or values[-1] == "":
+        return None
+    try:
+        return parse(values[-1])
+    except ValueError:
+        raise ServiceError(400, f"invalid {name}: {values[-1]!r}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "mtwb-service"
+    # Set on the subclass make_server builds
+    service = None
+    access_log = False
+
+    def log_message(self, format, *args):
+        if self.access_log:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        gzipped = len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        # Metrics label; unknown paths share one so clients can't grow the label set
+        endpoint = "unknown"
+        try:
+            if method == "POST":
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    raise ServiceError(400, f"invalid Content-Length: {self.headers.get('Content-Length')!r}")
+                if length < 0:
+                    raise ServiceError(400, f"invalid Content-Length: {length}")
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    raise ServiceError(400, "request body must be JSON")
+                if not isinstance(body, dict):
+                    raise ServiceError(400, "request body must be a JSON object")
+            query = parse_qs(url.query)
+            risk_weight = _query_value(query, "risk_weight", _risk_weight)
+            if risk_weight is None:
+                risk_weight = DEFAULT_RISK_WEIGHT
+
+            if url.path.startswith(INFO_PATH):
+                endpoint = INFO_PATH
+            elif url.path in ("/v1/health", "/v1/top", "/v1/info", "/v1/score", "/metrics"):
+                endpoint = url.path
+
+            if method == "GET" and endpoint == INFO_PATH:
+                ticker = unquote(url.path[len(INFO_PATH):]).strip().upper()
+                status, payload = 200, self.service.record(ticker).to_info()
+            elif method == "GET" and url.path == "/v1/health":
+                status, payload = 200, self.service.health()
+            elif method == "GET" and url.path == "/v1/top":
+                top = _query_value(query, "top", int)
+                status, payload = 200, self.service.top(
+                    _query_value(query, "universe") or "all", _query_value(query, "sector"),
+                    50 if top is None else top, _query_value(query, "min_esg_rating"),
+                    _query_value(query, "min_esg_score", float), risk_weight
+                )
+            elif method == "POST" and url.path == "/v1/info":
+                results, failures = self.service.info_many(_tickers(body))
+                status, payload = 200, {"info": results, "failures": failures}
+            elif method == "POST" and url.path == "/v1/score":
+                status, payload = 200, self.service.score(
+                    _tickers(body), _etfs(body), _body_value(body, "risk_weight", _risk_weight, risk_weight)
+                )
+            elif method == "GET" and url.path == "/metrics":
+                status, payload = 200, render_prometheus().encode("utf-8")
+            else:
+                raise ServiceError(404, f"no endpoint {method} {url.path}")
+        except ServiceError as e:
+            status, payload = e.status, {"error": str(e)}
+        except LookupError as e:
+            status, payload = 404, {"error": str(e)}
+        except ThrottledError as e:
+            status, payload = 429, {"error": str(e)}
+        except CircuitOpenError as e:
+            status, payload = 503, {"error": str(e)}
+        except Exception as e:
+            FETCH_FAILURES.inc(site="service")
+            status, payload = 502, {"error": f"{type(e).__name__}: {e}"}
+        SERVICE_REQUESTS.inc(endpoint=endpoint, status=str(status))
+        self._send(status, payload, "text/plain; version=0.0.4" if isinstance(payload, bytes) else "application/json")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, access_log=False):
+    """An HTTP server for `service`, one thread per connection; call serve_forever() on it"""
+    handler = type("Handler", (_Handler,), {"service": service, "access_log": access_log})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class ServiceProvider(HTTPQuoteProvider):
+    """
+    The http provider pointed at the scoring service (MTWB_DATA_PROVIDER=service).
+    The service's cache is the shared one, so lookups skip the local disk cache.
+    """
+
+    name = "service"
+    cacheable = False
+
+    def __init__(self, base_url=DEFAULT_SERVICE_URL):
+        if not base_url:
+            raise ValueError("MTWB_DATA_PROVIDER=service needs MTWB_SERVICE_URL")
+        super().__init__(base_url)
+
+
+class ServiceClient:
+    """Blocking client for the scoring service; rows come back as DataFrames in rank order"""
+
+    def __init__(self, base_url=DEFAULT_SERVICE_URL, timeout=120.0):
+        if not base_url:
+            raise ValueError("no scoring service URL; set MTWB_SERVICE_URL")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def _request(self, method, path, **kwargs):
+        response = self._session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        payload = response.json()
+        if response.status_code != 200:
+            raise ServiceError(response.status_code, payload.get("error", f"HTTP {response.status_code}"))
+        return payload
+
+    @staticmethod
+    def _frame(payload):
+        return pd.DataFrame(payload["rows"], columns=payload["columns"])
+
+    def health(self):
+        return self._request("GET", "/v1/health")
+
+    def info(self, ticker):
+        return self._request("GET", f"{INFO_PATH}{quote(ticker)}")
+
+    def info_many(self, tickers):
+        """({ticker: .info record}, {ticker: error message})"""
+        payload = self._request("POST", "/v1/info", json={"tickers": list(tickers)})
+        return payload["info"], payload["failures"]
+
+    def top(self, universe="all", sector=None, top=50, min_esg_rating=None, min_esg_score=None, risk_weight=None):
+        """The service's select_top as a DataFrame; top=0 for every match"""
+        params = {"universe": universe, "sector": sector, "top": top, "min_esg_rating": min_esg_rating,
+                  "min_esg_score": min_esg_score, "risk_weight": risk_weight}
+        payload = self._request("GET", "/v1/top", params={k: v for k, v in params.items() if v is not None})
+        return self._frame(payload)
+
+    def score(self, tickers, etfs=None, risk_weight=None):
+        """(DataFrame of the batch scored together, {ticker: error message})"""
+        body = {"tickers": list(tickers)}
+        if etfs is not None:
+            body["etfs"] = list(etfs)
+        if risk_weight is not None:
+            body["risk_weight"] = risk_weight
+        payload = self._request("POST", "/v1/score", json=body)
+        return self._frame(payload), payload["failures"]
+
+    def close(self):
+        self._session.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve MTWB data and rankings over HTTP to the CLI and apps")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on, 0 for any free port (default: {DEFAULT_PORT})")
+    parser.add_argument("--refresh-seconds", type=float, default=DEFAULT_REFRESH_SECONDS,
+                        help="seconds between universe refetches (default: MTWB_SERVICE_REFRESH_SECONDS or 300)")
+    parser.add_argument("--access-log", action="store_true", help="log every request to stderr")
+    args = parser.parse_args(argv)
+    service = ScoringService(args.refresh_seconds).start()
+    server = make_server(service, args.host, args.port, args.access_log)
+    host, port = server.server_address[:2]
+    print(f"Serving MTWB scoring on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Coalesce concurrent identical calls, with a short-lived result cache.
+
+Streamlit runs every session's script on its own thread, so several
+analysts looking up the same ticker at once would each fetch it. With a
+SingleFlight group the first caller for a key runs the call; callers that
+arrive while it is in flight wait for it and get the same result, or the
+same exception. Successful results are then served from memory for `ttl`
+seconds. Failures are never cached, so the next call after one retries.
+"""
+import threading
+import time
+
+from mtwb.metrics import counter, record_cache_lookup
+
+COALESCED_CALLS = counter("mtwb_singleflight_shared_total", "Calls that waited on an identical in-flight call, by group")
+
+
+class _Call:
+    """One in-flight call; waiters block on `done`"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    A named group of coalesced calls. `name` labels its metrics: lookups and
+    misses under the cache name, plus mtwb_singleflight_shared_total for
+    callers that joined an in-flight call. At most `max_entries` results
+    are kept; expired ones are dropped first, then the oldest.
+    """
+
+    def __init__(self, name, ttl=0.0, max_entries=1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls = {}
+        # key -> (monotonic expiry, result), oldest first
+        self._results = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """fn(*args, **kwargs), shared with any identical call for `key` in flight or cached"""
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    record_cache_lookup(self.name)
+                    return cached[1]
+                del self._results[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        record_cache_lookup(self.name, miss=leader)
+
+        if not leader:
+            COALESCED_CALLS.inc(group=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.ttl > 0:
+                    self._store(key, call.result)
+            call.done.set()
+        return call.result
+
+    def _store(self, key, result):
+        now = time.monotonic()
+        self._results.pop(key, None)
+        self._results[key] = (now + self.ttl, result)
+        if len(self._results) > self.max_entries:
+            for stale in [k for k, (expires, _) in self._results.items() if expires <= now]:
+                del self._results[stale]
+            while len(self._results) > self.max_entries:
+                del self._results[next(iter(self._results))]
+
+    def forget(self, key=None):
+        """Drop one cached result, or all of them when key is None; in-flight calls are unaffected"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
@@ -0,0 +1,218 @@
+"""Precomputed rankings in a versioned, memory-mapped columnar file.
+
+A snapshot holds the whole scored universe, best first: every input and
+component score column plus sector and ESG fields, one contiguous block per
+column. The file is laid out as
+
+    MAGIC | format version (uint32) | header length (uint32) | header JSON | column blocks
+
+where the header names each column, its dtype and byte offset, the row count,
+when the snapshot was computed and free-form metadata (e.g. the weights it
+was scored with). Numeric and boolean columns are raw little-endian arrays;
+string columns are int64 offsets into a UTF-8 blob. Opening a snapshot maps
+the file and parses only the header, so the first rows of a million-row
+snapshot are readable as quickly as those of a fifty-row one.
+
+Snapshots are written to a temporary file and renamed into place, so readers
+see either the old file or the new one. SnapshotFile notices the rename and
+maps the new file; readers still holding the old mapping keep a valid view.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Snapshot written by the rankings job and read at startup; override with MTWB_SNAPSHOT_PATH
+DEFAULT_SNAPSHOT_PATH = os.environ.get("MTWB_SNAPSHOT_PATH", os.path.join(".mtwb_cache", "rankings.snapshot"))
+
+MAGIC = b"MTWBSNAP"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sII")
+# Column blocks start on cache-line boundaries
+_ALIGN = 64
+
+_NUMERIC_KINDS = {"f": "<f8", "i": "<i8", "u": "<i8", "b": "|b1"}
+
+
+class SnapshotFormatError(ValueError):
+    """The file is not a snapshot, or was written by an incompatible version"""
+
+
+def _padding(size):
+    return -size % _ALIGN
+
+
+def write_snapshot(path, frame, meta=None, created_at=None):
+    """
+    Write a DataFrame (rows in ranking order) to `path` atomically.
+
+    Float, integer and boolean columns are stored as float64, int64 and
+    bool; every other column is stored as strings. `meta` must be JSON
+    serializable and comes back as RankingSnapshot.meta.
+    """
+    created_at = time.time() if created_at is None else created_at
+    rows = len(frame)
+    blocks = []
+    columns = []
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        dtype = _NUMERIC_KINDS.get(values.dtype.kind)
+        if dtype is not None:
+            data = np.ascontiguousarray(values, dtype=dtype).tobytes()
+            columns.append({"name": name, "dtype": dtype, "nbytes": len(data)})
+            blocks.append(data)
+        else:
+            encoded = [("" if value is None else str(value)).encode("utf-8") for value in values]
+            offsets = np.zeros(rows + 1, dtype="<i8")
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            blob = b"".join(encoded)
+            columns.append({"name": name, "dtype": "str", "nbytes": offsets.nbytes, "blob_nbytes": len(blob)})
+            blocks.extend([offsets.tobytes(), blob])
+
+    header = {"rows": rows, "created_at": created_at, "meta": meta or {}, "columns": columns}
+    # Offsets depend on the header length, which depends on the offsets; lay
+    # out with placeholder offsets until the header length stops changing
+    start = 0
+    while True:
+        offset = start
+        for column in columns:
+            column["offset"] = offset
+            offset += column["nbytes"] + _padding(column["nbytes"])
+            if column["dtype"] == "str":
+                column["blob_offset"] = offset
+                offset += column["blob_nbytes"] + _padding(column["blob_nbytes"])
+        encoded_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        data_start = _PREFIX.size + len(encoded_header)
+        data_start += _padding(data_start)
+        if data_start == start:
+            break
+        start = data_start
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(encoded_header)))
+        f.write(encoded_header)
+        f.write(b"\0" * (start - _PREFIX.size - len(encoded_header)))
+        for block in blocks:
+            f.write(block)
+            f.write(b"\0" * _padding(len(block)))
+    os.replace(tmp_path, path)
+
+
+class RankingSnapshot:
+    """
+    Read-only view of a snapshot file.
+
+    column(name) returns a NumPy array backed by the mapping (or a list for
+    string columns); records(start, stop) builds ranking dicts for a slice
+    of rows only, so rendering the top of the list never touches the rest.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._stat.st_size else b""
+        if len(self._map) < _PREFIX.size:
+            raise SnapshotFormatError(f"{path} is too short to be a snapshot")
+        magic, version, header_length = _PREFIX.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotFormatError(f"{path} is not a rankings snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotFormatError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        header = json.loads(bytes(self._map[_PREFIX.size:_PREFIX.size + header_length]))
+        self.rows = header["rows"]
+        self.created_at = header["created_at"]
+        self.meta = header["meta"]
+        self._columns = {column["name"]: column for column in header["columns"]}
+        self._arrays = {}
+        self._index = None
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+    def _array(self, dtype, offset, count):
+        return np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+
+    def column(self, name, start=0, stop=None):
+        """Rows start:stop of one column; an array view for numbers, a list of str for strings"""
+        column = self._columns[name]
+        stop = self.rows if stop is None else min(stop, self.rows)
+        if column["dtype"] != "str":
+            if name not in self._arrays:
+                self._arrays[name] = self._array(column["dtype"], column["offset"], self.rows)
+            return self._arrays[name][start:stop]
+        offsets = self._array("<i8", column["offset"], self.rows + 1)[start:stop + 1]
+        blob_offset = column["blob_offset"]
+        return [
+            self._map[blob_offset + begin:blob_offset + end].decode("utf-8")
+            for begin, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        ]
+
+    def records(self, start=0, stop=None):
+        """Rows start:stop as dicts of plain Python values, in ranking order"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        values = {}
+        for name, column in self._columns.items():
+            data = self.column(name, start, stop)
+            values[name] = data if column["dtype"] == "str" else data.tolist()
+        return [{name: values[name][i] for name in values} for i in range(stop - start)]
+
+    def top(self, n):
+        """The first n ranking dicts"""
+        return self.records(0, n)
+
+    def index_of(self, ticker):
+        """Row of `ticker`, or None; builds a ticker index on first use"""
+        if self._index is None:
+            self._index = {ticker: row for row, ticker in enumerate(self.column("ticker"))}
+        return self._index.get(ticker)
+
+    def same_file(self, stat):
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) == (self._stat.st_ino, self._stat.st_mtime_ns, self._stat.st_size)
+
+
+class SnapshotFile:
+    """
+    The latest snapshot at a path, remapped whenever the file is replaced.
+
+    get() costs one stat() when nothing changed. A missing, unreadable or
+    incompatible file yields None, with the reason in last_error.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self.last_error = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.same_file(stat):
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or not self._snapshot.same_file(stat):
+                try:
+                    self._snapshot = RankingSnapshot(self.path)
+                    self.last_error = None
+                except (OSError, ValueError) as e:
+                    self.last_error = e
+                    self._snapshot = None
+            return self._snapshot
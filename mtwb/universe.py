@@ -0,0 +1,21 @@
+"""Tickers evaluated by the CLI and both Streamlit apps."""
+
+# Top 100 stocks from Yahoo Finance (tickers, representative list)
+COMPANIES = [
+    "AAPL","MSFT","AMZN","GOOGL","META","TSLA","BRK-B","JNJ","V","JPM","PG","NVDA","HD","MA","DIS","UNH","VZ","NFLX",
+    "PFE","KO","PEP","INTC","MRK","WMT","CSCO","NKE","XOM","BA","ABBV","CVX","COST","T","LLY","ORCL","MCD","ADBE","WFC",
+    "IBM","MDT","HON","BMY","QCOM","C","TXN","ABT","CRM","UNP","GS","AMGN","CAT","GILD","AXP","LMT","MS","BKNG","ISRG",
+    "CVS","DE","BLK","TMO","GE","UPS","LOW","AMAT","SPGI","PLD","USB","NOW","SCHW","VRTX","MO","NEE","RTX","PYPL","ADI",
+    "COP","PM","MU","SO","DHR","MMC","SBUX","CI","BDX","MDLZ","ICE","ZTS","PNC","APD","DUK","REGN","CME","GM","F","TGT",
+    "CL","EW","ETN","NSC","FDX","MRNA","ILMN","KMB","LRCX","EOG","MMM","CSX"
+]
+
+# ETFs from WGHIC Approved List (2025-26)
+ETFS = [
+    "ARKK","GRID","FAN","PAVE","TAN","PHO","PBW","IBB","DGRO","ESGU","ICLN","INDA","EWW","EWT","ITA","BBCA","XLU",
+    "ESGV","VWO","VHT","VNQ","VTI","VT","VSS","VNQI","MSOS","IPO","JEPI","COWZ","LCTU","XLC","XLP","XLE","XLF","XLV",
+    "XLI","RSP","ESGE","EWA","EWZ","MCHI","DSI","USMV","QUAL","ESGD","MOAT","VEU","VEA","VGK","VOO","VXUS","XLB","XLY",
+    "QQQ","MTUM","IWF","XLK","SMH","VUG","VGT","IWD","NOBL","SCHD","VIG","VYM","VTV","IJH","VO","IJR","IWM","AVUV",
+    "AGG","JPST","BSV","BND","BNDX","FTSL","HYLS","IGSB","FALN","HYG","LQD","JNK","VCIT","VCSH","SHY","TLT","IEF","EMB",
+    "SHV","GOVT","BIL","VGSH","USFR","EMLC","VTIP","TIP","MBB","MUB","VTEB"
+]
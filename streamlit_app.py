@@ -5,13 +5,18 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import random
 import time
-from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 import os
 
+from mtwb.admin import render_admin_panel
+from mtwb.esg import get_esg_store
+from mtwb.fundamentals_cache import cached_info
+from mtwb.metrics import FETCH_FAILURES, record_cache_lookup, record_cache_miss
+from mtwb.rate_limit import CircuitOpenError
+from mtwb.scoring import EVALUATOR_WEIGHTS
+
 # Page configuration
 st.set_page_config(
     page_title="MTWB Stock Evaluator",
@@ -81,35 +86,6 @@ ESG_RATING_SCORES = {
     "AAA": 100, "AA": 90, "A": 80, "BBB": 70, "BB": 60, "B": 50, "CCC": 30, "CC": 20, "C": 10
 }
 
-# Enhanced ESG data with MTWB community focus
-ESG_SAMPLE_DATA = {
-    "AAPL": {"esg_rating": "AA", "carbon_targets": 85, "community": 90, "community_initiatives": "Education technology programs, environmental conservation"},
-    "MSFT": {"esg_rating": "AA", "carbon_targets": 88, "community": 85, "community_initiatives": "Digital skills training, accessibility programs"},
-    "GOOGL": {"esg_rating": "A", "carbon_targets": 90, "community": 80, "community_initiatives": "STEM education, digital literacy programs"},
-    "META": {"esg_rating": "BBB", "carbon_targets": 75, "community": 70, "community_initiatives": "Digital connectivity, small business support"},
-    "TSLA": {"esg_rating": "A", "carbon_targets": 95, "community": 75, "community_initiatives": "Sustainable transportation, renewable energy education"},
-    "JNJ": {"esg_rating": "AA", "carbon_targets": 70, "community": 95, "community_initiatives": "Healthcare access, vaccine equity programs"},
-    "V": {"esg_rating": "A", "carbon_targets": 65, "community": 85, "community_initiatives": "Financial inclusion, economic empowerment"},
-    "JPM": {"esg_rating": "BBB", "carbon_targets": 60, "community": 80, "community_initiatives": "Financial literacy, affordable housing"},
-    "PG": {"esg_rating": "AA", "carbon_targets": 80, "community": 90, "community_initiatives": "Clean water access, disaster relief"},
-    "NVDA": {"esg_rating": "A", "carbon_targets": 70, "community": 75, "community_initiatives": "AI for social good, STEM education"},
-    "WMT": {"esg_rating": "BBB", "carbon_targets": 75, "community": 85, "community_initiatives": "Food security, workforce development"},
-    "KO": {"esg_rating": "BBB", "carbon_targets": 70, "community": 80, "community_initiatives": "Water stewardship, women's empowerment"},
-    "PEP": {"esg_rating": "A", "carbon_targets": 75, "community": 85, "community_initiatives": "Agricultural development, nutrition programs"},
-    "INTC": {"esg_rating": "BBB", "carbon_targets": 80, "community": 70, "community_initiatives": "Technology education, digital inclusion"},
-    "MRK": {"esg_rating": "A", "carbon_targets": 65, "community": 90, "community_initiatives": "Global health access, disease prevention"},
-    "HD": {"esg_rating": "A", "carbon_targets": 70, "community": 85, "community_initiatives": "Affordable housing, veteran support"},
-    "MA": {"esg_rating": "A", "carbon_targets": 60, "community": 80, "community_initiatives": "Financial inclusion, digital payments"},
-    "DIS": {"esg_rating": "BBB", "carbon_targets": 65, "community": 90, "community_initiatives": "Children's programs, environmental education"},
-    "UNH": {"esg_rating": "BBB", "carbon_targets": 55, "community": 75, "community_initiatives": "Healthcare access, wellness programs"},
-    "VZ": {"esg_rating": "BBB", "carbon_targets": 70, "community": 70, "community_initiatives": "Digital inclusion, STEM education"},
-    "NFLX": {"esg_rating": "A", "carbon_targets": 80, "community": 75, "community_initiatives": "Diverse content creation, accessibility"},
-    "PFE": {"esg_rating": "AA", "carbon_targets": 60, "community": 95, "community_initiatives": "Global health, vaccine equity"},
-    "XOM": {"esg_rating": "BB", "carbon_targets": 30, "community": 60, "community_initiatives": "STEM education, energy education"},
-    "BA": {"esg_rating": "BB", "carbon_targets": 45, "community": 70, "community_initiatives": "STEM education, aerospace programs"},
-    "CVX": {"esg_rating": "BB", "carbon_targets": 35, "community": 65, "community_initiatives": "STEM education, community development"}
-}
-
 def normalize(series, inverse=False):
     """Normalize series to 0-100 scale"""
     if series.max() == series.min():
@@ -120,22 +96,16 @@ def normalize(series, inverse=False):
         return 100 * (series - series.min()) / (series.max() - series.min())
 
 @st.cache_data(ttl=86400)  # Cache for 24 hours
-def get_esg_data(ticker):
-    """Get ESG data for a company with MTWB community focus"""
-    if ticker in ESG_SAMPLE_DATA:
-        return ESG_SAMPLE_DATA[ticker]
-    else:
-        return {
-            "esg_rating": random.choice(["AAA", "AA", "A", "BBB", "BB"]),
-            "carbon_targets": random.randint(40, 90),
-            "community": random.randint(50, 95),
-            "community_initiatives": "Various community engagement programs"
-        }
+def get_esg_data(ticker, esg_version=None, sector=None):
+    """Get ESG data for a company with MTWB community focus; esg_version keys the cache to the loaded dataset"""
+    # Tickers the dataset doesn't cover get the medians of their sector peers,
+    # so the value is the same in every process and safe to cache
+    return get_esg_store().lookup(ticker, sector)
 
 @st.cache_data(ttl=86400)  # Cache for 24 hours
-def calculate_esg_score(ticker):
+def calculate_esg_score(ticker, esg_version=None, sector=None):
     """Calculate MTWB ESG Score (0-25 points) with caching"""
-    esg_data = get_esg_data(ticker)
+    esg_data = get_esg_data(ticker, esg_version, sector)
     
     esg_rating_score = ESG_RATING_SCORES.get(esg_data["esg_rating"], 50)
     
@@ -154,12 +124,13 @@ def calculate_esg_score(ticker):
     }
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
-@lru_cache(maxsize=32)  # In-memory cache for frequently accessed data
-def get_stock_data_cached(ticker):
+def get_stock_data_cached(ticker, esg_version=None):
     """Get comprehensive stock data including ESG with caching"""
+    # Only runs on an st.cache_data miss
+    record_cache_miss("get_stock_data_cached")
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        # Fundamentals are read through the shared on-disk cache
+        info = cached_info(ticker)
         
         # Basic financial data
         pe_ratio = info.get("trailingPE", np.nan)
@@ -173,7 +144,7 @@ def get_stock_data_cached(ticker):
         current_price = info.get("currentPrice", np.nan)
         
         # ESG data - call the cached version
-        esg_data = calculate_esg_score(ticker)
+        esg_data = calculate_esg_score(ticker, esg_version, sector)
         
         result = {
             "ticker": ticker,
@@ -190,15 +161,26 @@ def get_stock_data_cached(ticker):
         }
         
         return result
+    except CircuitOpenError:
+        # Not cached, so the next rerun retries once the breaker closes
+        raise
     except Exception as e:
+        FETCH_FAILURES.inc(site="get_stock_data_cached")
         st.error(f"Error fetching data for {ticker}: {str(e)}")
         return None
 
 def get_stock_data(ticker):
     """Wrapper function to handle the cached stock data retrieval"""
+    record_cache_lookup("get_stock_data_cached")
     try:
-        return get_stock_data_cached(ticker)
+        # A reloaded ESG dataset changes the cache key; fundamentals stay in the on-disk cache
+        return get_stock_data_cached(ticker, get_esg_store().version)
+    except CircuitOpenError:
+        FETCH_FAILURES.inc(site="get_stock_data")
+        st.warning(f"Yahoo Finance is throttling requests; {ticker} has no cached data yet. Try again shortly.")
+        return None
     except Exception as e:
+        FETCH_FAILURES.inc(site="get_stock_data")
         st.error(f"Error in cached data retrieval for {ticker}: {str(e)}")
         return None
 
@@ -239,16 +221,8 @@ def calculate_mtwb_score(stock_data):
     # ESG Score normalization (0-25 points scaled to 0-100)
     esg_score_normalized = esg_score * 4
     
-    # MTWB Weighting system
-    weights = {
-        "pe_score": 0.08,
-        "volatility_score": 0.20,
-        "dividend_score": 0.12,
-        "profit_score": 0.08,
-        "roe_score": 0.12,
-        "growth_score": 0.25,
-        "esg_score_normalized": 0.25
-    }
+    # MTWB Weighting system, shared with the CLI
+    weights = EVALUATOR_WEIGHTS
     
     mtwb_score = (
         pe_score * weights["pe_score"] +
@@ -331,6 +305,9 @@ def main():
         - Carbon Targets (8.75%)
         - Community Engagement (6.25%)
         """)
+        
+        st.markdown("---")
+        render_admin_panel()
     
     # Main content
     col1, col2 = st.columns([2, 1])
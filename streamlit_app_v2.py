@@ -5,7 +5,26 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import os
+import sys
 import time
+from typing import NamedTuple
+
+from mtwb.admin import render_admin_panel
+from mtwb.background import Snapshot, SnapshotRefresher, describe_age
+from mtwb.bulk_fetch import fetch_many
+from mtwb.esg import get_esg_store
+from mtwb.fundamentals_cache import cached_info
+from mtwb.metrics import FETCH_FAILURES, REFRESH_SECONDS, RENDER_SECONDS, record_cache_lookup, timed_function
+from mtwb.portfolio import PortfolioScorer
+from mtwb.rate_limit import CircuitOpenError
+from mtwb.reweight import ScoreMatrix, component_weights
+from mtwb.risk import DEFAULT_RISK_WEIGHT, add_risk_components
+from mtwb.scoring import EVALUATOR_WEIGHTS, V2_WEIGHTS, calculate_mtwb_scores_v2, frame_from_records_v2, round_like_python
+from mtwb.screening import ESG_RATINGS, ScreeningIndex
+from mtwb.singleflight import SingleFlight
+from mtwb.snapshot import DEFAULT_SNAPSHOT_PATH, SnapshotFile, write_snapshot
+from mtwb.universe import COMPANIES, ETFS
 
 # Page configuration
 st.set_page_config(
@@ -276,18 +295,23 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Updated MTWB Scoring System
-MTWB_WEIGHTS = {
-    "pe_score": 0.10,              # 15% - Valuation
-    "volatility_score": 0.20,      # 15% - Risk management  
-    "dividend_score": 0.20,        # 15% - Income generation
-    "profit_score": 0.10,          # 15% - Profitability
-    "roe_score": 0.10,             # 15% - Efficiency
-    "growth_score": 0.10,          # 15% - Growth potential
-    "esg_score": 0.20             # 10% - ESG (reduced from 25% to fit 100%)
+# Updated MTWB Scoring System (defined in mtwb.scoring so the backtest can use it too)
+MTWB_WEIGHTS = V2_WEIGHTS
+
+# Starting points for the sidebar weight sliders; the evaluator set is the one
+# streamlit_app.py and the CLI use
+WEIGHT_PRESETS = {"MTWB v2": MTWB_WEIGHTS, "Evaluator (v1 app & CLI)": EVALUATOR_WEIGHTS}
+COMPONENT_LABELS = {
+    "growth_score": "Growth Potential",
+    "volatility_score": "Risk Management",
+    "dividend_score": "Dividend Stability",
+    "profit_score": "Profitability",
+    "roe_score": "ROE Efficiency",
+    "pe_score": "Valuation",
+    "esg_score_normalized": "ESG & Community"
 }
 
-# ESG weights (25% of total score)
+# ESG weights (ESG is 20% of the total score, see MTWB_WEIGHTS)
 ESG_WEIGHTS = {
     "esg_rating": 0.40,      # 40% of ESG score
     "carbon_targets": 0.35,  # 35% of ESG score
@@ -298,93 +322,15 @@ ESG_RATING_SCORES = {
     "AAA": 100, "AA": 90, "A": 80, "BBB": 70, "BB": 60, "B": 50, "CCC": 30, "CC": 20, "C": 10
 }
 
-# Enhanced company data with more stocks and ETFs
-COMPANIES = [
-    "AAPL","MSFT","AMZN","GOOGL","META","TSLA","BRK-B","JNJ","V","JPM","PG","NVDA","HD","MA","DIS","UNH","VZ","NFLX",
-    "PFE","KO","PEP","INTC","MRK","WMT","CSCO","NKE","XOM","BA","ABBV","CVX","COST","T","LLY","ORCL","MCD","ADBE","WFC",
-    "IBM","MDT","HON","BMY","QCOM","C","TXN","ABT","CRM","UNP","GS","AMGN","CAT","GILD","AXP","LMT","MS","BKNG","ISRG",
-    "CVS","DE","BLK","TMO","GE","UPS","LOW","AMAT","SPGI","PLD","USB","NOW","SCHW","VRTX","MO","NEE","RTX","PYPL","ADI",
-    "COP","PM","MU","SO","DHR","MMC","SBUX","CI","BDX","MDLZ","ICE","ZTS","PNC","APD","DUK","REGN","CME","GM","F","TGT",
-    "CL","EW","ETN","NSC","FDX","MRNA","ILMN","KMB","LRCX","EOG","MMM","CSX"
-]
-
-ETFS = [
-    "ARKK","GRID","FAN","PAVE","TAN","PHO","PBW","IBB","DGRO","ESGU","ICLN","INDA","EWW","EWT","ITA","BBCA","XLU",
-    "ESGV","VWO","VHT","VNQ","VTI","VT","VSS","VNQI","MSOS","IPO","JEPI","COWZ","LCTU","XLC","XLP","XLE","XLF","XLV",
-    "XLI","RSP","ESGE","EWA","EWZ","MCHI","DSI","USMV","QUAL","ESGD","MOAT","VEU","VEA","VGK","VOO","VXUS","XLB","XLY",
-    "QQQ","MTUM","IWF","XLK","SMH","VUG","VGT","IWD","NOBL","SCHD","VIG","VYM","VTV","IJH","VO","IJR","IWM","AVUV",
-    "AGG","JPST","BSV","BND","BNDX","FTSL","HYLS","IGSB","FALN","HYG","LQD","JNK","VCIT","VCSH","SHY","TLT","IEF","EMB",
-    "SHV","GOVT","BIL","VGSH","USFR","EMLC","VTIP","TIP","MBB","MUB","VTEB"
-]
-
-# Enhanced ESG data
-ESG_DATA = {
-    "AAPL": {"esg_rating": "AA", "carbon_targets": 85, "community": 90, "community_initiatives": "Education technology programs, environmental conservation"},
-    "MSFT": {"esg_rating": "AA", "carbon_targets": 88, "community": 85, "community_initiatives": "Digital skills training, accessibility programs"},
-    "GOOGL": {"esg_rating": "A", "carbon_targets": 90, "community": 80, "community_initiatives": "STEM education, digital literacy programs"},
-    "META": {"esg_rating": "BBB", "carbon_targets": 75, "community": 70, "community_initiatives": "Digital connectivity, small business support"},
-    "TSLA": {"esg_rating": "A", "carbon_targets": 95, "community": 75, "community_initiatives": "Sustainable transportation, renewable energy education"},
-    "JNJ": {"esg_rating": "AA", "carbon_targets": 70, "community": 95, "community_initiatives": "Healthcare access, vaccine equity programs"},
-    "V": {"esg_rating": "A", "carbon_targets": 65, "community": 85, "community_initiatives": "Financial inclusion, economic empowerment"},
-    "JPM": {"esg_rating": "BBB", "carbon_targets": 60, "community": 80, "community_initiatives": "Financial literacy, affordable housing"},
-    "PG": {"esg_rating": "AA", "carbon_targets": 80, "community": 90, "community_initiatives": "Clean water access, disaster relief"},
-    "NVDA": {"esg_rating": "A", "carbon_targets": 70, "community": 75, "community_initiatives": "AI for social good, STEM education"},
-    "WMT": {"esg_rating": "BBB", "carbon_targets": 75, "community": 85, "community_initiatives": "Food security, workforce development"},
-    "KO": {"esg_rating": "BBB", "carbon_targets": 70, "community": 80, "community_initiatives": "Water stewardship, women's empowerment"},
-    "PEP": {"esg_rating": "A", "carbon_targets": 75, "community": 85, "community_initiatives": "Agricultural development, nutrition programs"},
-    "INTC": {"esg_rating": "BBB", "carbon_targets": 80, "community": 70, "community_initiatives": "Technology education, digital inclusion"},
-    "MRK": {"esg_rating": "A", "carbon_targets": 65, "community": 90, "community_initiatives": "Global health access, disease prevention"},
-    "HD": {"esg_rating": "A", "carbon_targets": 70, "community": 85, "community_initiatives": "Affordable housing, veteran support"},
-    "MA": {"esg_rating": "A", "carbon_targets": 60, "community": 80, "community_initiatives": "Financial inclusion, digital payments"},
-    "DIS": {"esg_rating": "BBB", "carbon_targets": 65, "community": 90, "community_initiatives": "Children's programs, environmental education"},
-    "UNH": {"esg_rating": "BBB", "carbon_targets": 55, "community": 75, "community_initiatives": "Healthcare access, wellness programs"},
-    "VZ": {"esg_rating": "BBB", "carbon_targets": 70, "community": 70, "community_initiatives": "Digital inclusion, STEM education"},
-    "NFLX": {"esg_rating": "A", "carbon_targets": 80, "community": 75, "community_initiatives": "Diverse content creation, accessibility"},
-    "PFE": {"esg_rating": "AA", "carbon_targets": 60, "community": 95, "community_initiatives": "Global health, vaccine equity"},
-    "XOM": {"esg_rating": "BB", "carbon_targets": 30, "community": 60, "community_initiatives": "STEM education, energy education"},
-    "BA": {"esg_rating": "BB", "carbon_targets": 45, "community": 70, "community_initiatives": "STEM education, aerospace programs"},
-    "CVX": {"esg_rating": "BB", "carbon_targets": 35, "community": 65, "community_initiatives": "STEM education, community development"}
-}
-
-# Add ESG data for ETFs (different scoring)
-ETF_ESG_DATA = {
-    "ESGU": {"esg_rating": "AA", "carbon_targets": 90, "community": 85, "community_initiatives": "ESG-focused investment, sustainable growth"},
-    "ICLN": {"esg_rating": "AAA", "carbon_targets": 95, "community": 80, "community_initiatives": "Clean energy investment, environmental impact"},
-    "ESGV": {"esg_rating": "AA", "carbon_targets": 85, "community": 80, "community_initiatives": "ESG value investing, responsible growth"},
-    "VTI": {"esg_rating": "A", "carbon_targets": 70, "community": 75, "community_initiatives": "Broad market exposure, diversified impact"},
-    "QQQ": {"esg_rating": "A", "carbon_targets": 75, "community": 70, "community_initiatives": "Technology sector focus, innovation"},
-    "SCHD": {"esg_rating": "A", "carbon_targets": 60, "community": 80, "community_initiatives": "Dividend focus, income generation"},
-    "VIG": {"esg_rating": "A", "carbon_targets": 65, "community": 85, "community_initiatives": "Dividend growth, sustainable income"},
-    "AGG": {"esg_rating": "AA", "carbon_targets": 70, "community": 80, "community_initiatives": "Fixed income, stability focus"}
-}
-
-def get_esg_data(ticker, is_etf=False):
+def get_esg_data(ticker, is_etf=False, sector=None):
     """Get ESG data for a company or ETF"""
-    if is_etf:
-        if ticker in ETF_ESG_DATA:
-            return ETF_ESG_DATA[ticker]
-        else:
-            return {
-                "esg_rating": "A",
-                "carbon_targets": 70,
-                "community": 75,
-                "community_initiatives": "Diversified investment approach"
-            }
-    else:
-        if ticker in ESG_DATA:
-            return ESG_DATA[ticker]
-        else:
-            return {
-                "esg_rating": "BBB",
-                "carbon_targets": 65,
-                "community": 70,
-                "community_initiatives": "Standard community engagement programs"
-            }
-
-
-def calculate_esg_score(ticker, is_etf=False):
+    # Known tickers come from the ESG dataset (data/esg.csv or MTWB_ESG_PATH);
+    # others get the medians of their sector peers in it, as in streamlit_app.py and the CLI
+    return get_esg_store().lookup(ticker, sector, etf=is_etf)
+
+def calculate_esg_score(ticker, is_etf=False, sector=None):
     """Calculate ESG Score (0-25 points)"""
-    esg_data = get_esg_data(ticker, is_etf)
+    esg_data = get_esg_data(ticker, is_etf, sector)
     
     esg_rating_score = ESG_RATING_SCORES.get(esg_data["esg_rating"], 50)
     
@@ -402,44 +348,66 @@ def calculate_esg_score(ticker, is_etf=False):
         "esg_score": esg_score
     }
 
+def fetch_financial_data(ticker, is_etf=False):
+    """Fetch comprehensive financial data, raising on any fetch error"""
+    info = cached_info(ticker)
+    
+    # Basic data
+    pe_ratio = info.get("trailingPE", np.nan)
+    beta = info.get("beta", np.nan)
+    dividend_yield = (info.get("dividendYield", 0) or 0)  # Keep as decimal (0.04 = 4%)
+    sector = info.get("sector", "ETF" if is_etf else "Unknown")
+    profit_margin = (info.get("profitMargins", np.nan) or 0)  # Keep as decimal (0.15 = 15%)
+    roe = (info.get("returnOnEquity", np.nan) or 0)  # Keep as decimal (0.12 = 12%)
+    fiftytwo_wk_change = (info.get("52WeekChange", np.nan) or 0)  # Keep as decimal (0.25 = 25%)
+    market_cap = info.get("marketCap", np.nan)
+    current_price = info.get("currentPrice", np.nan)
+    
+    # ESG data
+    esg_data = calculate_esg_score(ticker, is_etf, sector)
+    
+    return {
+        "ticker": ticker,
+        "sector": sector,
+        "current_price": current_price,
+        "market_cap": market_cap,
+        "pe_ratio": pe_ratio,
+        "beta": beta,
+        "dividend_yield": dividend_yield,
+        "profit_margin": profit_margin,
+        "roe": roe,
+        "fiftytwo_wk_change": fiftytwo_wk_change,
+        "is_etf": is_etf,
+        **esg_data
+    }
+
+
+# Seconds an individual analysis is reused before the ticker is looked up again
+ANALYSIS_CACHE_SECONDS = float(os.environ.get("MTWB_ANALYSIS_CACHE_SECONDS", "30"))
+
+@st.cache_resource
+def get_analysis_flights():
+    """Coalesces identical individual-analysis lookups across every session"""
+    return SingleFlight("individual_analysis", ttl=ANALYSIS_CACHE_SECONDS)
+
 def get_financial_data(ticker, is_etf=False):
     """Get comprehensive financial data"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Basic data
-        pe_ratio = info.get("trailingPE", np.nan)
-        beta = info.get("beta", np.nan)
-        dividend_yield = (info.get("dividendYield", 0) or 0)  # Keep as decimal (0.04 = 4%)
-        sector = info.get("sector", "ETF" if is_etf else "Unknown")
-        profit_margin = (info.get("profitMargins", np.nan) or 0)  # Keep as decimal (0.15 = 15%)
-        roe = (info.get("returnOnEquity", np.nan) or 0)  # Keep as decimal (0.12 = 12%)
-        fiftytwo_wk_change = (info.get("52WeekChange", np.nan) or 0)  # Keep as decimal (0.25 = 25%)
-        market_cap = info.get("marketCap", np.nan)
-        current_price = info.get("currentPrice", np.nan)
-        
-        # ESG data
-        esg_data = calculate_esg_score(ticker, is_etf)
-        
-        return {
-            "ticker": ticker,
-            "sector": sector,
-            "current_price": current_price,
-            "market_cap": market_cap,
-            "pe_ratio": pe_ratio,
-            "beta": beta,
-            "dividend_yield": dividend_yield,
-            "profit_margin": profit_margin,
-            "roe": roe,
-            "fiftytwo_wk_change": fiftytwo_wk_change,
-            "is_etf": is_etf,
-            **esg_data
-        }
+        # Keyed on the ESG dataset version too, so an edited file isn't masked by a cached result
+        key = (ticker, is_etf, get_esg_store().version)
+        data = get_analysis_flights().do(key, fetch_financial_data, ticker, is_etf)
+        # The result is shared between sessions; hand each caller its own copy
+        return dict(data)
+    except CircuitOpenError:
+        FETCH_FAILURES.inc(site="get_financial_data")
+        st.warning(f"Yahoo Finance is throttling requests; {ticker} has no cached data yet. Try again shortly.")
+        return None
     except Exception as e:
+        FETCH_FAILURES.inc(site="get_financial_data")
         st.error(f"Error fetching data for {ticker}: {str(e)}")
         return None
 
+# Not called by the app (it scores with calculate_mtwb_scores_v2); kept only as the reference benchmarks/bench_scoring.py times the batch scorer against
 def calculate_mtwb_score(data):
     """Calculate comprehensive MTWB score"""
     if not data:
@@ -487,31 +455,665 @@ def calculate_mtwb_score(data):
         "esg_score_normalized": round(esg_score_normalized, 1)
     }
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_top_rankings():
-    """Get top 50 stocks and ETFs by MTWB score"""
-    all_data = []
+# Seconds between background refreshes of the rankings snapshot
+RANKINGS_REFRESH_SECONDS = int(os.environ.get("MTWB_RANKINGS_REFRESH_SECONDS", "300"))
+# A snapshot file scored with different settings is ignored rather than served
+SNAPSHOT_META = {"weights": MTWB_WEIGHTS, "risk_weight": DEFAULT_RISK_WEIGHT}
+
+def score_records(all_data):
+    """MTWB scores for a list of fetched financial data dicts, scored in one vectorized pass"""
+    scores = calculate_mtwb_scores_v2(frame_from_records_v2(all_data), MTWB_WEIGHTS)
+    if DEFAULT_RISK_WEIGHT:
+        # Blend in realized risk from the local price history (python -m mtwb.history)
+        scores = add_risk_components(scores, [data["ticker"] for data in all_data], DEFAULT_RISK_WEIGHT)
+        scores["mtwb_score"] = round_like_python(scores["mtwb_score"])
+    return scores
+
+@timed_function(REFRESH_SECONDS, job="rankings")
+def compute_rankings():
+    """Fetch and score the full universe; returns (every scored security as a DataFrame, best first, failed tickers)"""
+    # Fetch the full stock and ETF universe concurrently
+    jobs = [(ticker, False) for ticker in COMPANIES] + [(ticker, True) for ticker in ETFS]
+    results, failures = fetch_many(jobs, lambda job: fetch_financial_data(*job))
+    failed = [ticker for ticker, _ in failures]
+    if failed:
+        FETCH_FAILURES.inc(len(failed), site="compute_rankings")
+    
+    all_data = [data for data in results if data]
+    if not all_data:
+        return pd.DataFrame(), failed
+    
+    scores = score_records(all_data)
+    
+    # Stable descending sort keeps the fetch order for tied scores
+    order = np.argsort(-scores["mtwb_score"].to_numpy(), kind="stable")
+    ranked = pd.DataFrame(all_data).drop(columns=scores.columns, errors="ignore").join(scores)
+    return ranked.iloc[order].reset_index(drop=True), failed
+
+def write_rankings_snapshot(ranked, failed, path=DEFAULT_SNAPSHOT_PATH):
+    """Persist the full rankings so the next cold start renders them without fetching"""
+    write_snapshot(path, ranked, meta={**SNAPSHOT_META, "failed": failed})
+
+def refresh_top_rankings():
+    """
+    Background refresh: recompute and persist the full rankings; returns
+    (top 50 rankings, failed tickers, ScoreMatrix of the whole universe)
+    """
+    ranked, failed = compute_rankings()
+    if len(ranked):
+        try:
+            write_rankings_snapshot(ranked, failed)
+        except OSError:
+            # A read-only deploy still serves the in-memory rankings
+            FETCH_FAILURES.inc(site="write_rankings_snapshot")
+    return ranked.head(50).to_dict("records"), failed, ScoreMatrix.from_frame(ranked, DEFAULT_RISK_WEIGHT)
+
+@st.cache_resource
+def get_snapshot_file():
+    """The rankings snapshot file, remapped whenever the offline job replaces it"""
+    return SnapshotFile(DEFAULT_SNAPSHOT_PATH)
+
+@st.cache_resource(max_entries=2)
+def get_snapshot_matrix(created_at, _ranking_snapshot):
+    """Component score matrix of a snapshot file, built once per file"""
+    return ScoreMatrix.from_snapshot(_ranking_snapshot, DEFAULT_RISK_WEIGHT)
+
+def load_snapshot_rankings():
+    """The snapshot file's top 50 as a Snapshot, or None if it is missing or was scored with other settings"""
+    ranking_snapshot = get_snapshot_file().get()
+    if ranking_snapshot is None:
+        return None
+    meta = ranking_snapshot.meta
+    if {key: meta.get(key) for key in SNAPSHOT_META} != SNAPSHOT_META:
+        return None
+    universe = get_snapshot_matrix(ranking_snapshot.created_at, ranking_snapshot)
+    return Snapshot((ranking_snapshot.top(50), meta.get("failed", []), universe), ranking_snapshot.created_at)
+
+@st.cache_resource
+def get_rankings_refresher():
+    """Shared background refresher that keeps the rankings snapshot warm"""
+    refresher = SnapshotRefresher(refresh_top_rankings, RANKINGS_REFRESH_SECONDS, name="mtwb-rankings")
+    # A fresh snapshot file already covers the first refresh interval
+    from_file = load_snapshot_rankings()
+    return refresher.start(delay=max(0, RANKINGS_REFRESH_SECONDS - from_file.age) if from_file else 0)
+
+def latest_rankings():
+    """The newer of the snapshot file and the background refresh; only blocks when neither exists yet"""
+    from_file = load_snapshot_rankings()
+    refresher = get_rankings_refresher()
+    computed = refresher.get(timeout=0 if from_file else None)
+    if from_file is not None and (computed is None or from_file.created_at > computed.created_at):
+        return from_file
+    return computed
+
+class RankingsView(NamedTuple):
+    """A rankings snapshot plus the structures every section reads from it"""
+
+    rankings: list
+    frame: pd.DataFrame
+    # ticker -> (1-based rank, ranking dict)
+    by_ticker: dict
+    # Asset-type and ESG filters over frame
+    screen: ScreeningIndex
+    created_at: float
+    # Component weights the rankings are scored with, keyed by component column
+    weights: dict
+    # Component scores of the whole universe, for re-ranking under other weights
+    universe: ScoreMatrix
+
+def make_rankings_view(created_at, rankings, weights, universe):
+    """A RankingsView over ranking dicts scored with `weights`"""
+    frame = pd.DataFrame(rankings)
+    return RankingsView(
+        rankings=rankings,
+        frame=frame,
+        by_ticker={item['ticker']: (rank, item) for rank, item in enumerate(rankings, 1)},
+        screen=ScreeningIndex(frame, sector="sector", etf="is_etf") if rankings else None,
+        created_at=created_at,
+        weights=weights,
+        universe=universe
+    )
+
+@st.cache_resource(max_entries=2)
+def build_rankings_view(created_at, _rankings, _universe=None):
+    """Build the DataFrame and ticker index once per snapshot, shared by every session and rerun"""
+    return make_rankings_view(created_at, _rankings, component_weights(MTWB_WEIGHTS), _universe)
+
+@st.cache_resource(max_entries=16)
+def build_reweighted_view(created_at, weights, _view):
+    """
+    Re-rank the view's whole universe under `weights` (a tuple of (component,
+    weight) pairs): one matrix-vector product over the cached score matrix,
+    then the top rows' records. Shared by every session using the same weights.
+    """
+    weights = component_weights(dict(weights))
+    rows, scores = _view.universe.top(weights, len(_view.rankings))
+    rankings = _view.universe.records(rows)
+    for item, score in zip(rankings, scores[rows].tolist()):
+        item["mtwb_score"] = score
+    return make_rankings_view(created_at, rankings, weights, _view.universe)
+
+def get_rankings_view(weights=None):
+    """
+    Get the top 50 stocks and ETFs by MTWB score from the latest snapshot,
+    re-ranked under `weights` (by component) when given
+    """
+    snapshot = latest_rankings()
+    record_cache_lookup("rankings_snapshot", miss=snapshot is None)
+    if snapshot is None:
+        return build_rankings_view(0.0, [])
+    rankings, _, universe = snapshot.value
+    view = build_rankings_view(snapshot.created_at, rankings, universe)
+    if weights is None or not rankings:
+        return view
+    return build_reweighted_view(snapshot.created_at, tuple(weights.items()), view)
+
+def show_rankings_status():
+    """Show the rankings snapshot age and any tickers that failed to refresh"""
+    refresher = get_rankings_refresher()
+    snapshot = latest_rankings()
+    if snapshot is None:
+        st.error(f"Rankings are unavailable: {refresher.last_error}")
+        return
+    _, failed, _ = snapshot.value
+    status = f"Rankings updated {describe_age(snapshot.age)}"
+    if refresher.refreshing:
+        status += " · refreshing in the background"
+    st.caption(status)
+    if failed:
+        st.warning(f"Could not fetch data for {len(failed)} securities: {', '.join(failed)}")
+    if refresher.last_error is not None:
+        st.warning(f"Last background refresh failed, showing previous rankings: {refresher.last_error}")
+
+
+@st.fragment
+@timed_function(RENDER_SECONDS, section="individual_analysis")
+def render_individual_analysis(weights):
+    """
+    Ticker lookup and score breakdown, scored like the rankings with the
+    sidebar's component weights; reruns on its own when the ticker changes
+    """
+    # Input section
+    st.markdown("### Enter Ticker Symbol")
+    ticker_input = st.text_input(
+        "Stock or ETF Ticker",
+        placeholder="e.g., AAPL, MSFT, ESGU, VTI",
+        help="Enter any valid stock or ETF ticker symbol"
+    ).upper().strip()
     
-    # Get stock data
-    for ticker in COMPANIES[:50]:  # Limit to first 50 for performance
-        data = get_financial_data(ticker, False)
-        if data:
-            scores = calculate_mtwb_score(data)
-            if scores:
-                all_data.append({**data, **scores})
+    if ticker_input:
+        with st.spinner(f"Analyzing {ticker_input}..."):
+            # Determine if it's an ETF
+            is_etf = ticker_input in ETFS
+            
+            # Get data
+            data = get_financial_data(ticker_input, is_etf)
+            
+            if data:
+                # The rankings' own pipeline, so a ranked ticker shows the same score here
+                scored = score_records([data])
+                if weights != component_weights(MTWB_WEIGHTS):
+                    scored["mtwb_score"] = ScoreMatrix.from_frame(scored, DEFAULT_RISK_WEIGHT).scores(weights)
+                scores = scored.iloc[0].to_dict()
+                
+                if scores:
+                    # Main score display
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h2 style="color: #000000 !important;">MTWB Score: {scores['mtwb_score']}/100</h2>
+                        <p style="color: #000000 !important;"><strong>{ticker_input}</strong> - {data['sector']} {'(ETF)' if is_etf else '(Stock)'}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    # Detailed metrics
+                    col_m1, col_m2 = st.columns(2)
+                    
+                    with col_m1:
+                        st.metric("Current Price", f"${data['current_price']:.2f}" if not pd.isna(data['current_price']) else "N/A")
+                        st.metric("Market Cap", f"${data['market_cap']/1e9:.1f}B" if not pd.isna(data['market_cap']) else "N/A")
+                        st.metric("P/E Ratio", f"{data['pe_ratio']:.2f}" if not pd.isna(data['pe_ratio']) else "N/A")
+                        st.metric("Beta (Risk)", f"{data['beta']:.2f}" if not pd.isna(data['beta']) else "N/A")
+                    
+                    with col_m2:
+                        st.metric("Dividend Yield", f"{data['dividend_yield']:.4f}" if not pd.isna(data['dividend_yield']) else "N/A")
+                        st.metric("Profit Margin", f"{data['profit_margin']:.4f}" if not pd.isna(data['profit_margin']) else "N/A")
+                        st.metric("ROE", f"{data['roe']:.4f}" if not pd.isna(data['roe']) else "N/A")
+                        st.metric("52W Change", f"{data['fiftytwo_wk_change']:.4f}" if not pd.isna(data['fiftytwo_wk_change']) else "N/A")
+                    
+                    # Score breakdown chart
+                    score_data = {
+                        'Metric': ['Growth', 'Risk Mgmt', 'Dividend', 'Profit', 'ROE', 'Valuation', 'ESG'],
+                        'Score': [scores[name] for name in COMPONENT_LABELS],
+                        'Weight (%)': [round(weights[name] * 100, 1) for name in COMPONENT_LABELS]
+                    }
+                    
+                    df_scores = pd.DataFrame(score_data)
+                    
+                    fig = px.bar(
+                        df_scores,
+                        x='Metric',
+                        y='Score',
+                        color='Score',
+                        color_continuous_scale='RdYlGn',
+                        title=f"MTWB Score Breakdown for {ticker_input}",
+                        text='Score',
+                        hover_data=['Weight (%)']
+                    )
+                    fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
+                    fig.update_layout(height=500, showlegend=False)
+                    st.plotly_chart(fig, use_container_width=True)
+                    st.caption("Weights: " + ", ".join(
+                        f"{metric} {weight}%" for metric, weight in zip(score_data['Metric'], score_data['Weight (%)'])
+                    ))
+                    
+                    # ESG details
+                    if not is_etf:
+                        st.markdown(f"""
+                        <div class="esg-card">
+                            <h3 style="color: #000000 !important;">ESG & Community Impact</h3>
+                            <p style="color: #000000 !important;"><strong>ESG Rating:</strong> {data['esg_rating']} | <strong>ESG Score:</strong> {data['esg_score']:.1f}/25</p>
+                            <p style="color: #000000 !important;"><strong>Carbon Targets:</strong> {data['carbon_targets']}/100 | <strong>Community Engagement:</strong> {data['community']}/100</p>
+                            <p style="color: #000000 !important;"><strong>Community Initiatives:</strong> {data['community_initiatives']}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
+                    
+                    # Investment recommendation
+                    st.markdown("## MTWB Investment Perspective")
+                    
+                    if scores['mtwb_score'] >= 80:
+                        st.success(f"**Excellent Match for MTWB**: {ticker_input} demonstrates exceptional alignment with MTWB's values of financial performance and community impact.")
+                    elif scores['mtwb_score'] >= 65:
+                        st.info(f"**Good Fit for MTWB**: {ticker_input} shows solid fundamentals with meaningful community engagement.")
+                    elif scores['mtwb_score'] >= 50:
+                        st.warning(f"**Moderate Fit**: {ticker_input} has mixed performance. Consider deeper ESG analysis.")
+                    else:
+                        st.error(f"**Poor Fit for MTWB**: {ticker_input} may not align with MTWB's mission of community impact.")
+
+def render_top_aligned(view):
+    """Quick top 10 next to the individual analysis"""
+    st.markdown("## Top MTWB Aligned")
     
-    # Get ETF data
-    for ticker in ETFS[:30]:  # Limit to first 30 for performance
-        data = get_financial_data(ticker, True)
-        if data:
-            scores = calculate_mtwb_score(data)
-            if scores:
-                all_data.append({**data, **scores})
+    # Quick top 10
+    top_data = view.rankings[:10]
+    for i, item in enumerate(top_data):
+        st.markdown(f"""
+        <div class="ranking-card">
+            <strong>#{i+1} {item['ticker']}</strong><br>
+            <span style="color: #000000; font-size: 1.2em;">{item['mtwb_score']}/100</span><br>
+            <small>{item['sector']} {'(ETF)' if item['is_etf'] else '(Stock)'}</small>
+        </div>
+        """, unsafe_allow_html=True)
+
+@st.fragment
+@timed_function(RENDER_SECONDS, section="rankings")
+def render_rankings(view):
+    """Top 50 list, filters and detail panel; clicking a ranking reruns only this section"""
+    st.markdown("## Top 50 MTWB Rankings")
     
-    # Sort by MTWB score
-    all_data.sort(key=lambda x: x['mtwb_score'], reverse=True)
-    return all_data[:50]
+    if view.rankings:
+        # Display options
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            show_type = st.selectbox("Show", ["All", "Stocks Only", "ETFs Only"])
+        with col2:
+            min_esg_rating = st.selectbox("Minimum ESG rating", ["Any"] + ESG_RATINGS)
+        with col3:
+            num_display = st.slider("Number to display", 10, 50, 25)
+        
+        # Filter data
+        universe = {"All": "all", "Stocks Only": "stocks", "ETFs Only": "etfs"}[show_type]
+        df_filtered = view.screen.select(
+            num_display,
+            universe,
+            min_esg_rating=None if min_esg_rating == "Any" else min_esg_rating
+        )
+        
+        # Initialize session state for selected ticker
+        if 'selected_ticker' not in st.session_state:
+            st.session_state.selected_ticker = None
+        
+        # Display rankings with clickable functionality
+        for rank, row in enumerate(df_filtered.to_dict("records"), 1):
+            
+            # Create clickable button for each ranking
+            if st.button(f"#{rank} {row['ticker']} - {row['mtwb_score']}/100", 
+                       key=f"rank_{rank}_{row['ticker']}", 
+                       help=f"Click to view detailed analysis of {row['ticker']}",
+                       use_container_width=True):
+                st.session_state.selected_ticker = row['ticker']
+            
+            # Show basic info
+            st.markdown(f"""
+            <div class="ranking-card">
+                <div style="display: flex; justify-content: space-between; align-items: center;">
+                    <div>
+                        <strong>#{rank} {row['ticker']}</strong> - {row['sector']} {'(ETF)' if row['is_etf'] else '(Stock)'}<br>
+                        <small>ESG: {row['esg_rating']} | Community: {row['community']}/100</small>
+                    </div>
+                    <div style="text-align: right;">
+                        <span style="color: #000000; font-size: 1.5em; font-weight: bold;">{row['mtwb_score']}</span><br>
+                        <small>/100</small>
+                    </div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        # Show detailed breakdown for selected ticker
+        if st.session_state.selected_ticker in view.by_ticker:
+            render_selected_ticker(view, st.session_state.selected_ticker)
+        
+        # Summary statistics
+        st.markdown("## Ranking Summary")
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Average MTWB Score", f"{df_filtered['mtwb_score'].mean():.1f}")
+        with col2:
+            st.metric("Top Score", f"{df_filtered['mtwb_score'].max():.1f}")
+        with col3:
+            st.metric("ESG Leaders (AA+)", f"{len(df_filtered[df_filtered['esg_rating'].isin(['AAA', 'AA'])])}")
 
+def render_selected_ticker(view, ticker):
+    """Detailed analysis of one ranked security, looked up by ticker"""
+    rank, selected_data = view.by_ticker[ticker]
+    st.markdown("---")
+    st.markdown(f"## Detailed Analysis: {ticker}")
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        st.markdown("### 📈 Financial Metrics")
+        # Format values properly
+        current_price = f"${selected_data.get('current_price', 0):.2f}" if selected_data.get('current_price') and not pd.isna(selected_data.get('current_price')) else "N/A"
+        market_cap = f"${selected_data.get('market_cap', 0)/1e9:.1f}B" if selected_data.get('market_cap') and not pd.isna(selected_data.get('market_cap')) else "N/A"
+        pe_ratio = f"{selected_data.get('pe_ratio', 0):.2f}" if selected_data.get('pe_ratio') and not pd.isna(selected_data.get('pe_ratio')) else "N/A"
+        beta = f"{selected_data.get('beta', 0):.2f}" if selected_data.get('beta') and not pd.isna(selected_data.get('beta')) else "N/A"
+        dividend_yield = f"{selected_data.get('dividend_yield', 0):.4f}"
+        profit_margin = f"{selected_data.get('profit_margin', 0):.4f}"
+        roe = f"{selected_data.get('roe', 0):.4f}"
+        fiftytwo_wk_change = f"{selected_data.get('fiftytwo_wk_change', 0):.4f}"
+        
+        st.markdown(f"""
+        <div class="metric-card" style="color: #000000 !important;">
+            <h4 style="color: #000000 !important;">Current Price: {current_price}</h4>
+            <h4 style="color: #000000 !important;">Market Cap: {market_cap}</h4>
+            <h4 style="color: #000000 !important;">P/E Ratio: {pe_ratio}</h4>
+            <h4 style="color: #000000 !important;">Beta (Risk): {beta}</h4>
+            <h4 style="color: #000000 !important;">Dividend Yield: {dividend_yield}</h4>
+            <h4 style="color: #000000 !important;">Profit Margin: {profit_margin}</h4>
+            <h4 style="color: #000000 !important;">ROE: {roe}</h4>
+            <h4 style="color: #000000 !important;">52W Change: {fiftytwo_wk_change}</h4>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        if not selected_data.get('is_etf', False):
+            st.markdown("### ESG & Community")
+            st.markdown(f"""
+            <div class="esg-card" style="color: #000000 !important;">
+                <h4 style="color: #000000 !important;">ESG Rating: {selected_data.get('esg_rating', 'N/A')}</h4>
+                <h4 style="color: #000000 !important;">ESG Score: {selected_data.get('esg_score', 0):.1f}/25</h4>
+                <h4 style="color: #000000 !important;">Carbon Targets: {selected_data.get('carbon_targets', 0)}/100</h4>
+                <h4 style="color: #000000 !important;">Community: {selected_data.get('community', 0)}/100</h4>
+                <p style="color: #000000 !important;"><strong>Initiatives:</strong> {selected_data.get('community_initiatives', 'N/A')}</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("### MTWB Score Breakdown")
+        
+        # Create detailed breakdown with the weights the rankings were scored with
+        breakdown_data = {
+            'Metric': list(COMPONENT_LABELS.values()),
+            'Weight (%)': [round(view.weights[name] * 100, 1) for name in COMPONENT_LABELS],
+            'Score': [selected_data.get(name, 0) for name in COMPONENT_LABELS],
+            'Weighted Contribution': [
+                round(selected_data.get(name, 0) * view.weights[name], 1) for name in COMPONENT_LABELS
+            ]
+        }
+        
+        df_breakdown = pd.DataFrame(breakdown_data)
+        
+        # Display breakdown table
+        st.dataframe(df_breakdown, use_container_width=True)
+        
+        # Create visualization
+        fig_breakdown = px.bar(
+            df_breakdown,
+            x='Metric',
+            y='Score',
+            color='Weight (%)',
+            color_continuous_scale='RdYlGn',
+            title=f"MTWB Score Components for {ticker}",
+            text='Score',
+            hover_data=['Weight (%)', 'Weighted Contribution']
+        )
+        fig_breakdown.update_traces(texttemplate='%{text:.1f}', textposition='outside')
+        fig_breakdown.update_layout(height=500, showlegend=False)
+        st.plotly_chart(fig_breakdown, use_container_width=True)
+        
+        # Summary
+        total_score = sum(breakdown_data['Weighted Contribution'])
+        st.markdown(f"""
+        <div class="metric-card" style="color: #000000 !important;">
+            <h3 style="color: #000000 !important;">Total MTWB Score: {total_score:.1f}/100</h3>
+            <p style="color: #000000 !important;"><strong>Rank:</strong> #{rank} out of {len(view.rankings)}</p>
+            <p style="color: #000000 !important;"><strong>Category:</strong> {selected_data['sector']} {'(ETF)' if selected_data.get('is_etf', False) else '(Stock)'}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+@st.cache_resource(max_entries=2)
+def build_overview_figures(created_at, weights, _frame):
+    """Market overview charts, built once per rankings snapshot and weighting"""
+    df = _frame
+    
+    # Sector distribution
+    sector_counts = df['sector'].value_counts().head(10)
+    
+    fig_sector = px.pie(
+        values=sector_counts.values,
+        names=sector_counts.index,
+        title="Top 50 Distribution by Sector"
+    )
+    
+    # Score distribution
+    fig_dist = px.histogram(
+        df,
+        x='mtwb_score',
+        nbins=20,
+        title="MTWB Score Distribution",
+        labels={'mtwb_score': 'MTWB Score', 'count': 'Number of Securities'}
+    )
+    
+    # ESG vs Performance
+    fig_scatter = px.scatter(
+        df,
+        x='esg_score',
+        y='mtwb_score',
+        color='is_etf',
+        title="ESG Score vs MTWB Score",
+        labels={'esg_score': 'ESG Score', 'mtwb_score': 'MTWB Score'},
+        hover_data=['ticker', 'sector']
+    )
+    return fig_sector, fig_dist, fig_scatter
+
+@timed_function(RENDER_SECONDS, section="market_overview")
+def render_market_overview(view):
+    """Sector, score and ESG charts for the current rankings"""
+    st.markdown("## Market Overview")
+    
+    if view.rankings:
+        fig_sector, fig_dist, fig_scatter = build_overview_figures(view.created_at, tuple(view.weights.values()), view.frame)
+        st.plotly_chart(fig_sector, use_container_width=True)
+        st.plotly_chart(fig_dist, use_container_width=True)
+        st.plotly_chart(fig_scatter, use_container_width=True)
+
+def score_portfolio_tickers(tickers):
+    """Score a batch of portfolio tickers; returns (scores and current price indexed by ticker, failed tickers)"""
+    jobs = [(ticker, ticker in ETFS) for ticker in tickers]
+    results, failures = fetch_many(jobs, lambda job: fetch_financial_data(*job))
+    failed = [ticker for ticker, _ in failures]
+    if failed:
+        FETCH_FAILURES.inc(len(failed), site="portfolio")
+    all_data = [data for data in results if data]
+    if not all_data:
+        return pd.DataFrame(), failed
+    scores = score_records(all_data)
+    scores["current_price"] = [data["current_price"] for data in all_data]
+    scores.index = [data["ticker"] for data in all_data]
+    return scores, failed
+
+# Largest holdings listed under the portfolio breakdown
+PORTFOLIO_TOP_HOLDINGS = 25
+
+PORTFOLIO_COMPONENTS = {
+    'Growth': 'growth_score',
+    'Risk Mgmt': 'volatility_score',
+    'Dividend': 'dividend_score',
+    'Profit': 'profit_score',
+    'ROE': 'roe_score',
+    'Valuation': 'pe_score',
+    'ESG': 'esg_score_normalized'
+}
+
+def show_portfolio_result(result, progress_text, key):
+    """Aggregate score, component breakdown and largest holdings of a (possibly partial) portfolio result"""
+    st.caption(progress_text)
+    if np.isnan(result.scores['mtwb_score']):
+        st.info("No positions scored yet.")
+        return
+    
+    scored = result.holdings['weight'].notna()
+    st.markdown(f"""
+    <div class="metric-card">
+        <h2 style="color: #000000 !important;">Portfolio MTWB Score: {result.scores['mtwb_score']:.1f}/100</h2>
+        <p style="color: #000000 !important;">{int(scored.sum())} holdings scored, weighted by {result.sizing.replace('_', ' ')}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    df_scores = pd.DataFrame({
+        'Metric': list(PORTFOLIO_COMPONENTS),
+        'Score': [result.scores[column] for column in PORTFOLIO_COMPONENTS.values()]
+    })
+    fig = px.bar(
+        df_scores,
+        x='Metric',
+        y='Score',
+        color='Score',
+        color_continuous_scale='RdYlGn',
+        title="Holdings-Weighted Score Breakdown",
+        text='Score'
+    )
+    fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
+    fig.update_layout(height=450, showlegend=False)
+    st.plotly_chart(fig, use_container_width=True, key=f"{key}_breakdown")
+    
+    st.markdown("### Largest Holdings")
+    top = result.holdings[scored].head(PORTFOLIO_TOP_HOLDINGS)
+    st.dataframe(
+        top[['ticker', 'weight', 'mtwb_score', 'contribution']].assign(weight=top['weight'] * 100),
+        column_config={
+            'ticker': 'Ticker',
+            'weight': st.column_config.NumberColumn('Weight %', format="%.2f"),
+            'mtwb_score': st.column_config.NumberColumn('MTWB Score', format="%.1f"),
+            'contribution': st.column_config.NumberColumn('Score Contribution', format="%.2f")
+        },
+        hide_index=True,
+        use_container_width=True,
+        key=f"{key}_holdings"
+    )
+
+@st.fragment
+@timed_function(RENDER_SECONDS, section="portfolio")
+def render_portfolio():
+    """Upload a holdings CSV and score it as a whole; partial results are shown while it streams"""
+    st.markdown("## Portfolio Analysis")
+    st.markdown(
+        "Upload a CSV of holdings with a `ticker` (or `symbol`) column and one of `weight`, "
+        "`value`, `market_value` or `shares`. Repeated tickers are summed."
+    )
+    uploaded = st.file_uploader("Holdings CSV", type=["csv"])
+    if uploaded is None:
+        return
+    
+    # A finished upload is kept for the session, so other widgets don't rescore it
+    cached = st.session_state.get("portfolio_result")
+    if cached is not None and cached[0] == uploaded.file_id:
+        result = cached[1]
+    else:
+        progress = st.progress(0.0, text="Reading holdings...")
+        live = st.empty()
+        scorer = PortfolioScorer(score_portfolio_tickers)
+        try:
+            for update, result in enumerate(scorer.stream(uploaded)):
+                read = uploaded.tell() / uploaded.size if uploaded.size else 1.0
+                text = (f"{result.rows_read:,} rows read · {len(result.holdings) - result.pending:,} of "
+                        f"{len(result.holdings):,} distinct tickers scored")
+                progress.progress(1.0 if result.done else min(read, 1.0), text=text)
+                with live.container():
+                    # Each partial result is a new element, so give it its own key
+                    show_portfolio_result(result, "Scoring...", key=f"portfolio_partial_{update}")
+        except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            progress.empty()
+            live.empty()
+            st.error(f"Could not read {uploaded.name}: {e}")
+            return
+        progress.empty()
+        live.empty()
+        st.session_state["portfolio_result"] = (uploaded.file_id, result)
+    
+    summary = f"{result.rows_read:,} rows · {len(result.holdings):,} distinct tickers"
+    if result.coverage is not None:
+        summary += f" · {result.coverage:.1%} of the portfolio scored"
+    show_portfolio_result(result, summary, key="portfolio")
+    if result.rows_skipped:
+        st.warning(f"Skipped {result.rows_skipped:,} rows without a ticker or a positive {result.sizing.replace('_', ' ')}.")
+    if result.failed:
+        st.warning(f"Could not score {len(result.failed)} holdings: {', '.join(result.failed[:50])}"
+                   + (" ..." if len(result.failed) > 50 else ""))
+    st.download_button(
+        "Download scored holdings",
+        result.holdings.to_csv(index=False),
+        file_name="mtwb_portfolio_scores.csv",
+        mime="text/csv"
+    )
+
+def preset_percents(preset):
+    """A weight preset as whole percents by component, the sliders' units"""
+    return {name: round(weight * 100) for name, weight in component_weights(WEIGHT_PRESETS[preset]).items()}
+
+def apply_weight_preset():
+    """Move the weight sliders to the selected preset"""
+    for name, percent in preset_percents(st.session_state.weight_preset).items():
+        st.session_state[f"weight_{name}"] = percent
+
+def render_weight_controls():
+    """
+    Sidebar sliders for the component weights. Returns the weights by
+    component, or None while they match MTWB_WEIGHTS (the snapshot's own
+    ranking); other weights re-rank the whole cached universe.
+    """
+    st.markdown("## MTWB Scoring System")
+    default = preset_percents("MTWB v2")
+    for name, percent in default.items():
+        st.session_state.setdefault(f"weight_{name}", percent)
+    st.selectbox("Start from", list(WEIGHT_PRESETS), key="weight_preset", on_change=apply_weight_preset)
+    percents = {
+        name: st.slider(f"{label} (%)", 0, 100, step=1, key=f"weight_{name}")
+        for name, label in COMPONENT_LABELS.items()
+    }
+    total = sum(percents.values())
+    if not total:
+        st.warning("All weights are zero; ranking with the default MTWB weights.")
+        return None
+    if total != 100:
+        st.caption("Weights are scaled to sum to 100%: " + ", ".join(
+            f"{COMPONENT_LABELS[name]} {percent / total:.1%}" for name, percent in percents.items()
+        ))
+    if DEFAULT_RISK_WEIGHT:
+        st.caption(f"Realized risk keeps its {DEFAULT_RISK_WEIGHT:.0%} share of every score.")
+    return None if percents == default else {name: percent / 100 for name, percent in percents.items()}
+
+@timed_function(RENDER_SECONDS, section="page")
 def main():
     # Header
     st.markdown("""
@@ -522,6 +1124,8 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
+    show_rankings_status()
+    
     # Sidebar
     with st.sidebar:
         st.markdown("## MTWB Mission")
@@ -544,24 +1148,17 @@ def main():
         """)
         
         st.markdown("---")
-        st.markdown("## MTWB Scoring System")
-        st.markdown("""
-        **Financial Metrics (90%)**
-        - Growth Potential (15%)
-        - Risk Management (15%)
-        - Dividend Stability (15%)
-        - Profitability (15%)
-        - ROE Efficiency (15%)
-        - Valuation (15%)
+        weights = render_weight_controls()
         
-        **ESG & Community (10%)**
-        - ESG Rating (4%)
-        - Carbon Targets (3.5%)
-        - Community Engagement (2.5%)
-        """)
+        st.markdown("---")
+        render_admin_panel()
+    
+    # Rankings and the frames derived from them are built once per snapshot and weighting,
+    # and shared by every section
+    view = get_rankings_view(weights)
     
     # Main content tabs
-    tab1, tab2, tab3 = st.tabs(["Individual Analysis", "Top 50 Rankings", "Market Overview"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Individual Analysis", "Top 50 Rankings", "Market Overview", "Portfolio"])
     
     with tab1:
         st.markdown("## Individual Stock & ETF Analysis")
@@ -569,333 +1166,27 @@ def main():
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            # Input section
-            st.markdown("### Enter Ticker Symbol")
-            ticker_input = st.text_input(
-                "Stock or ETF Ticker",
-                placeholder="e.g., AAPL, MSFT, ESGU, VTI",
-                help="Enter any valid stock or ETF ticker symbol"
-            ).upper().strip()
-            
-            if ticker_input:
-                with st.spinner(f"Analyzing {ticker_input}..."):
-                    # Determine if it's an ETF
-                    is_etf = ticker_input in ETFS
-                    
-                    # Get data
-                    data = get_financial_data(ticker_input, is_etf)
-                    
-                    if data:
-                        scores = calculate_mtwb_score(data)
-                        
-                        if scores:
-                            # Main score display
-                            st.markdown(f"""
-                            <div class="metric-card">
-                                <h2 style="color: #000000 !important;">MTWB Score: {scores['mtwb_score']}/100</h2>
-                                <p style="color: #000000 !important;"><strong>{ticker_input}</strong> - {data['sector']} {'(ETF)' if is_etf else '(Stock)'}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Detailed metrics
-                            col_m1, col_m2 = st.columns(2)
-                            
-                            with col_m1:
-                                st.metric("Current Price", f"${data['current_price']:.2f}" if not pd.isna(data['current_price']) else "N/A")
-                                st.metric("Market Cap", f"${data['market_cap']/1e9:.1f}B" if not pd.isna(data['market_cap']) else "N/A")
-                                st.metric("P/E Ratio", f"{data['pe_ratio']:.2f}" if not pd.isna(data['pe_ratio']) else "N/A")
-                                st.metric("Beta (Risk)", f"{data['beta']:.2f}" if not pd.isna(data['beta']) else "N/A")
-                            
-                            with col_m2:
-                                st.metric("Dividend Yield", f"{data['dividend_yield']:.4f}" if not pd.isna(data['dividend_yield']) else "N/A")
-                                st.metric("Profit Margin", f"{data['profit_margin']:.4f}" if not pd.isna(data['profit_margin']) else "N/A")
-                                st.metric("ROE", f"{data['roe']:.4f}" if not pd.isna(data['roe']) else "N/A")
-                                st.metric("52W Change", f"{data['fiftytwo_wk_change']:.4f}" if not pd.isna(data['fiftytwo_wk_change']) else "N/A")
-                            
-                            # Score breakdown chart
-                            score_data = {
-                                'Metric': ['Growth', 'Risk Mgmt', 'Dividend', 'Profit', 'ROE', 'Valuation', 'ESG'],
-                                'Score': [
-                                    scores['growth_score'],
-                                    scores['volatility_score'],
-                                    scores['dividend_score'],
-                                    scores['profit_score'],
-                                    scores['roe_score'],
-                                    scores['pe_score'],
-                                    scores['esg_score_normalized']
-                                ],
-                                'Weight': [15, 15, 15, 15, 15, 15, 10]
-                            }
-                            
-                            df_scores = pd.DataFrame(score_data)
-                            
-                            fig = px.bar(
-                                df_scores,
-                                x='Metric',
-                                y='Score',
-                                color='Score',
-                                color_continuous_scale='RdYlGn',
-                                title=f"MTWB Score Breakdown for {ticker_input}",
-                                text='Score'
-                            )
-                            fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
-                            fig.update_layout(height=500, showlegend=False)
-                            st.plotly_chart(fig, use_container_width=True)
-                            
-                            # ESG details
-                            if not is_etf:
-                                st.markdown(f"""
-                                <div class="esg-card">
-                                    <h3 style="color: #000000 !important;">ESG & Community Impact</h3>
-                                    <p style="color: #000000 !important;"><strong>ESG Rating:</strong> {data['esg_rating']} | <strong>ESG Score:</strong> {data['esg_score']:.1f}/25</p>
-                                    <p style="color: #000000 !important;"><strong>Carbon Targets:</strong> {data['carbon_targets']}/100 | <strong>Community Engagement:</strong> {data['community']}/100</p>
-                                    <p style="color: #000000 !important;"><strong>Community Initiatives:</strong> {data['community_initiatives']}</p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                            
-                            # Investment recommendation
-                            st.markdown("## MTWB Investment Perspective")
-                            
-                            if scores['mtwb_score'] >= 80:
-                                st.success(f"**Excellent Match for MTWB**: {ticker_input} demonstrates exceptional alignment with MTWB's values of financial performance and community impact.")
-                            elif scores['mtwb_score'] >= 65:
-                                st.info(f"**Good Fit for MTWB**: {ticker_input} shows solid fundamentals with meaningful community engagement.")
-                            elif scores['mtwb_score'] >= 50:
-                                st.warning(f"**Moderate Fit**: {ticker_input} has mixed performance. Consider deeper ESG analysis.")
-                            else:
-                                st.error(f"**Poor Fit for MTWB**: {ticker_input} may not align with MTWB's mission of community impact.")
+            render_individual_analysis(view.weights)
         
         with col2:
-            st.markdown("## Top MTWB Aligned")
-            
-            # Quick top 10
-            top_data = get_top_rankings()[:10]
-            for i, item in enumerate(top_data):
-                st.markdown(f"""
-                <div class="ranking-card">
-                    <strong>#{i+1} {item['ticker']}</strong><br>
-                    <span style="color: #000000; font-size: 1.2em;">{item['mtwb_score']}/100</span><br>
-                    <small>{item['sector']} {'(ETF)' if item['is_etf'] else '(Stock)'}</small>
-                </div>
-                """, unsafe_allow_html=True)
+            render_top_aligned(view)
     
     with tab2:
-        st.markdown("## Top 50 MTWB Rankings")
-        
-        # Get rankings
-        rankings = get_top_rankings()
-        
-        if rankings:
-            # Create DataFrame for display
-            df_rankings = pd.DataFrame(rankings)
-            
-            # Display options
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                show_type = st.selectbox("Show", ["All", "Stocks Only", "ETFs Only"])
-            with col2:
-                num_display = st.slider("Number to display", 10, 50, 25)
-            
-            # Filter data
-            if show_type == "Stocks Only":
-                df_filtered = df_rankings[~df_rankings['is_etf']]
-            elif show_type == "ETFs Only":
-                df_filtered = df_rankings[df_rankings['is_etf']]
-            else:
-                df_filtered = df_rankings
-            
-            df_filtered = df_filtered.head(num_display)
-            
-            # Initialize session state for selected ticker
-            if 'selected_ticker' not in st.session_state:
-                st.session_state.selected_ticker = None
-            
-            # Display rankings with clickable functionality
-            for idx, row in df_filtered.iterrows():
-                rank = list(df_filtered.index).index(idx) + 1
-                
-                # Create clickable button for each ranking
-                if st.button(f"#{rank} {row['ticker']} - {row['mtwb_score']}/100", 
-                           key=f"rank_{rank}_{row['ticker']}", 
-                           help=f"Click to view detailed analysis of {row['ticker']}",
-                           use_container_width=True):
-                    st.session_state.selected_ticker = row['ticker']
-                
-                # Show basic info
-                st.markdown(f"""
-                <div class="ranking-card">
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <div>
-                            <strong>#{rank} {row['ticker']}</strong> - {row['sector']} {'(ETF)' if row['is_etf'] else '(Stock)'}<br>
-                            <small>ESG: {row['esg_rating']} | Community: {row['community']}/100</small>
-                        </div>
-                        <div style="text-align: right;">
-                            <span style="color: #000000; font-size: 1.5em; font-weight: bold;">{row['mtwb_score']}</span><br>
-                            <small>/100</small>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Show detailed breakdown for selected ticker
-            if st.session_state.selected_ticker:
-                st.markdown("---")
-                st.markdown(f"## Detailed Analysis: {st.session_state.selected_ticker}")
-                
-                # Find the selected ticker data
-                selected_data = None
-                for item in rankings:
-                    if item['ticker'] == st.session_state.selected_ticker:
-                        selected_data = item
-                        break
-                
-                if selected_data:
-                    col1, col2 = st.columns([1, 2])
-                    
-                    with col1:
-                        st.markdown("### 📈 Financial Metrics")
-                        # Format values properly
-                        current_price = f"${selected_data.get('current_price', 0):.2f}" if selected_data.get('current_price') and not pd.isna(selected_data.get('current_price')) else "N/A"
-                        market_cap = f"${selected_data.get('market_cap', 0)/1e9:.1f}B" if selected_data.get('market_cap') and not pd.isna(selected_data.get('market_cap')) else "N/A"
-                        pe_ratio = f"{selected_data.get('pe_ratio', 0):.2f}" if selected_data.get('pe_ratio') and not pd.isna(selected_data.get('pe_ratio')) else "N/A"
-                        beta = f"{selected_data.get('beta', 0):.2f}" if selected_data.get('beta') and not pd.isna(selected_data.get('beta')) else "N/A"
-                        dividend_yield = f"{selected_data.get('dividend_yield', 0):.4f}"
-                        profit_margin = f"{selected_data.get('profit_margin', 0):.4f}"
-                        roe = f"{selected_data.get('roe', 0):.4f}"
-                        fiftytwo_wk_change = f"{selected_data.get('fiftytwo_wk_change', 0):.4f}"
-                        
-                        st.markdown(f"""
-                        <div class="metric-card" style="color: #000000 !important;">
-                            <h4 style="color: #000000 !important;">Current Price: {current_price}</h4>
-                            <h4 style="color: #000000 !important;">Market Cap: {market_cap}</h4>
-                            <h4 style="color: #000000 !important;">P/E Ratio: {pe_ratio}</h4>
-                            <h4 style="color: #000000 !important;">Beta (Risk): {beta}</h4>
-                            <h4 style="color: #000000 !important;">Dividend Yield: {dividend_yield}</h4>
-                            <h4 style="color: #000000 !important;">Profit Margin: {profit_margin}</h4>
-                            <h4 style="color: #000000 !important;">ROE: {roe}</h4>
-                            <h4 style="color: #000000 !important;">52W Change: {fiftytwo_wk_change}</h4>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        if not selected_data.get('is_etf', False):
-                            st.markdown("### ESG & Community")
-                            st.markdown(f"""
-                            <div class="esg-card" style="color: #000000 !important;">
-                                <h4 style="color: #000000 !important;">ESG Rating: {selected_data.get('esg_rating', 'N/A')}</h4>
-                                <h4 style="color: #000000 !important;">ESG Score: {selected_data.get('esg_score', 0):.1f}/25</h4>
-                                <h4 style="color: #000000 !important;">Carbon Targets: {selected_data.get('carbon_targets', 0)}/100</h4>
-                                <h4 style="color: #000000 !important;">Community: {selected_data.get('community', 0)}/100</h4>
-                                <p style="color: #000000 !important;"><strong>Initiatives:</strong> {selected_data.get('community_initiatives', 'N/A')}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown("### MTWB Score Breakdown")
-                        
-                        # Create detailed breakdown
-                        breakdown_data = {
-                            'Metric': ['Growth Potential', 'Risk Management', 'Dividend Stability', 'Profitability', 'ROE Efficiency', 'Valuation', 'ESG & Community'],
-                            'Weight (%)': [15, 15, 15, 15, 15, 15, 10],
-                            'Score': [
-                                selected_data.get('growth_score', 0),
-                                selected_data.get('volatility_score', 0),
-                                selected_data.get('dividend_score', 0),
-                                selected_data.get('profit_score', 0),
-                                selected_data.get('roe_score', 0),
-                                selected_data.get('pe_score', 0),
-                                selected_data.get('esg_score_normalized', 0)
-                            ],
-                            'Weighted Contribution': [
-                                round(selected_data.get('growth_score', 0) * 0.15, 1),
-                                round(selected_data.get('volatility_score', 0) * 0.15, 1),
-                                round(selected_data.get('dividend_score', 0) * 0.15, 1),
-                                round(selected_data.get('profit_score', 0) * 0.15, 1),
-                                round(selected_data.get('roe_score', 0) * 0.15, 1),
-                                round(selected_data.get('pe_score', 0) * 0.15, 1),
-                                round(selected_data.get('esg_score_normalized', 0) * 0.10, 1)
-                            ]
-                        }
-                        
-                        df_breakdown = pd.DataFrame(breakdown_data)
-                        
-                        # Display breakdown table
-                        st.dataframe(df_breakdown, use_container_width=True)
-                        
-                        # Create visualization
-                        fig_breakdown = px.bar(
-                            df_breakdown,
-                            x='Metric',
-                            y='Score',
-                            color='Weight (%)',
-                            color_continuous_scale='RdYlGn',
-                            title=f"MTWB Score Components for {st.session_state.selected_ticker}",
-                            text='Score',
-                            hover_data=['Weight (%)', 'Weighted Contribution']
-                        )
-                        fig_breakdown.update_traces(texttemplate='%{text:.1f}', textposition='outside')
-                        fig_breakdown.update_layout(height=500, showlegend=False)
-                        st.plotly_chart(fig_breakdown, use_container_width=True)
-                        
-                        # Summary
-                        total_score = sum(breakdown_data['Weighted Contribution'])
-                        st.markdown(f"""
-                        <div class="metric-card" style="color: #000000 !important;">
-                            <h3 style="color: #000000 !important;">Total MTWB Score: {total_score:.1f}/100</h3>
-                            <p style="color: #000000 !important;"><strong>Rank:</strong> #{rank} out of 50</p>
-                            <p style="color: #000000 !important;"><strong>Category:</strong> {selected_data['sector']} {'(ETF)' if selected_data.get('is_etf', False) else '(Stock)'}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-            
-            # Summary statistics
-            st.markdown("## Ranking Summary")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Average MTWB Score", f"{df_filtered['mtwb_score'].mean():.1f}")
-            with col2:
-                st.metric("Top Score", f"{df_filtered['mtwb_score'].max():.1f}")
-            with col3:
-                st.metric("ESG Leaders (AA+)", f"{len(df_filtered[df_filtered['esg_rating'].isin(['AAA', 'AA'])])}")
+        render_rankings(view)
     
     with tab3:
-        st.markdown("## Market Overview")
-        
-        # Sector analysis
-        rankings = get_top_rankings()
-        if rankings:
-            df = pd.DataFrame(rankings)
-            
-            # Sector distribution
-            sector_counts = df['sector'].value_counts().head(10)
-            
-            fig_sector = px.pie(
-                values=sector_counts.values,
-                names=sector_counts.index,
-                title="Top 50 Distribution by Sector"
-            )
-            st.plotly_chart(fig_sector, use_container_width=True)
-            
-            # Score distribution
-            fig_dist = px.histogram(
-                df,
-                x='mtwb_score',
-                nbins=20,
-                title="MTWB Score Distribution",
-                labels={'mtwb_score': 'MTWB Score', 'count': 'Number of Securities'}
-            )
-            st.plotly_chart(fig_dist, use_container_width=True)
-            
-            # ESG vs Performance
-            fig_scatter = px.scatter(
-                df,
-                x='esg_score',
-                y='mtwb_score',
-                color='is_etf',
-                title="ESG Score vs MTWB Score",
-                labels={'esg_score': 'ESG Score', 'mtwb_score': 'MTWB Score'},
-                hover_data=['ticker', 'sector']
-            )
-            st.plotly_chart(fig_scatter, use_container_width=True)
+        render_market_overview(view)
+    
+    with tab4:
+        render_portfolio()
 
 if __name__ == "__main__":
-    main()
+    if "--write-snapshot" in sys.argv[1:]:
+        # Offline job: python streamlit_app_v2.py --write-snapshot
+        ranked, failed = compute_rankings()
+        if not len(ranked):
+            sys.exit(f"No data fetched; {DEFAULT_SNAPSHOT_PATH} left unchanged")
+        write_rankings_snapshot(ranked, failed)
+        print(f"Wrote {len(ranked)} ranked securities to {DEFAULT_SNAPSHOT_PATH} ({len(failed)} failed)")
+    else:
+        main()